@@ -0,0 +1,116 @@
+"""Seeds tasks and dependencies through TaskRepo.persist and reports rows per second.
+
+The per-event path the repositories used before is timed on a sample first, then the
+whole batch (1M tasks plus one dependency each by default) goes through the batch
+persister in one transaction. Uses the database configured through the DB_* variables
+(migrated to head) and removes the seeded rows afterwards.
+
+    ENV_PATH=.env PYTHONPATH=. python benchmarks/bulk_persist.py [tasks] [legacy sample]
+"""
+from time import perf_counter
+from uuid import uuid4
+import asyncio
+import sys
+
+from asyncpg import Connection, connect
+
+from contracts.schemas.task import TaskStatus
+from event_sourcing.entity import EntityEvent
+from power_plant_construction.app.app_config import get_app_config
+from power_plant_construction.db import env_to_dsn
+from power_plant_construction.entities.task import TaskCreated, TaskDependencyAdded
+from power_plant_construction.repositories.task import get_task_repo
+
+
+def make_batch(prefix: str, size: int) -> list[EntityEvent]:
+    batch: list[EntityEvent] = [
+        TaskCreated(
+            entity_id=f"{prefix}-t{i}",
+            title=f"T{i}",
+            description="benchmark task",
+            status=TaskStatus.PENDING,
+            assignee=prefix,
+            author=prefix,
+        )
+        for i in range(size)
+    ]
+    batch.extend(
+        TaskDependencyAdded(entity_id=f"{prefix}-t{i}", depends_on=f"{prefix}-t{i - 1}")
+        for i in range(1, size)
+    )
+    return batch
+
+
+async def legacy_persist(conn: Connection, batch: list[EntityEvent]) -> None:
+    for event in batch:
+        if isinstance(event, TaskCreated):
+            await conn.execute(
+                "insert into tasks (entity_id, title, description, author, assignee, status) "
+                "values ($1, $2, $3, $4, $5, $6)",
+                event.entity_id,
+                event.title,
+                event.description,
+                event.author,
+                event.assignee,
+                event.status,
+            )
+        elif isinstance(event, TaskDependencyAdded):
+            await conn.execute(
+                "insert into task_dependencies (entity_id, depends_on) values ($1, $2)",
+                event.entity_id,
+                event.depends_on,
+            )
+            await conn.execute(
+                "update tasks set unfinished_dependencies = unfinished_dependencies + 1 where entity_id=$1 "
+                "and not exists (select 1 from tasks dep where dep.entity_id=$2 and dep.status=$3)",
+                event.entity_id,
+                event.depends_on,
+                TaskStatus.COMPLETED,
+            )
+
+
+async def timed(label: str, conn: Connection, prefix: str, size: int, legacy: bool) -> None:
+    batch = make_batch(prefix, size)
+    started = perf_counter()
+    if legacy:
+        await legacy_persist(conn, batch)
+    else:
+        await get_task_repo().persist(conn, batch)
+    elapsed = perf_counter() - started
+    print(f"{label:<8} {len(batch):>9} events in {elapsed:>8.2f}s, {len(batch) / elapsed:>10.0f} events/s")
+
+
+async def cleanup(conn: Connection, prefix: str) -> None:
+    await conn.execute("delete from task_dependencies where entity_id like $1", f"{prefix}-%")
+    await conn.execute("delete from tasks where assignee=$1", prefix)
+
+
+async def run(size: int, legacy_sample: int) -> None:
+    app_config = get_app_config()
+    conn = await connect(
+        env_to_dsn(
+            user=app_config.DB_USER,
+            password=app_config.DB_PASSWORD,
+            hosts=app_config.DB_HOSTS,
+            port=app_config.DB_PORT,
+            name=app_config.DB_NAME,
+        )
+    )
+    legacy_prefix = f"bench-{uuid4()}"
+    batch_prefix = f"bench-{uuid4()}"
+    try:
+        await timed("legacy", conn, legacy_prefix, legacy_sample, legacy=True)
+        await timed("batched", conn, batch_prefix, size, legacy=False)
+    finally:
+        await cleanup(conn, legacy_prefix)
+        await cleanup(conn, batch_prefix)
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        run(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 10_000,
+        )
+    )
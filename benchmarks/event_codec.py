@@ -0,0 +1,98 @@
+"""Compares the schema driven event codec with the previous dict based serialize/deserialise.
+
+Round-trips every Task* and Notification* event type `count` times (100k by default)
+through both paths and reports encode and decode throughput.
+
+    PYTHONPATH=. python benchmarks/event_codec.py [count]
+"""
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Callable
+import sys
+
+import orjson
+
+from contracts.schemas.notification import NotificationStatus
+from contracts.schemas.task import TaskStatus
+from event_sourcing.codec import codec_for
+from event_sourcing.entity import EntityEvent
+from power_plant_construction.entities.notification import NotificationCreated, NotificationStatusUpdated
+from power_plant_construction.entities.task import (
+    TaskCreated,
+    TaskDependencyAdded,
+    TaskDependencyRemoved,
+    TaskStatusUpdated,
+)
+
+EVENTS: list[EntityEvent] = [
+    TaskCreated(
+        entity_id="t1",
+        title="T1",
+        description="some description of task T1",
+        status=TaskStatus.PENDING,
+        assignee="u1",
+        author="u0",
+    ),
+    TaskDependencyAdded(entity_id="t1", depends_on="t0"),
+    TaskDependencyRemoved(entity_id="t1", depends_on="t0"),
+    TaskStatusUpdated(entity_id="t1", status=TaskStatus.COMPLETED, author="u0"),
+    NotificationCreated(
+        entity_id="n1",
+        title="New task: T1",
+        content="Please do the following task:\n----\nsome description of task T1",
+        status=NotificationStatus.UNREAD,
+        receiver="u1",
+    ),
+    NotificationStatusUpdated(entity_id="n1", status=NotificationStatus.READ),
+]
+
+
+def legacy_serialize(event: EntityEvent) -> bytes:
+    return orjson.dumps({"head": event.head(), "body": event.body()})
+
+
+def legacy_deserialise(event_type: type, raw: bytes) -> Any:
+    raw_dict = orjson.loads(raw)
+    head = raw_dict["head"]
+    event = event_type(
+        event_created_at=datetime.fromtimestamp(head["event_created_at"] / 1000),
+        entity_id=head["entity_id"],
+        published_at=head["published_at"],
+        **{
+            key: datetime.fromtimestamp(value / 1000) if key.endswith("_at") else value
+            for key, value in raw_dict["body"].items()
+        },
+    )
+    event.source_dump = raw_dict
+    event._event_id = head.get("event_id")
+    return event
+
+
+def rate(count: int, run: Callable[[], Any]) -> float:
+    started = perf_counter()
+    for _ in range(count):
+        run()
+    return count / (perf_counter() - started)
+
+
+def main(count: int) -> None:
+    print(
+        f"{'event':<26} {'encode legacy':>14} {'encode codec':>13} {'decode legacy':>14} {'decode codec':>13}"
+    )
+    for event in EVENTS:
+        event_type = type(event)
+        codec = codec_for(event_type)
+        raw = codec.encode(event)
+        assert codec.encode(codec.decode(raw)) == raw
+
+        rates = (
+            rate(count, lambda: legacy_serialize(event)),
+            rate(count, lambda: codec.encode(event)),
+            rate(count, lambda: legacy_deserialise(event_type, raw)),
+            rate(count, lambda: codec.decode(raw)),
+        )
+        print(f"{event_type.__name__:<26}" + "".join(f" {value:>11.0f}/s" for value in rates))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,72 @@
+"""Times TaskRepo.fetch_by_assignee against the previous join based query.
+
+Seeds 100k tasks for a throwaway assignee, a third of them with two dependencies,
+into the database configured through the usual DB_* variables (migrated to head),
+and removes them afterwards.
+
+    ENV_PATH=.env PYTHONPATH=. python benchmarks/fetch_by_assignee.py [tasks]
+"""
+from time import perf_counter
+from typing import Awaitable, Callable, Sized
+from uuid import uuid4
+import asyncio
+import sys
+
+from asyncpg import connect
+
+from contracts.schemas.task import TaskStatus
+from power_plant_construction.app.app_config import get_app_config
+from power_plant_construction.db import env_to_dsn
+from power_plant_construction.repositories.task import get_task_repo
+
+LEGACY_QUERY = (
+    "select * from tasks t join task_dependencies d on t.entity_id = d.entity_id where assignee=$1 "
+)
+
+
+async def timed(label: str, fetch: Callable[[], Awaitable[Sized]]) -> None:
+    started = perf_counter()
+    rows = await fetch()
+    print(f"{label:<10} {len(rows):>8} rows in {perf_counter() - started:.3f}s")
+
+
+async def run(size: int) -> None:
+    app_config = get_app_config()
+    conn = await connect(
+        env_to_dsn(
+            user=app_config.DB_USER,
+            password=app_config.DB_PASSWORD,
+            hosts=app_config.DB_HOSTS,
+            port=app_config.DB_PORT,
+            name=app_config.DB_NAME,
+        )
+    )
+    assignee = f"bench-{uuid4()}"
+    task_ids = [f"{assignee}-t{i}" for i in range(size)]
+    try:
+        await conn.copy_records_to_table(
+            "tasks",
+            records=[
+                (task_id, task_id, "benchmark task", "bench-author", assignee, TaskStatus.PENDING.value)
+                for task_id in task_ids
+            ],
+            columns=["entity_id", "title", "description", "author", "assignee", "status"],
+        )
+        await conn.copy_records_to_table(
+            "task_dependencies",
+            records=[(task_ids[i], task_ids[i - offset]) for i in range(2, size, 3) for offset in (1, 2)],
+            columns=["entity_id", "depends_on"],
+        )
+        await conn.execute("analyze tasks; analyze task_dependencies")
+
+        task_repo = get_task_repo()
+        await timed("legacy", lambda: conn.fetch(LEGACY_QUERY, assignee))
+        await timed("current", lambda: task_repo.fetch_by_assignee(conn, assignee=assignee))
+    finally:
+        await conn.execute("delete from task_dependencies where entity_id = any($1::text[])", task_ids)
+        await conn.execute("delete from tasks where assignee=$1", assignee)
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,68 @@
+"""Measures durable consumption throughput from the JetStream event stream per fetch batch size.
+
+Publishes `count` TaskStatusUpdated events (100k by default) into a scratch stream
+through EventStoreClient in durable mode, then reads them all back through a durable
+pull consumer, acking every event, once per batch size. Needs a local nats-server
+started with JetStream enabled (`nats-server -js`).
+
+    PYTHONPATH=. python benchmarks/jetstream_consume.py [count] [nats dsn]
+"""
+from time import perf_counter
+from uuid import uuid4
+import asyncio
+import sys
+
+from contracts.schemas.task import TaskStatus
+from event_sourcing.event_store_client import EventStoreClient, EventStoreSubscription
+from power_plant_construction.entities.task import Task, TaskStatusUpdated
+
+BATCH_SIZES = (1, 10, 100, 500)
+
+
+async def consume_all(client: EventStoreClient, count: int, batch_size: int) -> float:
+    started = perf_counter()
+    consumed = 0
+    async for stored_event in client.consume(
+        EventStoreSubscription(event_class="entity", entity_type=Task),
+        durable=f"bench-{batch_size}",
+        batch_size=batch_size,
+        max_ack_pending=max(batch_size, 1000),
+        start_sequence=1,
+    ):
+        await stored_event.ack()
+        consumed += 1
+        if consumed == count:
+            break
+    return count / (perf_counter() - started)
+
+
+async def run(count: int, nats_dsn: str) -> None:
+    stream = f"BENCH_{uuid4().hex[:8].upper()}"
+    client = EventStoreClient(nats_dsn=nats_dsn, event_types={TaskStatusUpdated}, stream=stream)
+    await client.connect()
+    try:
+        started = perf_counter()
+        for offset in range(0, count, 1000):
+            await client.publish_batch(
+                [
+                    TaskStatusUpdated(entity_id=f"t{i}", status=TaskStatus.IN_PROGRESS, author="u0")
+                    for i in range(offset, min(offset + 1000, count))
+                ]
+            )
+        print(f"published {count} events at {count / (perf_counter() - started):>10.0f} ev/s")
+
+        for batch_size in BATCH_SIZES:
+            rate = await consume_all(client, count, batch_size)
+            print(f"fetch batch {batch_size:>4}: {rate:>10.0f} ev/s")
+    finally:
+        await client._js.delete_stream(stream)  # pylint: disable=protected-access
+        await client.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        run(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+            sys.argv[2] if len(sys.argv) > 2 else "nats://localhost:4222",
+        )
+    )
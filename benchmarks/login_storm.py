@@ -0,0 +1,79 @@
+"""Measures how a storm of logins delays unrelated requests served by the same event loop.
+
+A probe coroutine stands in for a cheap endpoint and is scheduled every 5ms while
+`logins` concurrent password checks run, first inline (as the login endpoint used to)
+and then through the password hashing pool. Reports p50/p99 of the probe delay.
+
+    PYTHONPATH=. python benchmarks/login_storm.py [logins] [hashing workers]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+from time import perf_counter
+from typing import Awaitable, Callable
+import asyncio
+import sys
+
+from contracts.schemas.user import UserRole
+from power_plant_construction.api.password_hashing import verify_password
+from power_plant_construction.entities.user import User
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(delays: list[float], done: asyncio.Event) -> None:
+    while not done.is_set():
+        expected = perf_counter() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        delays.append(perf_counter() - expected)
+
+
+async def storm(logins: int, login: Callable[[], Awaitable[bool]]) -> list[float]:
+    delays: list[float] = []
+    done = asyncio.Event()
+    probe_task = asyncio.create_task(probe(delays, done))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+
+    async def client() -> None:
+        # spread arrivals the way independent clients would
+        await asyncio.sleep(0)
+        await login()
+
+    await asyncio.gather(*(client() for _ in range(logins)))
+    done.set()
+    await probe_task
+    return delays
+
+
+def report(label: str, delays: list[float]) -> None:
+    percentiles = quantiles(delays, n=100, method="inclusive")
+    print(
+        f"{label:<10} probes {len(delays):>5}  p50 {percentiles[49] * 1000:>8.1f}ms"
+        f"  p99 {percentiles[98] * 1000:>8.1f}ms  max {max(delays) * 1000:>8.1f}ms"
+    )
+
+
+async def run(logins: int, workers: int) -> None:
+    user = User.new(
+        entity_id="u0", login="manager", name="Richard", role=UserRole.MANAGER, plain_password="pw"
+    )
+
+    async def blocking_login() -> bool:
+        return user.verify_password("pw")
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def offloaded_login() -> bool:
+        return await verify_password(user, "pw", executor)
+
+    report("inline", await storm(logins, blocking_login))
+    report("offloaded", await storm(logins, offloaded_login))
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        run(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+        )
+    )
@@ -0,0 +1,61 @@
+"""Reports the memory retained per event and per entity instance.
+
+Allocates `count` TaskStatusUpdated events and `count` Task entities (1M by default)
+and measures them with tracemalloc, attribute values are shared between instances so
+only the per-instance overhead is counted.
+
+    PYTHONPATH=. python benchmarks/memory.py [count]
+"""
+from datetime import datetime
+from typing import Any, Callable
+import gc
+import sys
+import tracemalloc
+
+from contracts.schemas.task import TaskStatus
+from power_plant_construction.entities.task import Task, TaskStatusUpdated
+
+NOW = datetime.utcnow()
+
+
+def measure(label: str, count: int, factory: Callable[[], Any]) -> None:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = [factory() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # the list holding the instances is not part of their footprint
+    per_instance = (after - before - sys.getsizeof(instances)) / count
+    print(f"{label:<18} {count:>9} instances, {per_instance:>7.1f} bytes each")
+    del instances
+
+
+def main(count: int) -> None:
+    measure(
+        "TaskStatusUpdated",
+        count,
+        lambda: TaskStatusUpdated(
+            entity_id="t1", status=TaskStatus.IN_PROGRESS, author="u0", event_created_at=NOW
+        ),
+    )
+    measure(
+        "Task",
+        count,
+        lambda: Task(
+            entity_id="t1",
+            title="T1",
+            description="some description of task T1",
+            depends_on=set(),
+            status=TaskStatus.PENDING,
+            assignee="u1",
+            author="u0",
+            created_at=NOW,
+            updated_at=NOW,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
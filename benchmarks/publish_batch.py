@@ -0,0 +1,94 @@
+"""Compares the per-event publishing loop with the batched EventStoreClient.publish_batch.
+
+Publishes TaskCreated events to an in-process NATS stand-in that buffers the
+wire protocol the same way nats-py does, so only client side costs are measured.
+
+    PYTHONPATH=. python benchmarks/publish_batch.py 10000 100000
+"""
+from time import perf_counter
+import asyncio
+import logging
+import sys
+
+from contracts.schemas.task import TaskStatus
+from event_sourcing.entity import EntityEvent
+from event_sourcing.event_store_client import EventStoreClient
+from event_sourcing.event_store_client import log as event_store_log
+from power_plant_construction.entities.task import TaskCreated
+
+
+class LocalNats:
+    is_connected = True
+    is_draining = False
+
+    def __init__(self) -> None:
+        self._pending = bytearray()
+        self.flushes = 0
+
+    async def publish(self, subject: str, payload: bytes, headers: dict[str, str] | None = None) -> None:
+        self._pending += f"PUB {subject} {len(payload)}\r\n".encode()
+        self._pending += payload
+        self._pending += b"\r\n"
+
+    async def flush(self) -> None:
+        self.flushes += 1
+        self._pending.clear()
+
+
+async def legacy_publish_batch(nc: LocalNats, batch: list[EntityEvent]) -> None:
+    for event in batch:
+        event_data = event.serialize()
+
+        event_store_log.info(
+            f"events.{event.__event_class__}.{event.__entity_type__}"
+            f".{event.entity_id}.{type(event).__name__} ->  {event_data}"
+        )
+        await nc.publish(
+            f"events.{event.__event_class__}.{event.__entity_type__}"
+            f".{event.entity_id}.{type(event).__name__}",
+            event_data,
+        )
+
+
+def make_batch(size: int) -> list[EntityEvent]:
+    return [
+        TaskCreated(
+            entity_id=f"t{i}",
+            title=f"T{i}",
+            description=f"some description of task T{i}",
+            status=TaskStatus.PENDING,
+            assignee="u1",
+            author="u0",
+        )
+        for i in range(size)
+    ]
+
+
+async def run(size: int) -> None:
+    batch = make_batch(size)
+
+    nc = LocalNats()
+    started = perf_counter()
+    await legacy_publish_batch(nc, batch)
+    legacy = size / (perf_counter() - started)
+
+    client = EventStoreClient(nats_dsn="", event_types=set())
+    client._nc = nc  # type: ignore[assignment]
+    started = perf_counter()
+    await client.publish_batch(batch)
+    batched = size / (perf_counter() - started)
+
+    print(
+        f"{size:>8} events: legacy {legacy:>10.0f} ev/s, batched {batched:>10.0f} ev/s ({batched / legacy:.1f}x)"
+    )
+
+
+def main() -> None:
+    # the legacy path logs every payload at INFO, keep the handler cost out of the terminal
+    logging.basicConfig(level=logging.INFO, handlers=[logging.NullHandler()])
+    for size in [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]:
+        asyncio.run(run(size))
+
+
+if __name__ == "__main__":
+    main()
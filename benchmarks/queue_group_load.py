@@ -0,0 +1,170 @@
+"""Load tests notification replicas sharing one queue group.
+
+Starts `replicas` processes (4 by default), each running a NotificationService behind
+a core NATS subscription in the same queue group, then publishes `count` TaskCreated
+events (20k by default), every tenth of them twice as a redelivery would. Reports the
+throughput, how the events were split between the replicas and checks that exactly
+one notification was created per event. Needs a local nats-server and the database
+configured through the DB_* variables (migrated to head), the rows it created are
+removed afterwards.
+
+    ENV_PATH=.env PYTHONPATH=. python benchmarks/queue_group_load.py [count] [replicas] [nats dsn]
+"""
+from time import perf_counter, sleep
+from uuid import uuid4
+import asyncio
+import multiprocessing
+import sys
+
+from asyncpg import connect, create_pool
+
+from contracts.schemas.task import TaskStatus
+from event_sourcing.event_store_client import EventStoreClient, EventStoreSubscription
+from power_plant_construction.app.app_config import get_app_config
+from power_plant_construction.app.notification_service import NotificationService
+from power_plant_construction.db import env_to_dsn
+from power_plant_construction.entities.task import Task, TaskCreated
+
+QUEUE_GROUP = "bench-notifications"
+# a replica stops once it got nothing for that long after the publisher is done
+IDLE_TIMEOUT = 2.0
+
+
+def db_dsn() -> str:
+    app_config = get_app_config()
+    return env_to_dsn(
+        user=app_config.DB_USER,
+        password=app_config.DB_PASSWORD,
+        hosts=app_config.DB_HOSTS,
+        port=app_config.DB_PORT,
+        name=app_config.DB_NAME,
+    )
+
+
+async def replica(nats_dsn: str, consumer: str, published: "multiprocessing.Event") -> int:
+    event_store = EventStoreClient(nats_dsn=nats_dsn, event_types={TaskCreated})
+    await event_store.connect()
+    db_pool = await create_pool(db_dsn(), max_size=10)
+    service = NotificationService(db_pool=db_pool, consumer=consumer, batch_size=200, flush_interval=0.02)
+
+    handled = 0
+    pending: set[asyncio.Task] = set()
+    last_received = perf_counter()
+
+    async def stop_when_idle() -> None:
+        while not (published.is_set() and perf_counter() - last_received > IDLE_TIMEOUT):
+            await asyncio.sleep(0.1)
+        await event_store.close_subscriptions()
+
+    stopper = asyncio.create_task(stop_when_idle())
+    subscription = EventStoreSubscription(event_class="entity", entity_type=Task, queue_group=QUEUE_GROUP)
+    async for event in event_store.subscribe(subscription, pending_limit=100_000):
+        last_received = perf_counter()
+        handled += 1
+        task = asyncio.create_task(service.handle_event(event))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    await stopper
+    await asyncio.gather(*pending)
+    await service.close()
+    await db_pool.close()
+    await event_store.disconnect()
+    return handled
+
+
+def run_replica(
+    nats_dsn: str, consumer: str, published: "multiprocessing.Event", results: "multiprocessing.Queue"
+) -> None:
+    results.put(asyncio.run(replica(nats_dsn, consumer, published)))
+
+
+async def publish(nats_dsn: str, receiver: str, count: int) -> int:
+    client = EventStoreClient(nats_dsn=nats_dsn, event_types={TaskCreated})
+    await client.connect()
+    sent = 0
+    for offset in range(0, count, 1000):
+        batch = [
+            TaskCreated(
+                entity_id=f"{receiver}-t{i}",
+                title=f"T{i}",
+                description="load test task",
+                status=TaskStatus.PENDING,
+                assignee=receiver,
+                author=receiver,
+            )
+            for i in range(offset, min(offset + 1000, count))
+        ]
+        batch.extend(batch[::10])
+        await client.publish_batch(batch)
+        sent += len(batch)
+    await client.disconnect()
+    return sent
+
+
+async def check(receiver: str, consumer: str, outbox_from: int) -> tuple[int, int]:
+    conn = await connect(db_dsn())
+    try:
+        notifications = await conn.fetchval(
+            "select count(*) from notifications where receiver = $1", receiver
+        )
+        processed = await conn.fetchval("select count(*) from processed_events where consumer = $1", consumer)
+        await conn.execute("delete from notifications where receiver = $1", receiver)
+        await conn.execute("delete from notification_unread_counts where receiver = $1", receiver)
+        await conn.execute("delete from processed_events where consumer = $1", consumer)
+        await conn.execute(
+            "delete from event_outbox where id > $1 and subject like 'events.entity.Notification.%'",
+            outbox_from,
+        )
+        return notifications, processed
+    finally:
+        await conn.close()
+
+
+async def outbox_position() -> int:
+    conn = await connect(db_dsn())
+    try:
+        return await conn.fetchval("select coalesce(max(id), 0) from event_outbox")
+    finally:
+        await conn.close()
+
+
+def run(count: int, replicas: int, nats_dsn: str) -> None:
+    receiver = f"bench-{uuid4().hex[:8]}"
+    consumer = f"{receiver}-consumer"
+    outbox_from = asyncio.run(outbox_position())
+
+    context = multiprocessing.get_context("spawn")
+    published = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=run_replica, args=(nats_dsn, consumer, published, results))
+        for _ in range(replicas)
+    ]
+    for process in processes:
+        process.start()
+    # give every replica the time to subscribe before publishing
+    sleep(3)
+
+    started = perf_counter()
+    sent = asyncio.run(publish(nats_dsn, receiver, count))
+    published.set()
+    handled = [results.get() for _ in processes]
+    elapsed = perf_counter() - started - IDLE_TIMEOUT
+    for process in processes:
+        process.join()
+
+    notifications, processed = asyncio.run(check(receiver, consumer, outbox_from))
+    print(f"{replicas} replicas, {count} events, {sent} messages published")
+    print(f"handled per replica {sorted(handled)}, {sum(handled) / elapsed:>10.0f} msg/s")
+    print(f"{notifications} notifications, {processed} processed events")
+    assert sum(handled) == sent, "a message was delivered to no replica or to several"
+    assert notifications == processed == count, "an event got no notification or several"
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+        sys.argv[3] if len(sys.argv) > 3 else "nats://localhost:4222",
+    )
@@ -0,0 +1,85 @@
+"""Schedules a random layered task graph, from scratch and then incrementally.
+
+The graph has `count` tasks (1M by default) in layers of 1000, every task depends on
+`fan_in` tasks (2 by default) of earlier layers, a tenth of the tasks are completed.
+The full schedule goes through CsrGraph and compute_schedule, then `updates` random
+status changes and new dependencies go through the ScheduleTracker, which is checked
+against a full recomputation at the end.
+
+    PYTHONPATH=. python benchmarks/schedule.py [count] [fan_in] [updates]
+"""
+from time import perf_counter
+import random
+import sys
+
+from contracts.schemas.task import TaskStatus
+from power_plant_construction.entities.task import TaskDependencyAdded, TaskStatusUpdated
+from power_plant_construction.planning.dependency_graph import DependencyGraph
+from power_plant_construction.planning.scheduling import ScheduleTracker, schedule_tasks
+
+LAYER = 1000
+
+
+def make_graph(count: int, fan_in: int) -> tuple[list[tuple[str, TaskStatus]], list[tuple[str, str]]]:
+    rng = random.Random(42)
+    tasks = [
+        (f"t{i}", TaskStatus.COMPLETED if rng.random() < 0.1 else TaskStatus.PENDING) for i in range(count)
+    ]
+    edges = [
+        (f"t{i}", f"t{rng.randrange(i - i % LAYER)}") for i in range(LAYER, count) for _ in range(fan_in)
+    ]
+    return tasks, list(set(edges))
+
+
+def run(count: int, fan_in: int, updates: int) -> None:
+    tasks, edges = make_graph(count, fan_in)
+    print(f"{count} tasks, {len(edges)} dependencies")
+
+    started = perf_counter()
+    schedule = schedule_tasks(tasks, edges)
+    elapsed = perf_counter() - started
+    print(f"full schedule          {elapsed * 1000:>9.1f} ms, length {schedule.length}")
+
+    started = perf_counter()
+    graph = DependencyGraph()
+    graph.load((task for task, _ in tasks), edges)
+    tracker = ScheduleTracker(graph)
+    tracker.load(schedule)
+    print(f"graph and tracker load {(perf_counter() - started) * 1000:>9.1f} ms")
+
+    rng = random.Random(7)
+    statuses = dict(tasks)
+    started = perf_counter()
+    for _ in range(updates):
+        task = f"t{rng.randrange(count)}"
+        if rng.random() < 0.5:
+            status = rng.choice((TaskStatus.PENDING, TaskStatus.COMPLETED))
+            statuses[task] = status
+            event = TaskStatusUpdated(entity_id=task, status=status, author="u0")
+        else:
+            position = int(task[1:])
+            if position < LAYER:
+                continue
+            event = TaskDependencyAdded(
+                entity_id=task, depends_on=f"t{rng.randrange(position - position % LAYER)}"
+            )
+        graph.apply(event)
+        tracker.apply(event)
+    elapsed = (perf_counter() - started) / updates
+    print(f"incremental update     {elapsed * 1000:>9.3f} ms per event")
+
+    started = perf_counter()
+    expected = schedule_tasks(statuses.items(), graph.dependencies())
+    print(f"full recomputation     {(perf_counter() - started) * 1000:>9.1f} ms, length {expected.length}")
+    assert tracker.length == expected.length
+    assert all(
+        tracker.earliest_start(task) == start for task, start in zip(expected.ids, expected.earliest_start)
+    )
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 1000,
+    )
@@ -0,0 +1,129 @@
+"""Loads a Task with a long event history with and without snapshots.
+
+The task goes through `count` events (10k by default), the events are kept encoded
+in memory and decoded on every load like a replay from the stream would, snapshots
+are kept in memory as the JSON the snapshot table stores. Every variant is loaded
+`loads` times (20 by default) after a first load that may take the snapshot.
+
+    PYTHONPATH=. python benchmarks/snapshot_loading.py [count] [loads]
+"""
+from time import perf_counter
+from typing import AsyncIterator, Type
+import asyncio
+import sys
+
+import orjson
+
+from contracts.schemas.task import TaskStatus
+from event_sourcing.entity import Entity, EntityEvent
+from event_sourcing.event_store_client import StoredEvent
+from event_sourcing.snapshots import AggregateLoader, Snapshot, SnapshotStore
+from power_plant_construction.entities.task import (
+    Task,
+    TaskCreated,
+    TaskDependencyAdded,
+    TaskDependencyRemoved,
+    TaskStatusUpdated,
+)
+
+
+class MemoryEvents:
+    def __init__(self, events: list[EntityEvent]) -> None:
+        self._log = [(type(event), event.serialize()) for event in events]
+
+    async def entity_events(
+        self, entity_type: Type[Entity], entity_id: str, *, after_sequence: int = 0
+    ) -> AsyncIterator[StoredEvent]:
+        for sequence in range(after_sequence + 1, len(self._log) + 1):
+            event_type, raw = self._log[sequence - 1]
+            yield StoredEvent(event=event_type.deserialise(raw), sequence=sequence)
+
+
+class MemorySnapshots(SnapshotStore):
+    def __init__(self) -> None:
+        self._snapshots: dict[tuple[str, str], tuple[int, int, bytes]] = {}
+
+    async def latest(self, *, entity_type: str, entity_id: str) -> Snapshot | None:
+        stored = self._snapshots.get((entity_type, entity_id))
+        if stored is None:
+            return None
+        version, sequence, state = stored
+        return Snapshot(
+            entity_type=entity_type,
+            entity_id=entity_id,
+            version=version,
+            sequence=sequence,
+            state=orjson.loads(state),
+        )
+
+    async def save(self, snapshot: Snapshot) -> None:
+        self._snapshots[(snapshot.entity_type, snapshot.entity_id)] = (
+            snapshot.version,
+            snapshot.sequence,
+            orjson.dumps(snapshot.state),
+        )
+
+
+def make_history(count: int) -> list[EntityEvent]:
+    events: list[EntityEvent] = [
+        TaskCreated(
+            entity_id="t1",
+            title="T1",
+            description="some description of task T1",
+            status=TaskStatus.PENDING,
+            assignee="u1",
+            author="u0",
+        )
+    ]
+    for i in range(1, count):
+        match i % 4:
+            case 0:
+                events.append(TaskDependencyAdded(entity_id="t1", depends_on=f"t{i + 1}"))
+            case 1:
+                events.append(TaskStatusUpdated(entity_id="t1", status=TaskStatus.IN_PROGRESS, author="u0"))
+            case 2:
+                events.append(TaskStatusUpdated(entity_id="t1", status=TaskStatus.PENDING, author="u0"))
+            case 3:
+                events.append(TaskDependencyRemoved(entity_id="t1", depends_on=f"t{i - 3}"))
+    return events
+
+
+async def timed_loads(label: str, loader: AggregateLoader, loads: int) -> Task:
+    started = perf_counter()
+    task = await loader.load(Task, "t1")
+    first = perf_counter() - started
+
+    started = perf_counter()
+    for _ in range(loads):
+        task = await loader.load(Task, "t1")
+    elapsed = (perf_counter() - started) / loads
+    print(f"{label:<22} first load {first * 1000:>9.2f} ms, then {elapsed * 1000:>9.2f} ms per load")
+    return task
+
+
+async def run(count: int, loads: int) -> None:
+    events = MemoryEvents(make_history(count))
+    print(f"Task with {count} events")
+
+    replayed = await timed_loads(
+        "no snapshots",
+        AggregateLoader(events=events, snapshots=MemorySnapshots(), snapshot_every={}),
+        loads,
+    )
+    for every in (1000, 100):
+        snapshotted = await timed_loads(
+            f"snapshot every {every}",
+            AggregateLoader(events=events, snapshots=MemorySnapshots(), snapshot_every={"Task": every}),
+            loads,
+        )
+        assert snapshotted.to_snapshot() == replayed.to_snapshot()
+        assert snapshotted.version == replayed.version == count
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        run(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+        )
+    )
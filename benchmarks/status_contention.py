@@ -0,0 +1,111 @@
+"""Runs many concurrent status updates against a few hot tasks.
+
+`workers` coroutines (64 by default) each send `updates` UpdateStatus commands (50 by
+default) to one of `hot` tasks (4 by default), first with the optimistic version check
+and its bounded retry, then serialized with a row lock for comparison. Reports
+commands per second, commands that gave up after the retries, and whether every
+successful command is accounted for in the task versions (no lost updates). Uses the
+database configured through the DB_* variables (migrated to head) and removes the
+seeded rows afterwards.
+
+    ENV_PATH=.env PYTHONPATH=. python benchmarks/status_contention.py [workers] [updates] [hot]
+"""
+from time import perf_counter
+from uuid import uuid4
+import asyncio
+import sys
+
+from asyncpg import Pool, create_pool
+
+from contracts.schemas.task import TaskStatus
+from power_plant_construction.app.app_config import get_app_config
+from power_plant_construction.commands.task.update_status import UpdateStatus
+from power_plant_construction.db import env_to_dsn
+from power_plant_construction.entities.task import Task
+from power_plant_construction.repositories.batch import ConcurrencyConflict
+from power_plant_construction.repositories.outbox import get_event_outbox
+from power_plant_construction.repositories.task import get_task_repo
+
+
+async def optimistic_update(pool: Pool, task_id: str) -> None:
+    await UpdateStatus(
+        command_id=str(uuid4()), principal_id=task_id, status=TaskStatus.IN_PROGRESS, submitted_by="bench"
+    ).execute(pool=pool, outbox=get_event_outbox(), task_repo=get_task_repo())
+
+
+async def locked_update(pool: Pool, task_id: str) -> None:
+    task_repo = get_task_repo()
+    async with pool.acquire() as conn, conn.transaction():
+        await conn.execute("select 1 from tasks where entity_id=$1 for update", task_id)
+        task = await task_repo.fetch_by_id(conn, entity_id=task_id)
+        task.update_status(status=TaskStatus.IN_PROGRESS)
+        batch = task.drain()
+        await task_repo.persist(conn, batch)
+        await get_event_outbox().enqueue(conn, batch)
+
+
+async def contend(label: str, pool: Pool, update, task_ids: list[str], workers: int, updates: int) -> None:
+    before = await pool.fetchval("select sum(version) from tasks where entity_id = any($1::text[])", task_ids)
+    gave_up = 0
+
+    async def worker(index: int) -> None:
+        nonlocal gave_up
+        for i in range(updates):
+            try:
+                await update(pool, task_ids[(index + i) % len(task_ids)])
+            except ConcurrencyConflict:
+                gave_up += 1
+
+    started = perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(workers)))
+    elapsed = perf_counter() - started
+
+    after = await pool.fetchval("select sum(version) from tasks where entity_id = any($1::text[])", task_ids)
+    succeeded = workers * updates - gave_up
+    print(
+        f"{label:<11} {workers * updates / elapsed:>8.0f} commands/s, {gave_up:>5} gave up, "
+        f"{succeeded - (after - before):>5} lost updates"
+    )
+
+
+async def run(workers: int, updates: int, hot: int) -> None:
+    app_config = get_app_config()
+    pool = await create_pool(
+        env_to_dsn(
+            user=app_config.DB_USER,
+            password=app_config.DB_PASSWORD,
+            hosts=app_config.DB_HOSTS,
+            port=app_config.DB_PORT,
+            name=app_config.DB_NAME,
+        ),
+        max_size=min(workers, 30),
+    )
+    prefix = f"bench-{uuid4()}"
+    task_ids = [f"{prefix}-t{i}" for i in range(hot)]
+    try:
+        async with pool.acquire() as conn:
+            batch = []
+            for task_id in task_ids:
+                batch.extend(
+                    Task.new(
+                        entity_id=task_id, title=task_id, description="hot", assignee="bench", author="bench"
+                    ).drain()
+                )
+            await get_task_repo().persist(conn, batch)
+
+        await contend("optimistic", pool, optimistic_update, task_ids, workers, updates)
+        await contend("row lock", pool, locked_update, task_ids, workers, updates)
+    finally:
+        await pool.execute("delete from event_outbox where subject like $1", f"events.entity.Task.{prefix}-%")
+        await pool.execute("delete from tasks where entity_id = any($1::text[])", task_ids)
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        run(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 64,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 4,
+        )
+    )
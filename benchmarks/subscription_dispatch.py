@@ -0,0 +1,152 @@
+"""Measures local dispatch of incoming messages to many concurrent subscriptions.
+
+Messages are handed to the client's NATS callbacks by an in-process stand-in that
+delivers each one to every subscription matching it, as the server would, so only the
+client side routing, decoding and queueing is measured (with the stand-in's own
+matching against the few NATS subscriptions left once covered patterns are merged). The subscriptions are
+the api's three entity subscriptions plus `extra` per-entity ones (300 by default),
+the messages are Task, Notification and User events, a fifth of them for a watched
+entity. The baseline matches every message against every subscription pattern in
+turn and decodes it for each match, like one NATS subscription per pattern would.
+
+    PYTHONPATH=. python benchmarks/subscription_dispatch.py [messages] [extra]
+"""
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable
+import asyncio
+import logging
+import sys
+
+from contracts.schemas.notification import NotificationStatus
+from contracts.schemas.task import TaskStatus
+from contracts.schemas.user import UserRole
+from event_sourcing.entity import EntityEvent
+from event_sourcing.event_store_client import EventStoreClient, EventStoreSubscription, event_subject
+from power_plant_construction.entities.notification import (
+    Notification,
+    NotificationCreated,
+    NotificationStatusUpdated,
+)
+from power_plant_construction.entities.task import Task, TaskCreated, TaskStatusUpdated
+from power_plant_construction.entities.user import User, UserCreated
+
+EVENT_TYPES = {TaskCreated, TaskStatusUpdated, NotificationCreated, NotificationStatusUpdated, UserCreated}
+
+
+class LocalNats:
+    is_connected = True
+    is_draining = False
+
+    def __init__(self) -> None:
+        self.subscriptions: list[tuple[list[str], Callable[[Any], Awaitable[None]]]] = []
+
+    async def subscribe(self, subject: str, cb: Callable[[Any], Awaitable[None]]) -> SimpleNamespace:
+        entry = (subject.split("."), cb)
+        self.subscriptions.append(entry)
+
+        async def unsubscribe() -> None:
+            self.subscriptions.remove(entry)
+
+        return SimpleNamespace(drain=unsubscribe, unsubscribe=unsubscribe)
+
+    async def deliver(self, msg: Any) -> None:
+        tokens = msg.subject.split(".")
+        for pattern, cb in self.subscriptions:
+            if matches(pattern, tokens):
+                await cb(msg)
+
+
+def make_event(i: int, watched: int) -> EntityEvent:
+    entity_id = f"e{i % watched}" if i % 5 == 0 else f"x{i}"
+    match i % 3:
+        case 0:
+            return TaskStatusUpdated(entity_id=entity_id, status=TaskStatus.IN_PROGRESS, author="u0")
+        case 1:
+            return NotificationStatusUpdated(
+                entity_id=entity_id, status=NotificationStatus.READ, receiver="u1"
+            )
+        case _:
+            return UserCreated(
+                entity_id=entity_id, login="u", name="U", role=UserRole.WORKER, password_hashed="h", salt="s"
+            )
+
+
+def make_subscriptions(extra: int) -> list[EventStoreSubscription]:
+    subscriptions = [
+        EventStoreSubscription(event_class="entity", entity_type=entity_type)
+        for entity_type in (Task, Notification, User)
+    ]
+    subscriptions.extend(
+        EventStoreSubscription(event_class="entity", entity_type=Task, entity_id=f"e{i}")
+        for i in range(extra)
+    )
+    return subscriptions
+
+
+def matches(pattern: list[str], tokens: list[str]) -> bool:
+    return len(pattern) == len(tokens) and all(p in ("*", t) for p, t in zip(pattern, tokens))
+
+
+def baseline(messages: list[SimpleNamespace], subscriptions: list[EventStoreSubscription]) -> int:
+    event_types = {event_type.__name__: event_type for event_type in EVENT_TYPES}
+    patterns = [subscription.nats_channel.split(".") for subscription in subscriptions]
+    delivered = 0
+    for msg in messages:
+        tokens = msg.subject.split(".")
+        for pattern in patterns:
+            if matches(pattern, tokens):
+                event_types[tokens[4]].deserialise(msg.data)
+                delivered += 1
+    return delivered
+
+
+async def dispatched(messages: list[SimpleNamespace], subscriptions: list[EventStoreSubscription]) -> int:
+    nc = LocalNats()
+    client = EventStoreClient(nats_dsn="", event_types=EVENT_TYPES)
+    client._nc = nc  # type: ignore[assignment]
+
+    received = [0] * len(subscriptions)
+
+    async def consume(index: int, subscription: EventStoreSubscription) -> None:
+        async for _ in client.subscribe(subscription, pending_limit=len(messages)):
+            received[index] += 1
+
+    consumers = [asyncio.create_task(consume(i, s)) for i, s in enumerate(subscriptions)]
+    await asyncio.sleep(0)
+    for msg in messages:
+        await nc.deliver(msg)
+    await client.close_subscriptions()
+    await asyncio.gather(*consumers)
+    return sum(received)
+
+
+async def run(count: int, extra: int) -> None:
+    subscriptions = make_subscriptions(extra)
+    events = [make_event(i, max(extra, 1)) for i in range(count)]
+    messages = [
+        SimpleNamespace(subject=event_subject(event), data=event.serialize(), headers=None)
+        for event in events
+    ]
+    print(f"{count} messages, {len(subscriptions)} subscriptions")
+
+    started = perf_counter()
+    expected = baseline(messages, subscriptions)
+    elapsed = perf_counter() - started
+    print(f"per pattern matching  {count / elapsed:>10.0f} msg/s, {expected} deliveries")
+
+    started = perf_counter()
+    delivered = await dispatched(messages, subscriptions)
+    elapsed = perf_counter() - started
+    print(f"trie dispatch         {count / elapsed:>10.0f} msg/s, {delivered} deliveries")
+    assert delivered == expected
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(
+        run(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 300,
+        )
+    )
@@ -0,0 +1,92 @@
+"""Compares payload size and encode/decode throughput of the JSON and msgpack wire formats.
+
+Encodes a mix of events shaped like the production traffic (mostly status updates and
+notifications, `count` events in total, 100k by default) with both formats.
+
+    PYTHONPATH=. python benchmarks/wire_format.py [count]
+"""
+from time import perf_counter
+import sys
+
+from contracts.schemas.notification import NotificationStatus
+from contracts.schemas.task import TaskStatus
+from event_sourcing.entity import EntityEvent
+from event_sourcing.wire import WireFormat, get_wire_format
+from power_plant_construction.entities.notification import NotificationCreated, NotificationStatusUpdated
+from power_plant_construction.entities.task import (
+    TaskCreated,
+    TaskDependencyAdded,
+    TaskDependencyRemoved,
+    TaskStatusUpdated,
+)
+
+
+def make_mix(count: int) -> list[EntityEvent]:
+    events: list[EntityEvent] = []
+    for i in range(count // 20):
+        task_id = f"task-{i:08d}"
+        events.append(
+            TaskCreated(
+                entity_id=task_id,
+                title=f"Install transformer {i}",
+                description="Mount the transformer on the pad and connect the high voltage side",
+                status=TaskStatus.PENDING,
+                assignee=f"user-{i % 50:04d}",
+                author="user-0000",
+            )
+        )
+        events.append(TaskDependencyAdded(entity_id=task_id, depends_on=f"task-{i - 1:08d}"))
+        events.append(TaskDependencyRemoved(entity_id=task_id, depends_on=f"task-{i - 1:08d}"))
+        events.extend(
+            TaskStatusUpdated(entity_id=task_id, status=status, author=f"user-{i % 50:04d}")
+            for status in (TaskStatus.IN_PROGRESS, TaskStatus.COMPLETED) * 4
+        )
+        for receiver in range(3):
+            notification_id = f"notification-{i:08d}-{receiver}"
+            events.append(
+                NotificationCreated(
+                    entity_id=notification_id,
+                    title=f"Task status changed: Install transformer {i}",
+                    content="Task status changed to COMPLETED",
+                    status=NotificationStatus.UNREAD,
+                    receiver=f"user-{receiver:04d}",
+                )
+            )
+            events.append(
+                NotificationStatusUpdated(entity_id=notification_id, status=NotificationStatus.READ)
+            )
+    return events
+
+
+def measure(wire_format: WireFormat, events: list[EntityEvent]) -> tuple[float, float, float]:
+    encode = wire_format.encode
+    decode = wire_format.decode
+
+    started = perf_counter()
+    payloads = [encode(event) for event in events]
+    encode_rate = len(events) / (perf_counter() - started)
+
+    typed = [(type(event), payload) for event, payload in zip(events, payloads)]
+    started = perf_counter()
+    for event_type, payload in typed:
+        decode(event_type, payload)
+    decode_rate = len(events) / (perf_counter() - started)
+
+    return sum(map(len, payloads)) / len(payloads), encode_rate, decode_rate
+
+
+def main(count: int) -> None:
+    events = make_mix(count)
+    # event ids and publish times are assigned on the first encode, keep that out of the timings
+    for event in events:
+        get_wire_format("json").encode(event)
+
+    print(f"{len(events)} events")
+    print(f"{'format':<8} {'bytes/event':>12} {'encode':>13} {'decode':>13}")
+    for name in ("json", "msgpack"):
+        size, encode_rate, decode_rate = measure(get_wire_format(name), events)
+        print(f"{name:<8} {size:>12.1f} {encode_rate:>11.0f}/s {decode_rate:>11.0f}/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
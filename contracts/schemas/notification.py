@@ -17,3 +17,7 @@ class NotificationDto(BaseModel, extra=Extra.forbid):
     status: NotificationStatus
     created_at: datetime
     updated_at: datetime
+
+
+class UnreadCountDto(BaseModel, extra=Extra.forbid):
+    unread: int
@@ -33,6 +33,29 @@ class TaskUpdateStatusDto(BaseModel, extra=Extra.forbid):
     status: TaskStatus
 
 
+class TaskGraphNodeDto(BaseModel, extra=Extra.forbid):
+    ref: str
+    title: str
+    description: str
+    assignee: str
+    depends_on: list[str] = []
+
+
+class TaskGraphCreateDto(BaseModel, extra=Extra.forbid):
+    tasks: list[TaskGraphNodeDto]
+
+
 class TaskDependencyUpdateDto(BaseModel, extra=Extra.forbid):
     add: list[str]
     remove: list[str]
+
+
+class TaskScheduleDto(BaseModel, extra=Extra.forbid):
+    id: str
+    earliest_start: int
+    earliest_finish: int
+
+
+class ScheduleDto(BaseModel, extra=Extra.forbid):
+    length: int
+    critical_path: list[str]
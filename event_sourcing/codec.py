@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from types import NoneType, UnionType
+from typing import Any, Callable, Type, Union, get_args, get_origin, get_type_hints
+from uuid import uuid4
+import inspect
+
+import orjson
+
+from event_sourcing.entity import EntityEvent
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    name: str
+    slot: str
+    kind: str
+    optional: bool
+    default: Any
+    enum_type: Type[Enum] | None = None
+
+
+def _field_kind(annotation: Any) -> tuple[str, bool, Type[Enum] | None]:
+    optional = False
+    if get_origin(annotation) in (Union, UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not NoneType]
+        optional = len(args) != len(get_args(annotation))
+        annotation = args[0] if len(args) == 1 else Any
+
+    if annotation is datetime:
+        return "datetime", optional, None
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return "enum", optional, annotation
+    return "plain", optional, None
+
+
+def event_fields(event_type: Type[EntityEvent]) -> tuple[FieldSpec, ...]:
+    """Every slot `_name` an event class adds on top of EntityEvent is a body field `name`.
+
+    The field type and default come from the matching `__init__` parameter.
+    """
+    hints = get_type_hints(event_type.__init__)
+    parameters = inspect.signature(event_type.__init__).parameters
+    base_slots = set(EntityEvent.__slots__)
+    fields = []
+    for klass in reversed(event_type.__mro__):
+        for slot in klass.__dict__.get("__slots__", ()):
+            if slot in base_slots:
+                continue
+            name = slot.lstrip("_")
+            kind, optional, enum_type = _field_kind(hints.get(name, Any))
+            parameter = parameters.get(name)
+            default = (
+                _MISSING
+                if parameter is None or parameter.default is inspect.Parameter.empty
+                else parameter.default
+            )
+            fields.append(
+                FieldSpec(
+                    name=name, slot=slot, kind=kind, optional=optional, default=default, enum_type=enum_type
+                )
+            )
+    return tuple(fields)
+
+
+def compile_function(source: str, name: str, *, namespace: dict[str, Any], label: str) -> Callable:
+    exec(compile(source, f"<{label} {name}>", "exec"), namespace)  # nosec
+    return namespace[name]
+
+
+class EventCodec:
+    """Encodes and decodes one event type with functions generated once from its fields.
+
+    The generated code reads and writes the event slots directly, so neither `head()`/`body()`
+    nor the event constructor run, and decoded events keep their raw payload instead of
+    the parsed dict (see `EntityEvent.source_dump`).
+    """
+
+    def __init__(self, event_type: Type[EntityEvent]) -> None:
+        self.event_type = event_type
+        self.fields = event_fields(event_type)
+        self.encode: Callable[[EntityEvent], bytes] = self._generate_encode()
+        self.decode: Callable[[bytes], EntityEvent] = self._generate_decode()
+
+    def _namespace(self) -> dict[str, Any]:
+        namespace: dict[str, Any] = {
+            "dumps": orjson.dumps,
+            "loads": orjson.loads,
+            "utcnow": datetime.utcnow,
+            "uuid4": uuid4,
+            "fromtimestamp": datetime.fromtimestamp,
+            "new": object.__new__,
+            "event_type": self.event_type,
+            "MissingFieldError": ValueError,
+        }
+        for field in self.fields:
+            if field.default is not _MISSING:
+                namespace[f"default_{field.name}"] = field.default
+            if field.enum_type is not None:
+                namespace[f"members_{field.name}"] = {member.value: member for member in field.enum_type}
+        return namespace
+
+    def _generate_encode(self) -> Callable[[EntityEvent], bytes]:
+        event_type = self.event_type
+        body = []
+        for field in self.fields:
+            value = f"event.{field.slot}"
+            if field.kind == "datetime":
+                converted = f"int({value}.timestamp() * 1000)"
+                value = f"(None if {value} is None else {converted})" if field.optional else converted
+            body.append(f"{field.name!r}: {value}")
+
+        source = f"""
+def encode(event):
+    published_at = event._published_at
+    if published_at is None:
+        published_at = event._published_at = utcnow()
+    event_id = event._event_id
+    if event_id is None:
+        event_id = event._event_id = uuid4()
+    return dumps({{
+        "head": {{
+            "event_id": event_id,
+            "event_type": {event_type.__event_class__!r},
+            "event_name": {event_type.__name__!r},
+            "entity_id": event._entity_id,
+            "entity_type": {event_type.__entity_type__!r},
+            "event_created_at": int(event._event_created_at.timestamp() * 1000),
+            "published_at": int(published_at.timestamp() * 1000),
+        }},
+        "body": {{{", ".join(body)}}},
+    }})
+"""
+        return self._compile(source, "encode")
+
+    def _generate_decode(self) -> Callable[[bytes], EntityEvent]:
+        lines = []
+        for field in self.fields:
+            if field.default is _MISSING:
+                lines.append(f"    try:\n        value = body[{field.name!r}]\n    except KeyError:")
+                lines.append(
+                    f"        raise MissingFieldError({self.event_type.__name__ + ' payload is missing ' + field.name!r})"
+                )
+            else:
+                lines.append(f"    value = body.get({field.name!r}, default_{field.name})")
+
+            if field.kind == "datetime":
+                value = "fromtimestamp(value / 1000)"
+            elif field.kind == "enum":
+                value = f"members_{field.name}[value]"
+            else:
+                value = "value"
+            if field.optional and value != "value":
+                value = f"None if value is None else {value}"
+            lines.append(f"    event.{field.slot} = {value}")
+
+        source = f"""
+def decode(raw):
+    data = loads(raw)
+    head = data["head"]
+    body = data["body"]
+    event = new(event_type)
+    event._entity_id = head["entity_id"]
+    event._event_created_at = fromtimestamp(head["event_created_at"] / 1000)
+    published_at = head.get("published_at")
+    event._published_at = None if published_at is None else fromtimestamp(published_at / 1000)
+    event._event_id = head.get("event_id")
+    event._source_dump = None
+    event._source_raw = raw
+    event._entity_version = None
+{chr(10).join(lines)}
+    return event
+"""
+        return self._compile(source, "decode")
+
+    def _compile(self, source: str, name: str) -> Callable:
+        return compile_function(source, name, namespace=self._namespace(), label=self.event_type.__name__)
+
+
+_CODECS: dict[Type[EntityEvent], EventCodec] = {}
+
+
+def codec_for(event_type: Type[EntityEvent]) -> EventCodec:
+    codec = _CODECS.get(event_type)
+    if codec is None:
+        codec = _CODECS[event_type] = EventCodec(event_type)
+    return codec
@@ -1,15 +1,29 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 from logging import getLogger
-from typing import Any, TypeVar
+from typing import Any, Mapping, Type, TypeVar
 from uuid import UUID, uuid4
 
 import orjson
 
 log = getLogger(__name__)
 
+SelfEntity = TypeVar("SelfEntity", bound="Entity")
+
+
+def to_isoformat(value: datetime | None) -> str | None:
+    return None if value is None else value.isoformat()
+
+
+def from_isoformat(value: str | None) -> datetime | None:
+    return None if value is None else datetime.fromisoformat(value)
+
+
+class Entity(ABC):
+    """Base of the aggregates, `version` counts the events the entity went through."""
+
+    __slots__ = ("_updated_at", "_entity_id", "_created_at", "_version", "_batch")
 
-class Entity:
     def __init__(
         self,
         *,
@@ -22,11 +36,44 @@ class Entity:
         self._entity_id = entity_id
         self._created_at = created_at
         self._version = version
-        self._batch: list[Any] = []
+        self._batch: list[Any] | None = None
+
+    def _record(self, event: "EntityEvent") -> None:
+        if self._batch is None:
+            self._batch = []
+        self._batch.append(event)
+        self._version += 1
+        event._entity_version = self._version
+
+    def apply(self, event: "EntityEvent") -> None:
+        """Replays an event that already happened, nothing gets recorded."""
+        self._apply(event)
+        self._version += 1
+        self._updated_at = event.event_created_at
+
+    @abstractmethod
+    def _apply(self, event: "EntityEvent") -> None:
+        pass
+
+    @classmethod
+    @abstractmethod
+    def from_created(cls: Type[SelfEntity], event: "EntityEvent") -> SelfEntity:
+        """Builds the entity from the event that created it."""
+
+    @abstractmethod
+    def to_snapshot(self) -> dict[str, Any]:
+        """The entity state as JSON compatible values."""
+
+    @classmethod
+    @abstractmethod
+    def from_snapshot(
+        cls: Type[SelfEntity], *, entity_id: str, version: int, state: Mapping[str, Any]
+    ) -> SelfEntity:
+        pass
 
     def drain(self) -> list["EntityEvent[str]"]:
-        tmp = self._batch
-        self._batch = []
+        tmp = self._batch or []
+        self._batch = None
         return tmp
 
     @property
@@ -54,6 +101,15 @@ SelfEntityEvent = TypeVar("SelfEntityEvent", bound="EntityEvent")
 
 
 class EntityEvent(ABC):
+    __slots__ = (
+        "_event_created_at",
+        "_entity_id",
+        "_published_at",
+        "_source_dump",
+        "_source_raw",
+        "_event_id",
+        "_entity_version",
+    )
     __event_class__ = "entity"
     __entity_type__ = "any"
 
@@ -68,20 +124,27 @@ class EntityEvent(ABC):
         self._event_created_at = event_created_at or datetime.utcnow()
         self._entity_id = entity_id
         self._published_at = published_at
-        self._session_uuid = None
-        self.profile_int_id = None
-        self._api_request_uuid = None
-        self._source_dump = None
-        self._event_id = event_id or uuid4()
+        self._source_dump: dict | None = None
+        self._source_raw: bytes | None = None
+        self._event_id = event_id
+        # the version the recording entity reached with this event, not part of the payload
+        self._entity_version: int | None = None
 
     @property
     def event_id(self) -> UUID:
+        # generated on first use, deserialised events get theirs from the payload instead
+        if self._event_id is None:
+            self._event_id = uuid4()
         return self._event_id
 
     @property
     def entity_id(self) -> str:
         return self._entity_id
 
+    @property
+    def entity_version(self) -> int | None:
+        return self._entity_version
+
     @property
     def event_created_at(self) -> datetime:
         return self._event_created_at
@@ -95,7 +158,7 @@ class EntityEvent(ABC):
         if self._published_at is None:
             self._published_at = datetime.utcnow()
 
-        collector["event_id"] = self._event_id
+        collector["event_id"] = self.event_id
         collector["event_type"] = self.__event_class__
         collector["event_name"] = type(self).__name__
         collector["entity_id"] = self._entity_id
@@ -112,24 +175,16 @@ class EntityEvent(ABC):
         pass
 
     @classmethod
-    def deserialise(cls, raw: bytes) -> SelfEntityEvent:
-        raw_dict = orjson.loads(raw)
-        head = raw_dict["head"]
-        event = cls(
-            event_created_at=datetime.fromtimestamp(head["event_created_at"] / 1000),
-            entity_id=head["entity_id"],
-            published_at=head["published_at"],
-            **{
-                key: datetime.fromtimestamp(value / 1000) if key.endswith("_at") else value
-                for key, value in raw_dict["body"].items()
-            },
-        )
-        event.source_dump = raw_dict
-        event._event_id = head.get("event_id", uuid4())
-        return event
+    def deserialise(cls: Type[SelfEntityEvent], raw: bytes) -> SelfEntityEvent:
+        from event_sourcing.codec import codec_for
+
+        return codec_for(cls).decode(raw)  # type: ignore[return-value]
 
     @property
     def source_dump(self) -> dict | None:
+        # deserialised events keep the raw payload and only parse it again when asked to
+        if self._source_dump is None and self._source_raw is not None:
+            self._source_dump = orjson.loads(self._source_raw)
         return self._source_dump
 
     @source_dump.setter
@@ -139,7 +194,9 @@ class EntityEvent(ABC):
     def serialize(
         self,
     ) -> bytes:
-        return orjson.dumps({"head": self.head(), "body": self.body()})
+        from event_sourcing.codec import codec_for
+
+        return codec_for(type(self)).encode(self)
 
 
 class Command:
@@ -1,23 +1,55 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
 from typing import Any, AsyncIterator, Type
+import asyncio
 import logging
 
 from nats.aio.client import Client as NatsClient
+from nats.aio.msg import Msg
+from nats.aio.subscription import DEFAULT_SUB_PENDING_MSGS_LIMIT
 from nats.aio.subscription import Subscription as NatsSubscription
+from nats.js import JetStreamContext
+from nats.js.api import AckPolicy, ConsumerConfig, DeliverPolicy, StreamConfig
+from nats.js.errors import NotFoundError
 import nats
+import nats.errors
 
 from event_sourcing.entity import Entity, EntityEvent
+from event_sourcing.subject_trie import SubjectTrie
+from event_sourcing.wire import CONTENT_TYPE_HEADER, JSON_WIRE_FORMAT, WireFormat, readable_wire_formats
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
 
+EVENTS_SUBJECT = "events.>"
+# what a plain nats-py subscription buffers before it starts dropping messages
+DEFAULT_PENDING_LIMIT = DEFAULT_SUB_PENDING_MSGS_LIMIT
+
+_SUBJECT_TEMPLATES: dict[Type[EntityEvent], tuple[str, str]] = {}
+
+
+def event_subject(event: EntityEvent) -> str:
+    event_type = type(event)
+    template = _SUBJECT_TEMPLATES.get(event_type)
+    if template is None:
+        template = (
+            f"events.{event_type.__event_class__}.{event_type.__entity_type__}.",
+            f".{event_type.__name__}",
+        )
+        _SUBJECT_TEMPLATES[event_type] = template
+    return template[0] + event.entity_id + template[1]
+
+
 @dataclass(frozen=True, eq=True)
 class EventStoreSubscription:
     event_class: str | None = None
     event_type: Type[EntityEvent] | None = None
     entity_type: Type[Entity] | None = None
     entity_id: str | None = None
+    # subscribers in the same queue group split the events between them instead of each getting all
+    queue_group: str | None = None
 
     def __post_init__(self) -> None:
         if (self.event_class is not None and self.event_type is not None) or (
@@ -37,30 +69,179 @@ class EventStoreSubscription:
         return f"events.{event_class}.{entity_type}.{entity_id}.{event_name}"
 
 
+@dataclass(frozen=True)
+class StoredEvent:
+    """An event read from the JetStream stream, with its position in the stream."""
+
+    event: EntityEvent
+    sequence: int
+    _msg: Msg | None = field(default=None, repr=False, compare=False)
+
+    async def ack(self) -> None:
+        if self._msg is not None:
+            await self._msg.ack()
+
+    async def nak(self) -> None:
+        if self._msg is not None:
+            await self._msg.nak()
+
+
+class _Route:
+    """A `subscribe` call waiting for events, at most `pending_limit` of them queue up, any number for None."""
+
+    __slots__ = ("subscription", "pattern", "queue", "dropped", "closed")
+
+    def __init__(self, subscription: EventStoreSubscription, pending_limit: int | None) -> None:
+        self.subscription = subscription
+        self.pattern = subscription.nats_channel
+        self.queue: asyncio.Queue[EntityEvent | None] = asyncio.Queue(maxsize=pending_limit or 0)
+        self.dropped = 0
+        self.closed = False
+
+    def deliver(self, event: EntityEvent) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # core NATS is at most once anyway, a stuck subscriber doesn't hold up the others
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                log.warning(f"Subscription {self.pattern} is too slow, dropped {self.dropped} events")
+
+    def close(self) -> None:
+        self.closed = True
+        # a full queue gets no sentinel, the subscriber stops once it drained what was delivered
+        if not self.queue.full():
+            self.queue.put_nowait(None)
+
+    async def events(self) -> AsyncIterator[EntityEvent]:
+        while not (self.closed and self.queue.empty()):
+            event = await self.queue.get()
+            if event is None:
+                return
+            yield event
+
+
+class _PatternSubscription:
+    """A NATS subscription to `pattern` and the routes it delivers to, the ones with a pattern it covers."""
+
+    __slots__ = ("pattern", "nats_subscription", "routes", "members")
+
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+        self.nats_subscription: NatsSubscription | None = None
+        self.routes: SubjectTrie[_Route] = SubjectTrie()
+        self.members: set[_Route] = set()
+
+    def add(self, route: _Route) -> None:
+        self.routes.add(route.pattern, route)
+        self.members.add(route)
+
+    def remove(self, route: _Route) -> None:
+        self.routes.remove(route.pattern, route)
+        self.members.discard(route)
+
+
 class EventStoreClient:
+    """Publishes and consumes events over NATS.
+
+    Any number of `subscribe` calls can run at once over one NATS subscription per
+    distinct pattern, so the server only sends what somebody subscribed to. A pattern
+    covered by one already subscribed to (`events.entity.Task.t1.*` by
+    `events.entity.Task.*.*`) adds no NATS subscription: each message is routed locally
+    through a trie of the patterns its NATS subscription covers, decoded once if anything
+    wants it and queued to every matching subscriber.
+
+    With a `stream` the client runs in durable mode: the events subjects are captured by
+    a JetStream stream, publishing waits for the stream to acknowledge the batch, and
+    `consume`/`replay` read the stream through pull consumers. Core `subscribe` keeps
+    working on top of a stream for consumers that do not need durability.
+    """
+
     def __init__(
         self,
         *,
         nats_dsn: str,
         event_types: set[Type[EntityEvent]],
+        wire_format: WireFormat = JSON_WIRE_FORMAT,
+        stream: str | None = None,
+        stream_max_age: float | None = None,
     ) -> None:
         self._nc: NatsClient | None = None
+        self._js: JetStreamContext | None = None
+        self._stream = stream
+        self._stream_max_age = stream_max_age
 
         self._event_types = {event_type.__name__: event_type for event_type in event_types}
+        self._wire_format = wire_format
+        self._readable_formats = readable_wire_formats()
+        self._headers: dict[str, dict[str, str]] = {}
         self._nats_dsn = nats_dsn
-        self._nats_subscription: NatsSubscription | None = None
+        # the NATS subscriptions by pattern, none covers another, and which one delivers to each route
+        self._pattern_subscriptions: dict[str, _PatternSubscription] = {}
+        self._covering: SubjectTrie[_PatternSubscription] = SubjectTrie()
+        self._route_subscriptions: dict[_Route, _PatternSubscription] = {}
+        self._subscribing = asyncio.Lock()
+        self._open_routes: set[_Route] = set()
+        self._callback_subscriptions: list[NatsSubscription] = []
+        self._queue_subscriptions: dict[_Route, NatsSubscription] = {}
+        # times messages may have been lost: disconnections and NATS subscriptions falling behind
+        self.interruptions = 0
 
     async def connect(self) -> None:
         if self._nc is not None and self._nc.is_connected:
             return
-        self._nc = await nats.connect(self._nats_dsn)
+        self._nc = await nats.connect(
+            self._nats_dsn, disconnected_cb=self._disconnected, error_cb=self._nats_error
+        )
+        if self._stream is not None:
+            self._js = self._nc.jetstream()
+            await self._ensure_stream()
+
+    async def _disconnected(self) -> None:
+        # core NATS doesn't redeliver what was published while the client reconnected
+        self.interruptions += 1
+
+    async def _nats_error(self, error: Exception) -> None:
+        if isinstance(error, nats.errors.SlowConsumerError):
+            self.interruptions += 1
+        log.error(f"NATS error: {error!r}")
+
+    async def _ensure_stream(self) -> None:
+        try:
+            await self._js.stream_info(self._stream)
+        except NotFoundError:
+            log.info(f"Creating event stream {self._stream}")
+            await self._js.add_stream(
+                StreamConfig(name=self._stream, subjects=[EVENTS_SUBJECT], max_age=self._stream_max_age)
+            )
+
+    @property
+    def is_durable(self) -> bool:
+        return self._stream is not None
 
     async def close_subscriptions(self) -> None:
-        if self._nats_subscription:
-            nssub = self._nats_subscription
-            self._nats_subscription = None
+        """Drains the NATS subscriptions, every running `subscribe` ends once it got what was delivered."""
+        subscriptions = [
+            *self._callback_subscriptions,
+            *self._queue_subscriptions.values(),
+            *(
+                pattern_subscription.nats_subscription
+                for pattern_subscription in self._pattern_subscriptions.values()
+            ),
+        ]
+        self._callback_subscriptions = []
+        self._queue_subscriptions = {}
+        self._pattern_subscriptions = {}
+        self._covering = SubjectTrie()
+        self._route_subscriptions = {}
+        for nssub in subscriptions:
             await nssub.drain()
 
+        for route in self._open_routes:
+            route.close()
+
     async def disconnect(self) -> None:
         if self._nc is None or not self._nc.is_connected:
             return
@@ -75,34 +256,316 @@ class EventStoreClient:
     def is_ready(self) -> bool:
         return self._nc is not None and self._nc.is_connected and not self._nc.is_draining
 
-    async def publish_batch(self, batch: list[EntityEvent]) -> None:
+    async def publish_batch(self, batch: list[EntityEvent], *, flush: bool = False) -> None:
         if not self.is_ready:
             raise AssertionError()
 
-        for event in batch:
-            event_data = event.serialize()
+        encode = self._wire_format.encode
+        content_type = self._wire_format.header_value
+        await self.publish_serialized(
+            [(event_subject(event), encode(event), content_type) for event in batch],
+            flush=flush,
+        )
 
-            log.info(
-                f"events.{event.__event_class__}.{event.__entity_type__}"
-                f".{event.entity_id}.{type(event).__name__} ->  {event_data}"
-            )
-            await self._nc.publish(
-                f"events.{event.__event_class__}.{event.__entity_type__}"
-                f".{event.entity_id}.{type(event).__name__}",
-                event_data,
+    async def publish_serialized(
+        self,
+        messages: list[tuple[str, bytes, str | None]],
+        *,
+        flush: bool = False,
+    ) -> None:
+        """Publishes already encoded events as `(subject, payload, content type)`.
+
+        A content type of None publishes without headers, which consumers read as JSON.
+        The messages are buffered and sent by the client's flusher, with `flush` the call
+        waits for the server to have received them: for callers that act on the publish,
+        like deleting the events they published. Publishing to a stream always waits for
+        the stream to acknowledge the batch.
+        """
+        if not self.is_ready:
+            raise AssertionError()
+
+        if self._js is not None:
+            await self._publish_to_stream(messages)
+            return
+
+        publish = self._nc.publish
+        for subject, event_data, content_type in messages:
+            if content_type is None:
+                await publish(subject, event_data)
+            else:
+                await publish(subject, event_data, headers=self._content_type_headers(content_type))
+
+        if log.isEnabledFor(logging.DEBUG):
+            for subject, event_data, content_type in messages:
+                log.debug("%s [%s] -> %s", subject, content_type, event_data)
+
+        if flush and messages:
+            await self._nc.flush()
+
+    async def _publish_to_stream(self, messages: list[tuple[str, bytes, str | None]]) -> None:
+        # the publishes are pipelined, the batch takes one round trip to the stream instead of one per event
+        await asyncio.gather(
+            *(
+                self._js.publish(
+                    subject,
+                    event_data,
+                    stream=self._stream,
+                    headers=None if content_type is None else self._content_type_headers(content_type),
+                )
+                for subject, event_data, content_type in messages
             )
+        )
+
+        if log.isEnabledFor(logging.DEBUG):
+            for subject, event_data, content_type in messages:
+                log.debug("%s [%s] => %s", subject, content_type, event_data)
+
+    def _content_type_headers(self, content_type: str) -> dict[str, str]:
+        headers = self._headers.get(content_type)
+        if headers is None:
+            headers = self._headers[content_type] = {CONTENT_TYPE_HEADER: content_type}
+        return headers
+
+    async def subscribe(
+        self,
+        subscription: EventStoreSubscription,
+        *,
+        pending_limit: int | None = DEFAULT_PENDING_LIMIT,
+        subscribed: asyncio.Event | None = None,
+    ) -> AsyncIterator[EntityEvent]:
+        """Yields the events matching `subscription` until the subscriptions are closed.
+
+        Up to `pending_limit` events wait for the caller, events arriving while that many
+        wait are dropped for this subscription only. With None nothing is dropped, events
+        wait in memory for however long the caller takes. A subscription in a queue group
+        gets its own NATS subscription, the server picks one member of the group per event.
 
-    async def subscribe(self, subscription: EventStoreSubscription) -> AsyncIterator[EntityEvent]:
+        `subscribed` is set once the server has the subscription, every event published
+        from then on is delivered.
+        """
         if not self.is_ready:
             raise AssertionError()
 
-        self._nats_subscription = await self._nc.subscribe(subscription.nats_channel)
+        route = _Route(subscription, pending_limit)
+        self._open_routes.add(route)
+        try:
+            if subscription.queue_group is not None:
+                self._queue_subscriptions[route] = await self._nc.subscribe(
+                    route.pattern, queue=subscription.queue_group, cb=partial(self._deliver, route)
+                )
+            else:
+                async with self._subscribing:
+                    await self._add_route(route)
+            if subscribed is not None:
+                # the server handles a ping after the subscriptions sent before it
+                await self._nc.flush()
+                subscribed.set()
+
+            async for event in route.events():
+                yield event
+        finally:
+            self._open_routes.discard(route)
+            queue_subscription = self._queue_subscriptions.pop(route, None)
+            if queue_subscription is not None and self.is_ready:
+                await queue_subscription.unsubscribe()
+            if route in self._route_subscriptions:
+                async with self._subscribing:
+                    await self._remove_route(route)
+
+    async def _add_route(self, route: _Route) -> None:
+        covering = self._covering.covering(route.pattern)
+        if covering:
+            pattern_subscription = covering[0]
+        else:
+            pattern_subscription = _PatternSubscription(route.pattern)
+            pattern_subscription.nats_subscription = await self._nc.subscribe(
+                route.pattern, cb=partial(self._dispatch, pattern_subscription)
+            )
+            # the narrower subscriptions hand their routes over, a message is delivered through one of them only
+            new_pattern: SubjectTrie[_PatternSubscription] = SubjectTrie()
+            new_pattern.add(route.pattern, pattern_subscription)
+            covered = [
+                other for other in self._pattern_subscriptions.values() if new_pattern.covering(other.pattern)
+            ]
+            for other in covered:
+                for member in self._forget(other):
+                    pattern_subscription.add(member)
+                    self._route_subscriptions[member] = pattern_subscription
+            self._pattern_subscriptions[route.pattern] = pattern_subscription
+            self._covering.add(route.pattern, pattern_subscription)
+            for other in covered:
+                await other.nats_subscription.unsubscribe()
+
+        pattern_subscription.add(route)
+        self._route_subscriptions[route] = pattern_subscription
+
+    async def _remove_route(self, route: _Route) -> None:
+        pattern_subscription = self._route_subscriptions.pop(route)
+        pattern_subscription.remove(route)
+        if any(member.pattern == pattern_subscription.pattern for member in pattern_subscription.members):
+            return
+
+        # nothing subscribes to the pattern itself anymore, what it covered gets narrower subscriptions
+        for member in self._forget(pattern_subscription):
+            await self._add_route(member)
+        if self.is_ready:
+            await pattern_subscription.nats_subscription.unsubscribe()
+
+    def _forget(self, pattern_subscription: _PatternSubscription) -> set[_Route]:
+        """Stops delivering through `pattern_subscription`, returns the routes it delivered to."""
+        del self._pattern_subscriptions[pattern_subscription.pattern]
+        self._covering.remove(pattern_subscription.pattern, pattern_subscription)
+        members = pattern_subscription.members
+        pattern_subscription.routes = SubjectTrie()
+        pattern_subscription.members = set()
+        return members
+
+    async def _deliver(self, route: _Route, msg: Msg) -> None:
+        event = self._decode(msg)
+        if event is not None:
+            route.deliver(event)
+
+    async def _dispatch(self, pattern_subscription: _PatternSubscription, msg: Msg) -> None:
+        tokens = msg.subject.split(".")
+        routes = pattern_subscription.routes.match(tokens)
+        if not routes:
+            return
+
+        event = self._decode_as(msg, tokens[-1])
+        if event is None:
+            return
+        for route in routes:
+            route.deliver(event)
 
-        async for msg in self._nats_subscription.messages:
-            event_type = self._event_types.get(msg.subject.split(".")[4])
-            if event_type is None:
-                continue
-            yield event_type.deserialise(msg.data)
+    def _decode(self, msg: Msg) -> EntityEvent | None:
+        return self._decode_as(msg, msg.subject.rsplit(".", 1)[-1])
+
+    def _decode_as(self, msg: Msg, event_name: str) -> EntityEvent | None:
+        event_type = self._event_types.get(event_name)
+        if event_type is None:
+            return None
+
+        content_type = msg.headers.get(CONTENT_TYPE_HEADER) if msg.headers else None
+        wire_format = self._readable_formats.get(content_type)
+        if wire_format is None:
+            log.warning(f"Skipping {msg.subject}: unsupported content type {content_type}")
+            return None
+        try:
+            return wire_format.decode(event_type, msg.data)
+        except Exception:  # pylint: disable=broad-except
+            # one malformed message doesn't end the subscription it was delivered to
+            log.exception(f"Skipping {msg.subject}: cannot decode it as {content_type or 'json'}")
+            return None
+
+    async def consume(
+        self,
+        subscription: EventStoreSubscription,
+        *,
+        durable: str,
+        batch_size: int = 256,
+        fetch_timeout: float = 5.0,
+        ack_wait: float = 30.0,
+        max_deliver: int = 5,
+        max_ack_pending: int = 1000,
+        start_sequence: int | None = None,
+        start_time: datetime | None = None,
+    ) -> AsyncIterator[StoredEvent]:
+        """Reads the stream through the durable pull consumer `durable`, batch_size events per fetch.
+
+        Every event must be acked (or nak-ed to get it redelivered), events left unacked
+        for ack_wait are delivered again. The consumer resumes where it stopped unless a
+        start position is given, which recreates it from that sequence or time. Replicas
+        reading through the same `durable` share its events, each is delivered to one of them.
+        """
+        js = self._jetstream()
+        if start_sequence is not None or start_time is not None:
+            try:
+                await js.delete_consumer(self._stream, durable)
+            except NotFoundError:
+                pass
+
+        config = ConsumerConfig(
+            durable_name=durable,
+            ack_policy=AckPolicy.EXPLICIT,
+            ack_wait=ack_wait,
+            max_deliver=max_deliver,
+            max_ack_pending=max_ack_pending,
+            **_start_position(start_sequence, start_time),
+        )
+        pull_subscription = await js.pull_subscribe(
+            subscription.nats_channel, durable=durable, stream=self._stream, config=config
+        )
+        try:
+            while True:
+                try:
+                    msgs = await pull_subscription.fetch(batch_size, timeout=fetch_timeout)
+                except nats.errors.TimeoutError:
+                    continue
+
+                for msg in msgs:
+                    event = self._decode(msg)
+                    if event is None:
+                        # not for this consumer, don't let it come back
+                        await msg.ack()
+                        continue
+                    yield StoredEvent(event=event, sequence=msg.metadata.sequence.stream, _msg=msg)
+        finally:
+            await pull_subscription.unsubscribe()
+
+    async def replay(
+        self,
+        subscription: EventStoreSubscription,
+        *,
+        batch_size: int = 500,
+        fetch_timeout: float = 5.0,
+        start_sequence: int | None = None,
+        start_time: datetime | None = None,
+    ) -> AsyncIterator[StoredEvent]:
+        """Reads the stream from a position up to its current end through an ephemeral consumer.
+
+        Nothing has to be acked, the iteration ends once the consumer caught up with the stream.
+        """
+        js = self._jetstream()
+        config = ConsumerConfig(
+            ack_policy=AckPolicy.NONE,
+            inactive_threshold=max(fetch_timeout * 2, 30.0),
+            **_start_position(start_sequence, start_time),
+        )
+        pull_subscription = await js.pull_subscribe(
+            subscription.nats_channel, stream=self._stream, config=config
+        )
+        try:
+            while True:
+                try:
+                    msgs = await pull_subscription.fetch(batch_size, timeout=fetch_timeout)
+                except nats.errors.TimeoutError:
+                    return
+
+                for msg in msgs:
+                    event = self._decode(msg)
+                    if event is not None:
+                        yield StoredEvent(event=event, sequence=msg.metadata.sequence.stream)
+
+                if not msgs or msgs[-1].metadata.num_pending == 0:
+                    return
+        finally:
+            await pull_subscription.unsubscribe()
+
+    def entity_events(
+        self, entity_type: Type[Entity], entity_id: str, *, after_sequence: int = 0
+    ) -> AsyncIterator[StoredEvent]:
+        """Replays the events of one entity stored after `after_sequence`."""
+        return self.replay(
+            EventStoreSubscription(event_class="entity", entity_type=entity_type, entity_id=entity_id),
+            start_sequence=after_sequence + 1,
+        )
+
+    def _jetstream(self) -> JetStreamContext:
+        if not self.is_ready:
+            raise AssertionError()
+        if self._js is None:
+            raise AssertionError("The event store client has no stream configured")
+        return self._js
 
     async def subscribe_with_callback(
         self,
@@ -112,4 +575,14 @@ class EventStoreClient:
         if not self.is_ready:
             raise AssertionError()
 
-        self._nats_subscription = await self._nc.subscribe(subscription.nats_channel, cb=callback)
+        self._callback_subscriptions.append(await self._nc.subscribe(subscription.nats_channel, cb=callback))
+
+
+def _start_position(start_sequence: int | None, start_time: datetime | None) -> dict[str, Any]:
+    if start_sequence is not None and start_time is not None:
+        raise ValueError("At most one of 'start_sequence' or 'start_time' should be provided")
+    if start_sequence is not None:
+        return {"deliver_policy": DeliverPolicy.BY_START_SEQUENCE, "opt_start_seq": start_sequence}
+    if start_time is not None:
+        return {"deliver_policy": DeliverPolicy.BY_START_TIME, "opt_start_time": start_time}
+    return {"deliver_policy": DeliverPolicy.ALL}
@@ -0,0 +1,97 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Mapping, Protocol, Type, TypeVar
+import logging
+
+from event_sourcing.entity import Entity
+from event_sourcing.event_store_client import StoredEvent
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+EntityT = TypeVar("EntityT", bound=Entity)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """The state of an entity at `version`, `sequence` is the stream sequence of its last event."""
+
+    entity_type: str
+    entity_id: str
+    version: int
+    sequence: int
+    state: Mapping[str, Any]
+
+
+class SnapshotStore(ABC):
+    @abstractmethod
+    async def latest(self, *, entity_type: str, entity_id: str) -> Snapshot | None:
+        pass
+
+    @abstractmethod
+    async def save(self, snapshot: Snapshot) -> None:
+        pass
+
+
+class EntityEventSource(Protocol):
+    def entity_events(
+        self, entity_type: Type[Entity], entity_id: str, *, after_sequence: int = 0
+    ) -> AsyncIterator[StoredEvent]:
+        ...
+
+
+class AggregateLoader:
+    """Loads entities from their events, starting from the latest snapshot when there is one.
+
+    `snapshot_every` maps an aggregate type name to how many events may be replayed on
+    top of a snapshot before a newer one is taken, types missing from it (or set to 0)
+    are never snapshotted.
+    """
+
+    def __init__(
+        self,
+        *,
+        events: EntityEventSource,
+        snapshots: SnapshotStore,
+        snapshot_every: Mapping[str, int],
+    ) -> None:
+        self._events = events
+        self._snapshots = snapshots
+        self._snapshot_every = snapshot_every
+
+    async def load(self, entity_type: Type[EntityT], entity_id: str) -> EntityT | None:
+        type_name = entity_type.__name__
+        every = self._snapshot_every.get(type_name, 0)
+
+        snapshot = await self._snapshots.latest(entity_type=type_name, entity_id=entity_id) if every else None
+        entity: EntityT | None = None
+        sequence = 0
+        if snapshot is not None:
+            entity = entity_type.from_snapshot(
+                entity_id=entity_id, version=snapshot.version, state=snapshot.state
+            )
+            sequence = snapshot.sequence
+
+        async for stored_event in self._events.entity_events(entity_type, entity_id, after_sequence=sequence):
+            if entity is None:
+                entity = entity_type.from_created(stored_event.event)
+            else:
+                entity.apply(stored_event.event)
+            sequence = stored_event.sequence
+
+        if entity is None:
+            return None
+
+        if every and entity.version - (snapshot.version if snapshot else 0) >= every:
+            await self._snapshots.save(
+                Snapshot(
+                    entity_type=type_name,
+                    entity_id=entity_id,
+                    version=entity.version,
+                    sequence=sequence,
+                    state=entity.to_snapshot(),
+                )
+            )
+            log.debug(f"Took a snapshot of {type_name} {entity_id} at version {entity.version}")
+
+        return entity
@@ -0,0 +1,115 @@
+from typing import Generic, Iterable, TypeVar
+
+T = TypeVar("T")
+
+SINGLE_TOKEN_WILDCARD = "*"
+TAIL_WILDCARD = ">"
+
+
+class _Node(Generic[T]):
+    __slots__ = ("children", "values", "tail_values")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node[T]] = {}
+        # values of the patterns ending here, and of the patterns ending with `>` here
+        self.values: list[T] = []
+        self.tail_values: list[T] = []
+
+
+class SubjectTrie(Generic[T]):
+    """Values stored under NATS subject patterns and looked up by subject.
+
+    Patterns are split into tokens once when added, `*` matches any one token and a
+    final `>` any number of remaining tokens. A lookup walks the subject's tokens
+    down the literal and `*` branches, its cost depends on the depth of the subject
+    and the wildcards on the way rather than on the number of patterns.
+    """
+
+    def __init__(self) -> None:
+        self._root: _Node[T] = _Node()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, pattern: str, value: T) -> None:
+        node, tail = self._node(pattern, create=True)
+        (node.tail_values if tail else node.values).append(value)
+        self._size += 1
+
+    def remove(self, pattern: str, value: T) -> None:
+        node, tail = self._node(pattern, create=False)
+        values = node.tail_values if tail else node.values
+        values.remove(value)
+        self._size -= 1
+        # branches are left in place, subscriptions come back to the same few patterns
+
+    def _node(self, pattern: str, *, create: bool) -> tuple[_Node[T], bool]:
+        tokens = pattern.split(".")
+        tail = tokens[-1] == TAIL_WILDCARD
+        if tail:
+            tokens.pop()
+        if TAIL_WILDCARD in tokens:
+            raise ValueError(f"'{TAIL_WILDCARD}' can only end a subject pattern: {pattern}")
+
+        node = self._root
+        for token in tokens:
+            child = node.children.get(token)
+            if child is None:
+                if not create:
+                    raise KeyError(pattern)
+                child = node.children[token] = _Node()
+            node = child
+        return node, tail
+
+    def match(self, tokens: Iterable[str]) -> list[T]:
+        """Values of every pattern matching the subject split into `tokens`."""
+        matched: list[T] = []
+        nodes = [self._root]
+        for token in tokens:
+            next_nodes = []
+            for node in nodes:
+                if node.tail_values:
+                    matched.extend(node.tail_values)
+                children = node.children
+                if not children:
+                    continue
+                child = children.get(token)
+                if child is not None:
+                    next_nodes.append(child)
+                child = children.get(SINGLE_TOKEN_WILDCARD)
+                if child is not None:
+                    next_nodes.append(child)
+            if not next_nodes:
+                return matched
+            nodes = next_nodes
+
+        for node in nodes:
+            matched.extend(node.values)
+        return matched
+
+    def covering(self, pattern: str) -> list[T]:
+        """Values of every pattern matching all the subjects `pattern` matches, itself included."""
+        covering: list[T] = []
+        nodes = [self._root]
+        for token in pattern.split("."):
+            next_nodes = []
+            for node in nodes:
+                covering.extend(node.tail_values)
+                if token == TAIL_WILDCARD:
+                    continue
+                # a literal is covered by itself and by `*`, a `*` only by another `*`
+                if token != SINGLE_TOKEN_WILDCARD:
+                    child = node.children.get(token)
+                    if child is not None:
+                        next_nodes.append(child)
+                child = node.children.get(SINGLE_TOKEN_WILDCARD)
+                if child is not None:
+                    next_nodes.append(child)
+            if not next_nodes:
+                return covering
+            nodes = next_nodes
+
+        for node in nodes:
+            covering.extend(node.values)
+        return covering
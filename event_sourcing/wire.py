@@ -0,0 +1,213 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Type
+from uuid import uuid4
+from zlib import crc32
+
+from event_sourcing.codec import FieldSpec, codec_for, compile_function, event_fields
+from event_sourcing.entity import EntityEvent
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+CONTENT_TYPE_HEADER = "Content-Type"
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+
+class WireFormat(ABC):
+    """How event payloads are encoded on the bus.
+
+    The format is announced in the Content-Type header of every message, a message
+    without the header is JSON, so consumers that predate the header keep working.
+    """
+
+    name: str
+    content_type: str
+
+    @abstractmethod
+    def encode(self, event: EntityEvent) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, event_type: Type[EntityEvent], raw: bytes) -> EntityEvent:
+        pass
+
+    @property
+    def header_value(self) -> str | None:
+        return self.content_type
+
+
+class JsonWireFormat(WireFormat):
+    name = "json"
+    content_type = JSON_CONTENT_TYPE
+
+    def encode(self, event: EntityEvent) -> bytes:
+        return codec_for(type(event)).encode(event)
+
+    def decode(self, event_type: Type[EntityEvent], raw: bytes) -> EntityEvent:
+        return codec_for(event_type).decode(raw)
+
+    @property
+    def header_value(self) -> str | None:
+        # JSON is what a message without the header means, no need to pay for the header
+        return None
+
+
+def schema_id(event_type: Type[EntityEvent], fields: tuple[FieldSpec, ...]) -> int:
+    """Identifies the positional layout of an event, producers and consumers must agree on it."""
+    layout = ",".join(f"{field.name}:{field.kind}" for field in fields)
+    return crc32(f"{event_type.__name__}({layout})".encode())
+
+
+class MsgpackEventCodec:
+    """Encodes an event as a msgpack array of its values in declaration order.
+
+    `[schema id, event id, entity id, created at, published at, *body fields]`, the event
+    class, name and entity type are already in the subject and are not repeated, enums
+    travel as their values and timestamps as epoch milliseconds.
+    """
+
+    def __init__(self, event_type: Type[EntityEvent]) -> None:
+        self.event_type = event_type
+        self.fields = event_fields(event_type)
+        self.schema_id = schema_id(event_type, self.fields)
+        self.encode: Callable[[EntityEvent], bytes] = self._generate_encode()
+        self.decode: Callable[[bytes], EntityEvent] = self._generate_decode()
+
+    def _namespace(self) -> dict[str, Any]:
+        namespace: dict[str, Any] = {
+            "packb": msgpack.packb,
+            "unpackb": msgpack.unpackb,
+            "utcnow": datetime.utcnow,
+            "uuid4": uuid4,
+            "fromtimestamp": datetime.fromtimestamp,
+            "new": object.__new__,
+            "event_type": self.event_type,
+        }
+        for field in self.fields:
+            if field.enum_type is not None:
+                namespace[f"members_{field.name}"] = {member.value: member for member in field.enum_type}
+        return namespace
+
+    def _generate_encode(self) -> Callable[[EntityEvent], bytes]:
+        values = []
+        for field in self.fields:
+            value = f"event.{field.slot}"
+            if field.kind == "datetime":
+                converted = f"int({value}.timestamp() * 1000)"
+            elif field.kind == "enum":
+                converted = f"{value}.value"
+            else:
+                values.append(value)
+                continue
+            values.append(f"(None if {value} is None else {converted})" if field.optional else converted)
+
+        source = f"""
+def encode(event):
+    published_at = event._published_at
+    if published_at is None:
+        published_at = event._published_at = utcnow()
+    event_id = event._event_id
+    if event_id is None:
+        event_id = event._event_id = uuid4()
+    return packb((
+        {self.schema_id},
+        str(event_id),
+        event._entity_id,
+        int(event._event_created_at.timestamp() * 1000),
+        int(published_at.timestamp() * 1000),
+        {"".join(f"{value}, " for value in values)}
+    ))
+"""
+        return compile_function(source, "encode", namespace=self._namespace(), label=self.event_type.__name__)
+
+    def _generate_decode(self) -> Callable[[bytes], EntityEvent]:
+        names = [f"value_{field.name}" for field in self.fields]
+        lines = []
+        for field, name in zip(self.fields, names):
+            if field.kind == "datetime":
+                value = f"fromtimestamp({name} / 1000)"
+            elif field.kind == "enum":
+                value = f"members_{field.name}[{name}]"
+            else:
+                lines.append(f"    event.{field.slot} = {name}")
+                continue
+            if field.optional:
+                value = f"None if {name} is None else {value}"
+            lines.append(f"    event.{field.slot} = {value}")
+
+        source = f"""
+def decode(raw):
+    values = unpackb(raw, use_list=False)
+    if values[0] != {self.schema_id}:
+        raise ValueError(
+            f"{self.event_type.__name__} payload has schema {{values[0]}}, expected {self.schema_id}"
+        )
+    _, event_id, entity_id, event_created_at, published_at, {"".join(f"{name}, " for name in names)} = values
+    event = new(event_type)
+    event._entity_id = entity_id
+    event._event_created_at = fromtimestamp(event_created_at / 1000)
+    event._published_at = fromtimestamp(published_at / 1000)
+    event._event_id = event_id
+    event._source_dump = None
+    event._source_raw = None
+    event._entity_version = None
+{chr(10).join(lines)}
+    return event
+"""
+        return compile_function(source, "decode", namespace=self._namespace(), label=self.event_type.__name__)
+
+
+class MsgpackWireFormat(WireFormat):
+    name = "msgpack"
+    content_type = MSGPACK_CONTENT_TYPE
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise RuntimeError("The msgpack wire format requires the msgpack package")
+        self._codecs: dict[Type[EntityEvent], MsgpackEventCodec] = {}
+
+    def _codec(self, event_type: Type[EntityEvent]) -> MsgpackEventCodec:
+        codec = self._codecs.get(event_type)
+        if codec is None:
+            codec = self._codecs[event_type] = MsgpackEventCodec(event_type)
+        return codec
+
+    def encode(self, event: EntityEvent) -> bytes:
+        return self._codec(type(event)).encode(event)
+
+    def decode(self, event_type: Type[EntityEvent], raw: bytes) -> EntityEvent:
+        return self._codec(event_type).decode(raw)
+
+
+JSON_WIRE_FORMAT = JsonWireFormat()
+
+_WIRE_FORMATS: dict[str, WireFormat] = {}
+
+
+def get_wire_format(name: str) -> WireFormat:
+    """Looks a wire format up by its configured name, `json` or `msgpack`."""
+    wire_format = _WIRE_FORMATS.get(name)
+    if wire_format is not None:
+        return wire_format
+
+    if name == JsonWireFormat.name:
+        wire_format = JSON_WIRE_FORMAT
+    elif name == MsgpackWireFormat.name:
+        wire_format = MsgpackWireFormat()
+    else:
+        raise ValueError(f"Unknown event wire format: {name}")
+
+    _WIRE_FORMATS[name] = wire_format
+    return wire_format
+
+
+def readable_wire_formats() -> dict[str | None, WireFormat]:
+    """Every format this process can decode, by Content-Type header value."""
+    formats: dict[str | None, WireFormat] = {None: JSON_WIRE_FORMAT, JSON_CONTENT_TYPE: JSON_WIRE_FORMAT}
+    if msgpack is not None:
+        formats[MSGPACK_CONTENT_TYPE] = get_wire_format(MsgpackWireFormat.name)
+    return formats
@@ -77,11 +77,11 @@ async def init_hometask_cli() -> None:
     from asyncpg import create_pool as create_db_pool
 
     from contracts.schemas.user import UserRole
-    from event_sourcing.event_store_client import EventStoreClient
     from power_plant_construction.app.app_config import get_app_config
     from power_plant_construction.db import env_to_dsn
     from power_plant_construction.entities.task import TaskCreated, TaskDependencyAdded, TaskStatus
     from power_plant_construction.entities.user import User
+    from power_plant_construction.repositories.outbox import get_event_outbox
     from power_plant_construction.repositories.task import get_task_repo
     from power_plant_construction.repositories.user import get_user_repo
 
@@ -95,16 +95,12 @@ async def init_hometask_cli() -> None:
         name=app_config.DB_NAME,
     )
 
-    event_store = EventStoreClient(
-        nats_dsn=app_config.NATS_DSN,
-        event_types=set(),
-    )
     log.info("Setting up db connection pool")
     db_pool = await create_db_pool(db_dsn, max_size=30)
-    await event_store.connect()
     user_repo = get_user_repo()
     task_repo = get_task_repo()
-    async with db_pool.acquire() as conn:
+    outbox = get_event_outbox()
+    async with db_pool.acquire() as conn, conn.transaction():
         manager = await user_repo.fetch_by_id(conn, entity_id="0")
         if manager:
             return
@@ -127,7 +123,7 @@ async def init_hometask_cli() -> None:
         user_batch = manager.drain()
         user_batch.extend(worker.drain())
         await user_repo.persist(conn, user_batch)
-        await event_store.publish_batch(user_batch)
+        await outbox.enqueue(conn, user_batch)
 
         task_batch = [
             TaskCreated(
@@ -155,7 +151,8 @@ async def init_hometask_cli() -> None:
         )
 
         await task_repo.persist(conn, task_batch)
-        await event_store.publish_batch(task_batch)
+        await task_repo.version_dependencies(conn, task_batch)
+        await outbox.enqueue(conn, task_batch)
 
 
 @cli.command("init-hometask")
@@ -166,6 +163,186 @@ def init_hometask(ctx: ClickContext):
     asyncio.run(init_hometask_cli())
 
 
+async def rebuild_projections_cli(*, chunk_size: int, restart: bool) -> None:
+    from asyncpg import connect
+
+    from event_sourcing.event_store_client import EventStoreClient
+    from event_sourcing.wire import get_wire_format
+    from power_plant_construction.app.app_config import get_app_config
+    from power_plant_construction.app.projection_rebuild import PROJECTION_EVENT_TYPES, ProjectionRebuilder
+    from power_plant_construction.db import env_to_dsn
+
+    app_config = get_app_config()
+    if app_config.EVENT_STREAM is None:
+        raise click.UsageError("EVENT_STREAM is not configured, there is no durable event log to replay")
+
+    event_store = EventStoreClient(
+        nats_dsn=app_config.NATS_DSN,
+        event_types=PROJECTION_EVENT_TYPES,
+        wire_format=get_wire_format(app_config.EVENT_WIRE_FORMAT),
+        stream=app_config.EVENT_STREAM,
+    )
+    await event_store.connect()
+    conn = await connect(
+        env_to_dsn(
+            user=app_config.DB_USER,
+            password=app_config.DB_PASSWORD,
+            hosts=app_config.DB_HOSTS,
+            port=app_config.DB_PORT,
+            name=app_config.DB_NAME,
+        )
+    )
+    try:
+        rebuilder = ProjectionRebuilder(conn=conn, event_store=event_store, chunk_size=chunk_size)
+        replayed, elapsed = await rebuilder.run(restart=restart)
+    finally:
+        await conn.close()
+        await event_store.disconnect()
+
+    click.echo(f"Replayed {replayed} events in {elapsed:.1f}s ({replayed / max(elapsed, 1e-9):.0f} events/s)")
+
+
+@cli.command("rebuild-projections")
+@click.option("--chunk-size", default=50_000, show_default=True, help="Events folded in memory per write")
+@click.option("--restart", is_flag=True, help="Discard the checkpoint of an interrupted rebuild")
+def rebuild_projections(chunk_size: int, restart: bool):
+    """Rebuilds tasks, task_dependencies and notifications from the durable event stream.
+
+    The stream only holds events published since EVENT_STREAM was configured.
+    """
+    asyncio.run(rebuild_projections_cli(chunk_size=chunk_size, restart=restart))
+
+
+async def schedule_cli(*, output: str | None) -> None:
+    from asyncpg import connect
+
+    from power_plant_construction.app.app_config import get_app_config
+    from power_plant_construction.db import env_to_dsn
+    from power_plant_construction.planning.dependency_graph import DependencyCycleError
+    from power_plant_construction.planning.scheduling import schedule_tasks
+    from power_plant_construction.repositories.task import get_task_repo
+
+    app_config = get_app_config()
+    conn = await connect(
+        env_to_dsn(
+            user=app_config.DB_USER,
+            password=app_config.DB_PASSWORD,
+            hosts=app_config.DB_HOSTS,
+            port=app_config.DB_PORT,
+            name=app_config.DB_NAME,
+        )
+    )
+    try:
+        tasks, dependencies = await get_task_repo().fetch_dependency_graph(conn)
+    finally:
+        await conn.close()
+
+    try:
+        schedule = schedule_tasks(tasks, dependencies)
+    except DependencyCycleError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+    critical_path = schedule.critical_path()
+    click.echo(f"{len(tasks)} tasks, {len(dependencies)} dependencies, length {schedule.length}")
+    click.echo(f"Critical path ({len(critical_path)} tasks): {' -> '.join(critical_path)}")
+
+    if output is not None:
+        with open(output, "w", encoding="utf-8") as csv:
+            csv.write("task,earliest_start,earliest_finish\n")
+            for node in schedule.earliest_start_order():
+                start = schedule.earliest_start[node]
+                csv.write(f"{schedule.ids[node]},{start},{start + schedule.durations[node]}\n")
+        click.echo(f"Earliest start order written to {output}")
+
+
+@cli.command("schedule")
+@click.option("--output", default=None, help="CSV file to write every task's earliest start to")
+def schedule(output: str | None):
+    """Computes the critical path and earliest starts over all tasks, one unit per task left to do."""
+    asyncio.run(schedule_cli(output=output))
+
+
+async def load_entity_cli(*, entity_type: str, entity_id: str) -> None:
+    from asyncpg import create_pool
+    import orjson
+
+    from event_sourcing.event_store_client import EventStoreClient
+    from event_sourcing.snapshots import AggregateLoader
+    from event_sourcing.wire import get_wire_format
+    from power_plant_construction.app.app_config import get_app_config
+    from power_plant_construction.db import env_to_dsn
+    from power_plant_construction.entities.notification import (
+        Notification,
+        NotificationCreated,
+        NotificationStatusUpdated,
+    )
+    from power_plant_construction.entities.task import (
+        Task,
+        TaskCreated,
+        TaskDependencyAdded,
+        TaskDependencyRemoved,
+        TaskStatusUpdated,
+    )
+    from power_plant_construction.entities.user import User, UserCreated
+    from power_plant_construction.repositories.snapshot import SnapshotRepo
+
+    entity_types = {"Task": Task, "Notification": Notification, "User": User}
+    app_config = get_app_config()
+    if app_config.EVENT_STREAM is None:
+        raise click.UsageError("EVENT_STREAM is not configured, there is no durable event log to load from")
+
+    event_store = EventStoreClient(
+        nats_dsn=app_config.NATS_DSN,
+        event_types={
+            TaskCreated,
+            TaskDependencyAdded,
+            TaskDependencyRemoved,
+            TaskStatusUpdated,
+            NotificationCreated,
+            NotificationStatusUpdated,
+            UserCreated,
+        },
+        wire_format=get_wire_format(app_config.EVENT_WIRE_FORMAT),
+        stream=app_config.EVENT_STREAM,
+    )
+    await event_store.connect()
+    db_pool = await create_pool(
+        env_to_dsn(
+            user=app_config.DB_USER,
+            password=app_config.DB_PASSWORD,
+            hosts=app_config.DB_HOSTS,
+            port=app_config.DB_PORT,
+            name=app_config.DB_NAME,
+        ),
+        max_size=2,
+    )
+    try:
+        loader = AggregateLoader(
+            events=event_store, snapshots=SnapshotRepo(db_pool), snapshot_every=app_config.SNAPSHOT_EVERY
+        )
+        entity = await loader.load(entity_types[entity_type], entity_id)
+    finally:
+        await db_pool.close()
+        await event_store.disconnect()
+
+    if entity is None:
+        raise click.ClickException(f"No events for {entity_type} {entity_id} in {app_config.EVENT_STREAM}")
+
+    click.echo(f"{entity_type} {entity_id} at version {entity.version}")
+    click.echo(orjson.dumps(entity.to_snapshot(), option=orjson.OPT_INDENT_2).decode())
+
+
+@cli.command("load-entity")
+@click.argument("entity_type", type=click.Choice(["Task", "Notification", "User"]))
+@click.argument("entity_id")
+def load_entity(entity_type: str, entity_id: str):
+    """Loads an entity from the durable event stream, on top of its latest snapshot.
+
+    Takes a new snapshot once more than SNAPSHOT_EVERY events were replayed for its type.
+    """
+    asyncio.run(load_entity_cli(entity_type=entity_type, entity_id=entity_id))
+
+
 if __name__ == "__main__":
     os.environ.setdefault("ENV_PATH", ".env")
     os.environ["PYTHONPATH"] = "."
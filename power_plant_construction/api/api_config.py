@@ -14,6 +14,23 @@ class ApiConfig(BaseSettings):
     API_PORT: str = "8080"
 
     NATS_DSN: str
+    # json or msgpack (needs the msgpack extra), consumers read whichever format a message announces
+    EVENT_WIRE_FORMAT: str = "json"
+
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10_000
+    AUTH_PRINCIPAL_CACHE_TTL: float = 60.0
+    AUTH_TRUST_ROLE_CLAIM: bool = False
+    AUTH_PASSWORD_HASHING_WORKERS: int = 4
+
+    # frames buffered per streaming connection before it is dropped, and seconds between heartbeats
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = 256
+    NOTIFICATION_STREAM_HEARTBEAT: float = 15.0
+
+    UNREAD_COUNT_CACHE_SIZE: int = 100_000
+    UNREAD_COUNT_CACHE_TTL: float = 30.0
+
+    # seconds the dependency graph may miss a committed change before it is loaded again
+    DEPENDENCY_GRAPH_RESYNC_AFTER: float = 5.0
 
     class Config:
         env_file = os.environ.get("ENV_PATH")
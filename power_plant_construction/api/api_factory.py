@@ -1,19 +1,53 @@
+import asyncio
 import logging
 
 from asyncpg import create_pool as create_db_pool
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from event_sourcing.event_store_client import EventStoreClient
+from event_sourcing.event_store_client import EventStoreClient, EventStoreSubscription
+from event_sourcing.wire import get_wire_format
 from power_plant_construction.api.api_config import ApiConfig, get_api_config
 from power_plant_construction.api.auth import router as auth_router
+from power_plant_construction.api.dependency_graph_sync import DependencyGraphSync
+from power_plant_construction.api.notification_stream import get_notification_stream
+from power_plant_construction.api.pagination import NEXT_CURSOR_HEADER
+from power_plant_construction.api.principal_cache import get_principal_cache
 from power_plant_construction.api.resources import notifications, tasks
-from power_plant_construction.db import env_to_dsn, set_db_pool
-from power_plant_construction.event_store import set_event_store
+from power_plant_construction.api.unread_counts import get_unread_count_cache
+from power_plant_construction.db import env_to_dsn, get_db_pool, set_db_pool
+from power_plant_construction.entities.notification import (
+    Notification,
+    NotificationCreated,
+    NotificationStatusUpdated,
+)
+from power_plant_construction.entities.task import (
+    Task,
+    TaskCreated,
+    TaskDependencyAdded,
+    TaskDependencyRemoved,
+    TaskStatusUpdated,
+)
+from power_plant_construction.entities.user import User, UserCreated
+from power_plant_construction.event_store import get_event_store, set_event_store
+from power_plant_construction.planning.dependency_graph import get_dependency_graph
+from power_plant_construction.planning.scheduling import get_schedule_tracker
+from power_plant_construction.repositories.batch import ConcurrencyConflict
+from power_plant_construction.repositories.outbox import get_event_outbox
+from power_plant_construction.repositories.task import get_task_repo
 
 log = logging.getLogger(__name__)
 
 
+async def concurrency_conflict_handler(_: Request, __: ConcurrencyConflict) -> JSONResponse:
+    # the commands already retried, the entity is too contended to go through right now
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "The resource was modified concurrently, retry the request"},
+    )
+
+
 class HealthCheckFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
         return (
@@ -32,11 +66,21 @@ def create_api(api_config: ApiConfig | None = None) -> FastAPI:
     if api_config is None:
         api_config = get_api_config()
 
+    wire_format = get_wire_format(api_config.EVENT_WIRE_FORMAT)
+    get_event_outbox().wire_format = wire_format
+
     api = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+    api.state.background_tasks = set()
 
     api.add_middleware(
-        CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
+    api.add_exception_handler(ConcurrencyConflict, concurrency_conflict_handler)
     api.include_router(auth_router, prefix="/api/auth", tags=["auth"])
 
     log.info("Registering routes")
@@ -70,13 +114,54 @@ def create_api(api_config: ApiConfig | None = None) -> FastAPI:
         log.info("Initializing event store ...")
         event_store = EventStoreClient(
             nats_dsn=api_config.NATS_DSN if api_config else "",
-            event_types=set(),
+            event_types={
+                UserCreated,
+                TaskCreated,
+                TaskDependencyAdded,
+                TaskDependencyRemoved,
+                TaskStatusUpdated,
+                NotificationCreated,
+                NotificationStatusUpdated,
+            },
+            wire_format=wire_format,
         )
         await event_store.connect()
         set_event_store(event_store)
+        api.state.background_tasks.add(asyncio.create_task(invalidate_principals(event_store)))
+        api.state.background_tasks.add(asyncio.create_task(stream_notifications(event_store)))
         log.info("Initializing event store and rpc relay [done]")
 
+    async def invalidate_principals(event_store: EventStoreClient) -> None:
+        principal_cache = get_principal_cache()
+        async for event in event_store.subscribe(
+            EventStoreSubscription(event_class="entity", entity_type=User)
+        ):
+            principal_cache.invalidate(event.entity_id)
+
+    async def init_dependency_graph() -> None:
+        # after the event store: the changes committed while the graph loads are caught from the stream
+        dependency_graph_sync = DependencyGraphSync(
+            get_dependency_graph(),
+            get_schedule_tracker(),
+            get_task_repo(),
+            resync_after=api_config.DEPENDENCY_GRAPH_RESYNC_AFTER,
+        )
+        followers = await dependency_graph_sync.start(get_event_store(), await get_db_pool())
+        api.state.background_tasks.update(followers)
+
+    async def stream_notifications(event_store: EventStoreClient) -> None:
+        # one subscription per process, fanned out to the connected receivers in memory
+        notification_stream = get_notification_stream()
+        unread_count_cache = get_unread_count_cache()
+        async for event in event_store.subscribe(
+            EventStoreSubscription(event_class="entity", entity_type=Notification)
+        ):
+            notification_stream.publish(event)
+            if event.receiver is not None:
+                unread_count_cache.invalidate(event.receiver)
+
     log.info("Signalling startup")
     api.on_event("startup")(init_database)
     api.on_event("startup")(init_event_store)
+    api.on_event("startup")(init_dependency_graph)
     return api
@@ -11,6 +11,9 @@ from starlette.status import HTTP_401_UNAUTHORIZED
 import jwt
 
 from contracts.schemas.user import UserRole
+from power_plant_construction.api.api_config import ApiConfig, get_api_config
+from power_plant_construction.api.password_hashing import verify_password
+from power_plant_construction.api.principal_cache import PrincipalCache, get_principal_cache
 from power_plant_construction.db import get_db_pool
 from power_plant_construction.repositories.user import UserRepo, get_user_repo
 
@@ -51,6 +54,8 @@ async def get_logged_in_user(
     token: str = Depends(oauth2_scheme),
     pool: Pool = Depends(get_db_pool),
     user_repository: UserRepo = Depends(get_user_repo),
+    principal_cache: PrincipalCache = Depends(get_principal_cache),
+    api_config: ApiConfig = Depends(get_api_config),
 ) -> LoggedInUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -72,17 +77,28 @@ async def get_logged_in_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    async with pool.acquire() as conn:
-        user = await user_repository.fetch_by_id(conn, entity_id=user_id)
+    if api_config.AUTH_TRUST_ROLE_CLAIM and payload.get("role") is not None:
+        try:
+            return LoggedInUser(user=user_id, role=UserRole(payload["role"]))
+        except ValueError:
+            raise credentials_exception
+
+    role = principal_cache.get(user_id)
+    if role is None:
+        async with pool.acquire() as conn:
+            user = await user_repository.fetch_by_id(conn, entity_id=user_id)
+
+            if user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Something went wrong",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
 
-        if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Something went wrong",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        role = user.role
+        principal_cache.put(user_id, role)
 
-    return LoggedInUser(user=user_id, role=user.role)
+    return LoggedInUser(user=user_id, role=role)
 
 
 class Authenticator:
@@ -112,32 +128,26 @@ async def login_for_access_token(
 ) -> dict[str, str]:
     async with pool.acquire() as conn:
         user = await user_repo.fetch_by_login(conn, login=form_data.username)
-        if not user:
-            raise HTTPException(
-                status_code=HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username or password or this method of login is disabled",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
-        if not user or not user.verify_password(form_data.password):
-            raise HTTPException(
-                status_code=HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username or password or this method of login is disabled",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={
-                "sub": user.entity_id,
-                "role": user.role,
-            },
-            expires_delta=access_token_expires,
+
+    if not user or not await verify_password(user, form_data.password):
+        raise HTTPException(
+            status_code=HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password or this method of login is disabled",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-        }
+
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={
+            "sub": user.entity_id,
+            "role": user.role,
+        },
+        expires_delta=access_token_expires,
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+    }
 
 
 MINIMAL_AUTH = Authenticator(whitelisted_roles=frozenset((UserRole.WORKER, UserRole.MANAGER)))
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+
+from asyncpg import Pool
+
+from event_sourcing.entity import EntityEvent
+from event_sourcing.event_store_client import EventStoreClient, EventStoreSubscription
+from power_plant_construction.entities.task import Task
+from power_plant_construction.planning.dependency_graph import DependencyGraph
+from power_plant_construction.planning.scheduling import ScheduleTracker, schedule_tasks
+from power_plant_construction.repositories.task import TaskRepo
+
+log = logging.getLogger(__name__)
+
+
+class DependencyGraphSync:
+    """Keeps the dependency graph and the schedule of this process in step with the database.
+
+    The task events are subscribed to before the graph is loaded. The ones arriving while
+    it loads are held back and replayed on top of it, the graph skips the dependency
+    changes the loaded version already has. The graph is loaded again whenever events may
+    have been lost: NATS disconnected or dropped messages, or a committed version stayed
+    missing for `resync_after` seconds.
+    """
+
+    def __init__(
+        self,
+        graph: DependencyGraph,
+        schedule_tracker: ScheduleTracker,
+        task_repo: TaskRepo,
+        *,
+        resync_after: float,
+        check_interval: float = 1.0,
+    ) -> None:
+        self._graph = graph
+        self._schedule_tracker = schedule_tracker
+        self._task_repo = task_repo
+        self._resync_after = resync_after
+        self._check_interval = check_interval
+        self._buffer: list[EntityEvent] | None = None
+        self._interruptions = 0
+
+    async def start(self, event_store: EventStoreClient, db_pool: Pool) -> list[asyncio.Task]:
+        """Subscribes, loads the graph and returns the tasks following it from then on."""
+        self._buffer = []
+        subscribed = asyncio.Event()
+        follower = asyncio.create_task(self._follow(event_store, subscribed))
+        waiting = asyncio.create_task(subscribed.wait())
+        await asyncio.wait({follower, waiting}, return_when=asyncio.FIRST_COMPLETED)
+        if not subscribed.is_set():
+            waiting.cancel()
+            # the subscription failed, let it raise
+            await follower
+
+        try:
+            await self.resync(event_store, db_pool)
+        except BaseException:
+            follower.cancel()
+            raise
+        return [follower, asyncio.create_task(self._watch(event_store, db_pool))]
+
+    async def resync(self, event_store: EventStoreClient, db_pool: Pool) -> None:
+        if self._buffer is None:
+            self._buffer = []
+        self._interruptions = event_store.interruptions
+
+        log.info("Loading dependency graph ...")
+        async with db_pool.acquire() as conn, conn.transaction(isolation="repeatable_read", readonly=True):
+            version = await self._task_repo.fetch_graph_version(conn)
+            tasks, dependencies = await self._task_repo.fetch_dependency_graph(conn)
+
+        self._graph.load((task for task, _ in tasks), dependencies, version=version)
+        # scheduled over the graph rather than the rows, any cycle left in the data is already cut
+        self._schedule_tracker.load(schedule_tasks(tasks, self._graph.dependencies()))
+        buffered, self._buffer = self._buffer, None
+        for event in buffered:
+            self._apply(event)
+        log.info(
+            f"Loading dependency graph of {len(self._graph)} tasks at version {version} [done], "
+            f"replayed {len(buffered)} events"
+        )
+
+    def _apply(self, event: EntityEvent) -> None:
+        self._graph.apply(event)
+        self._schedule_tracker.apply(event)
+
+    async def _follow(self, event_store: EventStoreClient, subscribed: asyncio.Event) -> None:
+        # commands apply their own batches to the graph right away, this catches up with the
+        # other processes and moves the schedule along with every change
+        async for event in event_store.subscribe(
+            EventStoreSubscription(event_class="entity", entity_type=Task),
+            pending_limit=None,
+            subscribed=subscribed,
+        ):
+            if self._buffer is not None:
+                self._buffer.append(event)
+            else:
+                self._apply(event)
+
+    def needs_resync(self, event_store: EventStoreClient) -> bool:
+        return (
+            self._buffer is not None
+            or event_store.interruptions != self._interruptions
+            or self._graph.behind_for() > self._resync_after
+        )
+
+    async def _watch(self, event_store: EventStoreClient, db_pool: Pool) -> None:
+        while True:
+            await asyncio.sleep(self._check_interval)
+            if not self.needs_resync(event_store):
+                continue
+            try:
+                await self.resync(event_store, db_pool)
+            except Exception:
+                # the events keep being held back until a load goes through
+                log.exception("Failed to reload the dependency graph")
@@ -0,0 +1,109 @@
+from typing import AsyncIterator
+import asyncio
+
+import orjson
+
+from event_sourcing.entity import EntityEvent
+from power_plant_construction.api.api_config import get_api_config
+from power_plant_construction.entities.notification import NotificationCreated, NotificationStatusUpdated
+
+HEARTBEAT_FRAME = b": heartbeat\n\n"
+# sent in place of whatever a too slow client missed, it should refetch the list and reconnect
+OVERFLOW_FRAME = b"event: overflow\ndata: {}\n\n"
+
+
+def sse_frame(event: EntityEvent) -> bytes | None:
+    """The server-sent event for a notification event, None for events not to stream."""
+    if isinstance(event, NotificationCreated):
+        data = {
+            "id": event.entity_id,
+            "title": event.title,
+            "content": event.content,
+            "status": event.status,
+            "created_at": event.event_created_at,
+            "updated_at": event.event_created_at,
+        }
+    elif isinstance(event, NotificationStatusUpdated):
+        data = {"id": event.entity_id, "status": event.status, "updated_at": event.event_created_at}
+    else:
+        return None
+
+    return (
+        f"event: {type(event).__name__}\nid: {event.event_id}\ndata: ".encode() + orjson.dumps(data) + b"\n\n"
+    )
+
+
+class NotificationStream:
+    """Routes notification events to the connected receivers of this api process.
+
+    Every connection gets a queue of at most `queue_size` frames. A connection whose
+    queue is full gets its backlog replaced by an overflow frame and is closed, a slow
+    client never holds more than its queue in memory or slows the others down.
+    """
+
+    def __init__(self, *, queue_size: int, heartbeat: float) -> None:
+        self._queue_size = queue_size
+        self._heartbeat = heartbeat
+        self._receivers: dict[str, set[asyncio.Queue[bytes]]] = {}
+        self.dropped = 0
+
+    @property
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self._receivers.values())
+
+    def publish(self, event: EntityEvent) -> None:
+        receiver = getattr(event, "receiver", None)
+        queues = self._receivers.get(receiver) if receiver is not None else None
+        if not queues:
+            return
+
+        frame = sse_frame(event)
+        if frame is None:
+            return
+
+        for queue in queues:
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._overflow(queue)
+
+    def _overflow(self, queue: "asyncio.Queue[bytes]") -> None:
+        self.dropped += 1
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(OVERFLOW_FRAME)
+
+    async def frames(self, receiver: str) -> AsyncIterator[bytes]:
+        """Frames for one connection of `receiver`, with a heartbeat whenever nothing happened."""
+        queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=self._queue_size)
+        self._receivers.setdefault(receiver, set()).add(queue)
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), timeout=self._heartbeat)
+                except asyncio.TimeoutError:
+                    frame = HEARTBEAT_FRAME
+                yield frame
+                if frame is OVERFLOW_FRAME:
+                    return
+        finally:
+            queues = self._receivers.get(receiver)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._receivers[receiver]
+
+
+_NOTIFICATION_STREAM: NotificationStream | None = None
+
+
+def get_notification_stream() -> NotificationStream:
+    global _NOTIFICATION_STREAM  # pylint: disable=global-statement
+    if _NOTIFICATION_STREAM is None:
+        api_config = get_api_config()
+        _NOTIFICATION_STREAM = NotificationStream(
+            queue_size=api_config.NOTIFICATION_STREAM_QUEUE_SIZE,
+            heartbeat=api_config.NOTIFICATION_STREAM_HEARTBEAT,
+        )
+
+    return _NOTIFICATION_STREAM
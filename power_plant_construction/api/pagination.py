@@ -0,0 +1,34 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from datetime import datetime
+
+from fastapi import HTTPException, Response, status
+import orjson
+
+from power_plant_construction.repositories.keyset import Keyset
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(created_at: datetime, entity_id: str) -> str:
+    return urlsafe_b64encode(orjson.dumps([created_at.isoformat(), entity_id])).decode()
+
+
+def decode_cursor(cursor: str | None) -> Keyset | None:
+    if cursor is None:
+        return None
+
+    try:
+        created_at, entity_id = orjson.loads(urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), str(entity_id)
+    except (Base64Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, page: list, *, limit: int) -> None:
+    """Points the client at the next page when `page` came back full."""
+    if len(page) == limit:
+        last = page[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.entity_id)
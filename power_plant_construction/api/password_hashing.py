@@ -0,0 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+from power_plant_construction.api.api_config import get_api_config
+from power_plant_construction.entities.user import User
+
+_PASSWORD_EXECUTOR: ThreadPoolExecutor | None = None
+
+
+def get_password_executor() -> ThreadPoolExecutor:
+    global _PASSWORD_EXECUTOR  # pylint: disable=global-statement
+    if _PASSWORD_EXECUTOR is None:
+        _PASSWORD_EXECUTOR = ThreadPoolExecutor(
+            max_workers=get_api_config().AUTH_PASSWORD_HASHING_WORKERS,
+            thread_name_prefix="password-hashing",
+        )
+
+    return _PASSWORD_EXECUTOR
+
+
+async def verify_password(
+    user: User, plain_password: str, executor: ThreadPoolExecutor | None = None
+) -> bool:
+    """Runs bcrypt on the password hashing pool, bcrypt releases the GIL so the event loop keeps serving."""
+    return await asyncio.get_running_loop().run_in_executor(
+        executor or get_password_executor(), user.verify_password, plain_password
+    )
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+from time import monotonic
+
+from contracts.schemas.user import UserRole
+from power_plant_construction.api.api_config import get_api_config
+
+
+class PrincipalCache:
+    """Bounded LRU of user roles keyed by user id, entries expire `ttl` seconds after being stored."""
+
+    def __init__(self, *, max_size: int, ttl: float) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, UserRole]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> UserRole | None:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user_id: str, role: UserRole) -> None:
+        if self._max_size <= 0:
+            return
+
+        self._entries[user_id] = (monotonic() + self._ttl, role)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_PRINCIPAL_CACHE: PrincipalCache | None = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    global _PRINCIPAL_CACHE  # pylint: disable=global-statement
+    if _PRINCIPAL_CACHE is None:
+        api_config = get_api_config()
+        _PRINCIPAL_CACHE = PrincipalCache(
+            max_size=api_config.AUTH_PRINCIPAL_CACHE_SIZE,
+            ttl=api_config.AUTH_PRINCIPAL_CACHE_TTL,
+        )
+
+    return _PRINCIPAL_CACHE
@@ -1,15 +1,24 @@
 from uuid import uuid4
 
 from asyncpg import Pool
-from fastapi import APIRouter, Depends, Path
+from fastapi import APIRouter, Depends, Path, Query, Response
+from fastapi.responses import StreamingResponse
 
-from contracts.schemas.notification import NotificationDto
-from event_sourcing.event_store_client import EventStoreClient
+from contracts.schemas.notification import NotificationDto, NotificationStatus, UnreadCountDto
 from power_plant_construction.api.auth import MINIMAL_AUTH, LoggedInUser
+from power_plant_construction.api.notification_stream import NotificationStream, get_notification_stream
+from power_plant_construction.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    set_next_cursor,
+)
+from power_plant_construction.api.unread_counts import UnreadCountCache, get_unread_count_cache
+from power_plant_construction.commands.notification.mark_all_read import MarkAllRead
 from power_plant_construction.commands.notification.mark_read import MarkRead
 from power_plant_construction.db import get_db_pool
-from power_plant_construction.event_store import get_event_store
 from power_plant_construction.repositories.notification import NotificationRepo, get_notification_repo
+from power_plant_construction.repositories.outbox import EventOutbox, get_event_outbox
 
 router = APIRouter()
 
@@ -19,12 +28,25 @@ router = APIRouter()
     response_model=list[NotificationDto],
 )
 async def get_notifications_list(
+    response: Response,
+    status: NotificationStatus | None = Query(None),
+    after: str | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     pool: Pool = Depends(get_db_pool),
     notification_repo: NotificationRepo = Depends(get_notification_repo),
     logged_in_user: LoggedInUser = Depends(MINIMAL_AUTH),
 ) -> list[NotificationDto]:
+    """The logged in user's notifications, oldest first, at most `limit` of them (100 by default).
+
+    A full page comes with an `X-Next-Cursor` header, pass it as `after` for the next
+    page: a client that ignores the header only ever sees the first page.
+    """
+    keyset = decode_cursor(after)
     async with pool.acquire() as conn:
-        notifications = await notification_repo.fetch_all_for_receiver(conn, receiver=logged_in_user.user)
+        notifications = await notification_repo.fetch_all_for_receiver(
+            conn, receiver=logged_in_user.user, status=status, after=keyset, limit=limit
+        )
+        set_next_cursor(response, notifications, limit=limit)
         return [
             NotificationDto(
                 id=notification.entity_id,
@@ -38,6 +60,62 @@ async def get_notifications_list(
         ]
 
 
+@router.get(
+    "/unread-count",
+    response_model=UnreadCountDto,
+)
+async def get_unread_count(
+    pool: Pool = Depends(get_db_pool),
+    notification_repo: NotificationRepo = Depends(get_notification_repo),
+    unread_count_cache: UnreadCountCache = Depends(get_unread_count_cache),
+    logged_in_user: LoggedInUser = Depends(MINIMAL_AUTH),
+) -> UnreadCountDto:
+    unread = unread_count_cache.get(logged_in_user.user)
+    if unread is None:
+        generation = unread_count_cache.generation(logged_in_user.user)
+        async with pool.acquire() as conn:
+            unread = await notification_repo.fetch_unread_count(conn, logged_in_user.user)
+        unread_count_cache.put(logged_in_user.user, unread, generation=generation)
+
+    return UnreadCountDto(unread=unread)
+
+
+@router.post(
+    "/read",
+    status_code=200,
+)
+async def set_all_notifications_as_read(
+    pool: Pool = Depends(get_db_pool),
+    notification_repo: NotificationRepo = Depends(get_notification_repo),
+    outbox: EventOutbox = Depends(get_event_outbox),
+    unread_count_cache: UnreadCountCache = Depends(get_unread_count_cache),
+    logged_in_user: LoggedInUser = Depends(MINIMAL_AUTH),
+) -> None:
+    mark_all_read = MarkAllRead(command_id=str(uuid4()), principal_id=logged_in_user.user)
+    await mark_all_read.execute(pool=pool, outbox=outbox, notification_repo=notification_repo)
+    unread_count_cache.invalidate(logged_in_user.user)
+
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+)
+async def stream_notifications(
+    notification_stream: NotificationStream = Depends(get_notification_stream),
+    logged_in_user: LoggedInUser = Depends(MINIMAL_AUTH),
+) -> StreamingResponse:
+    """Server-sent events for the notifications created for and read by the logged in user.
+
+    Only what happens after connecting is streamed, fetch the list first. An `overflow`
+    event means the client fell behind and missed events, it should refetch and reconnect.
+    """
+    return StreamingResponse(
+        notification_stream.frames(logged_in_user.user),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post(
     "/{notification}/read",
     status_code=200,
@@ -46,7 +124,8 @@ async def set_notification_as_read(
     notification: str = Path(...),
     pool: Pool = Depends(get_db_pool),
     notification_repo: NotificationRepo = Depends(get_notification_repo),
-    event_store: EventStoreClient = Depends(get_event_store),
+    outbox: EventOutbox = Depends(get_event_outbox),
+    unread_count_cache: UnreadCountCache = Depends(get_unread_count_cache),
     logged_in_user: LoggedInUser = Depends(MINIMAL_AUTH),
 ) -> None:
     update_knowledge_items_command = MarkRead(
@@ -54,5 +133,6 @@ async def set_notification_as_read(
     )
 
     await update_knowledge_items_command.execute(
-        pool=pool, event_store=event_store, notification_repo=notification_repo
+        pool=pool, outbox=outbox, notification_repo=notification_repo
     )
+    unread_count_cache.invalidate(logged_in_user.user)
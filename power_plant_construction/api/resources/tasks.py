@@ -1,17 +1,37 @@
 from uuid import uuid4
 
 from asyncpg import Pool
-from fastapi import APIRouter, Body, Depends, Path, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response
 
-from contracts.schemas.task import TaskCreateDto, TaskDependencyUpdateDto, TaskDto, TaskUpdateStatusDto
-from event_sourcing.event_store_client import EventStoreClient
+from contracts.schemas.task import (
+    ScheduleDto,
+    TaskCreateDto,
+    TaskDependencyUpdateDto,
+    TaskDto,
+    TaskGraphCreateDto,
+    TaskScheduleDto,
+    TaskStatus,
+    TaskUpdateStatusDto,
+)
 from power_plant_construction.api.auth import MANAGER_AUTH, MINIMAL_AUTH, LoggedInUser
-from power_plant_construction.commands.task.add_dependency import AddDependency
+from power_plant_construction.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    set_next_cursor,
+)
 from power_plant_construction.commands.task.create import Create
-from power_plant_construction.commands.task.remove_dependency import RemoveDependency
+from power_plant_construction.commands.task.create_graph import CreateGraph, InvalidTaskGraph
+from power_plant_construction.commands.task.update_dependencies import UpdateDependencies
 from power_plant_construction.commands.task.update_status import UpdateStatus
 from power_plant_construction.db import get_db_pool
-from power_plant_construction.event_store import get_event_store
+from power_plant_construction.planning.dependency_graph import (
+    DependencyCycleError,
+    DependencyGraph,
+    get_dependency_graph,
+)
+from power_plant_construction.planning.scheduling import ScheduleTracker, get_schedule_tracker
+from power_plant_construction.repositories.outbox import EventOutbox, get_event_outbox
 from power_plant_construction.repositories.task import TaskRepo, get_task_repo
 
 router = APIRouter()
@@ -22,17 +42,37 @@ router = APIRouter()
     response_model=list[TaskDto],
 )
 async def get_tasks(
+    response: Response,
     only_unblocked_pending: bool = Query(False),
+    status: TaskStatus | None = Query(None),
+    after: str | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     pool: Pool = Depends(get_db_pool),
     task_repo: TaskRepo = Depends(get_task_repo),
     logged_in_user: LoggedInUser = Depends(MINIMAL_AUTH),
 ) -> list[TaskDto]:
+    """The logged in user's tasks, oldest first, at most `limit` of them (100 by default).
+
+    A full page comes with an `X-Next-Cursor` header, pass it as `after` for the next
+    page: a client that ignores the header only ever sees the first page.
+    `only_unblocked_pending` lists the pending tasks nothing blocks anymore, it can't be
+    combined with another `status`.
+    """
+    if only_unblocked_pending and status not in (None, TaskStatus.PENDING):
+        raise HTTPException(status_code=400, detail="only_unblocked_pending only lists PENDING tasks")
+
+    keyset = decode_cursor(after)
     async with pool.acquire() as conn:
         if only_unblocked_pending:
-            tasks = await task_repo.fetch_pending_unblocked_tasks(conn, assignee=logged_in_user.user)
+            tasks = await task_repo.fetch_pending_unblocked_tasks(
+                conn, assignee=logged_in_user.user, after=keyset, limit=limit
+            )
         else:
-            tasks = await task_repo.fetch_by_assignee(conn, assignee=logged_in_user.user)
+            tasks = await task_repo.fetch_by_assignee(
+                conn, assignee=logged_in_user.user, status=status, after=keyset, limit=limit
+            )
 
+        set_next_cursor(response, tasks, limit=limit)
         return [
             TaskDto(
                 id=task.entity_id,
@@ -57,7 +97,7 @@ async def create_new_task(
     task: TaskCreateDto = Body(...),
     pool: Pool = Depends(get_db_pool),
     task_repo: TaskRepo = Depends(get_task_repo),
-    event_store: EventStoreClient = Depends(get_event_store),
+    outbox: EventOutbox = Depends(get_event_outbox),
     logged_in_user: LoggedInUser = Depends(MANAGER_AUTH),
 ) -> str:
     create_task_command = Create(
@@ -71,13 +111,55 @@ async def create_new_task(
 
     await create_task_command.execute(
         pool=pool,
-        event_store=event_store,
+        outbox=outbox,
         task_repo=task_repo,
     )
 
     return str(uuid4())
 
 
+@router.post(
+    "/bulk",
+    status_code=201,
+)
+async def create_task_graph(
+    graph: TaskGraphCreateDto = Body(...),
+    pool: Pool = Depends(get_db_pool),
+    task_repo: TaskRepo = Depends(get_task_repo),
+    outbox: EventOutbox = Depends(get_event_outbox),
+    dependency_graph: DependencyGraph = Depends(get_dependency_graph),
+    logged_in_user: LoggedInUser = Depends(MANAGER_AUTH),
+) -> dict[str, str]:
+    create_graph = CreateGraph(
+        command_id=str(uuid4()),
+        principal_id=str(uuid4()),
+        tasks=graph.tasks,
+        author=logged_in_user.user,
+    )
+
+    try:
+        return await create_graph.execute(
+            pool=pool,
+            outbox=outbox,
+            task_repo=task_repo,
+            dependency_graph=dependency_graph,
+        )
+    except InvalidTaskGraph as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get(
+    "/schedule",
+    response_model=ScheduleDto,
+)
+async def get_schedule(
+    schedule_tracker: ScheduleTracker = Depends(get_schedule_tracker),
+    logged_in_user: LoggedInUser = Depends(MANAGER_AUTH),
+) -> ScheduleDto:
+    """Project length in task units and the critical path, tasks left to do take one unit each."""
+    return ScheduleDto(length=schedule_tracker.length, critical_path=schedule_tracker.critical_path())
+
+
 @router.post(
     "/{task}",
     status_code=201,
@@ -87,7 +169,7 @@ async def create_task(
     new_status: TaskUpdateStatusDto = Body(...),
     pool: Pool = Depends(get_db_pool),
     task_repo: TaskRepo = Depends(get_task_repo),
-    event_store: EventStoreClient = Depends(get_event_store),
+    outbox: EventOutbox = Depends(get_event_outbox),
     logged_in_user: LoggedInUser = Depends(MINIMAL_AUTH),
 ) -> None:
     update_status = UpdateStatus(
@@ -96,7 +178,7 @@ async def create_task(
 
     await update_status.execute(
         pool=pool,
-        event_store=event_store,
+        outbox=outbox,
         task_repo=task_repo,
     )
 
@@ -110,32 +192,69 @@ async def update_task_dependencies(
     dependency_update: TaskDependencyUpdateDto = Body(...),
     pool: Pool = Depends(get_db_pool),
     task_repo: TaskRepo = Depends(get_task_repo),
-    event_store: EventStoreClient = Depends(get_event_store),
+    outbox: EventOutbox = Depends(get_event_outbox),
+    dependency_graph: DependencyGraph = Depends(get_dependency_graph),
     logged_in_user: LoggedInUser = Depends(MANAGER_AUTH),
 ) -> None:
+    update_dependencies = UpdateDependencies(
+        command_id=str(uuid4()),
+        principal_id=task,
+        add=dependency_update.add,
+        remove=dependency_update.remove,
+    )
 
-    for task in dependency_update.add:
-        add = AddDependency(
-            command_id=str(uuid4()),
-            principal_id=task,
-            task=task,
-        )
-
-        await add.execute(
+    try:
+        await update_dependencies.execute(
             pool=pool,
-            event_store=event_store,
+            outbox=outbox,
             task_repo=task_repo,
+            dependency_graph=dependency_graph,
         )
+    except DependencyCycleError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    for task in dependency_update.remove:
-        remove = RemoveDependency(
-            command_id=str(uuid4()),
-            principal_id=task,
-            task=task,
-        )
 
-        await remove.execute(
-            pool=pool,
-            event_store=event_store,
-            task_repo=task_repo,
-        )
+@router.get(
+    "/{task}/blockers",
+    response_model=list[str],
+)
+async def get_task_blockers(
+    task: str = Path(...),
+    dependency_graph: DependencyGraph = Depends(get_dependency_graph),
+    logged_in_user: LoggedInUser = Depends(MINIMAL_AUTH),
+) -> list[str]:
+    """Every task this task transitively waits for, dependencies first."""
+    return dependency_graph.topological_order(dependency_graph.blockers(task))
+
+
+@router.get(
+    "/{task}/dependents",
+    response_model=list[str],
+)
+async def get_task_dependents(
+    task: str = Path(...),
+    dependency_graph: DependencyGraph = Depends(get_dependency_graph),
+    logged_in_user: LoggedInUser = Depends(MINIMAL_AUTH),
+) -> list[str]:
+    """Every task transitively waiting for this task, dependencies first."""
+    return dependency_graph.topological_order(dependency_graph.dependents(task))
+
+
+@router.get(
+    "/{task}/schedule",
+    response_model=TaskScheduleDto,
+)
+async def get_task_schedule(
+    task: str = Path(...),
+    schedule_tracker: ScheduleTracker = Depends(get_schedule_tracker),
+    logged_in_user: LoggedInUser = Depends(MINIMAL_AUTH),
+) -> TaskScheduleDto:
+    earliest_start = schedule_tracker.earliest_start(task)
+    if earliest_start is None:
+        raise HTTPException(status_code=404, detail="Unknown task")
+
+    return TaskScheduleDto(
+        id=task,
+        earliest_start=earliest_start,
+        earliest_finish=schedule_tracker.earliest_finish(task),
+    )
@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from time import monotonic
+
+from power_plant_construction.api.api_config import get_api_config
+
+
+class UnreadCountCache:
+    """Bounded LRU of unread notification counts keyed by receiver.
+
+    The counts come from the notification_unread_counts table, an entry is dropped
+    whenever a notification event for its receiver goes by and expires `ttl` seconds
+    after being stored in case one was missed.
+
+    Every invalidation moves the receiver to a new generation, a count read from the
+    database is only stored if no invalidation happened while it was read. Generations
+    are kept for the `max_size` most recently invalidated receivers, the others share
+    the newest generation forgotten.
+    """
+
+    def __init__(self, *, max_size: int, ttl: float) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        self._invalidations = 0
+        self._generations: OrderedDict[str, int] = OrderedDict()
+        self._forgotten_generation = 0
+
+    def get(self, receiver: str) -> int | None:
+        entry = self._entries.get(receiver)
+        if entry is None or entry[0] < monotonic():
+            if entry is not None:
+                del self._entries[receiver]
+            return None
+
+        self._entries.move_to_end(receiver)
+        return entry[1]
+
+    def generation(self, receiver: str) -> int:
+        """To pass to `put` along with the count read after calling it."""
+        return self._generations.get(receiver, self._forgotten_generation)
+
+    def put(self, receiver: str, unread: int, *, generation: int | None = None) -> None:
+        if self._max_size <= 0 or (generation is not None and generation != self.generation(receiver)):
+            return
+
+        self._entries[receiver] = (monotonic() + self._ttl, unread)
+        self._entries.move_to_end(receiver)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, receiver: str) -> None:
+        self._entries.pop(receiver, None)
+
+        self._invalidations += 1
+        self._generations[receiver] = self._invalidations
+        self._generations.move_to_end(receiver)
+        while len(self._generations) > max(self._max_size, 1):
+            _, self._forgotten_generation = self._generations.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_UNREAD_COUNT_CACHE: UnreadCountCache | None = None
+
+
+def get_unread_count_cache() -> UnreadCountCache:
+    global _UNREAD_COUNT_CACHE  # pylint: disable=global-statement
+    if _UNREAD_COUNT_CACHE is None:
+        api_config = get_api_config()
+        _UNREAD_COUNT_CACHE = UnreadCountCache(
+            max_size=api_config.UNREAD_COUNT_CACHE_SIZE,
+            ttl=api_config.UNREAD_COUNT_CACHE_TTL,
+        )
+
+    return _UNREAD_COUNT_CACHE
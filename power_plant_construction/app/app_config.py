@@ -4,7 +4,6 @@ from pydantic import BaseSettings
 
 
 class AppConfig(BaseSettings):
-
     DB_NAME: str
     DB_HOSTS: str
     DB_PORT: str
@@ -12,6 +11,36 @@ class AppConfig(BaseSettings):
     DB_USER: str
 
     NATS_DSN: str = "nats://localhost:4222"
+    # json or msgpack (needs the msgpack extra), consumers read whichever format a message announces
+    EVENT_WIRE_FORMAT: str = "json"
+
+    # events handled at once, every one of them waits for its notification batch to be written,
+    # so this also bounds how large notification batches get
+    APP_MAX_CONCURRENCY: int = 256
+    APP_QUEUE_DEPTH: int = 1024
+
+    # replicas in the same queue group split the core NATS subscription's events between them,
+    # None gives every replica every event
+    APP_QUEUE_GROUP: str | None = "notifications"
+    # handled event ids are kept this many seconds to skip redeliveries, pruned every interval
+    PROCESSED_EVENTS_RETENTION: float = 7 * 24 * 3600
+    PROCESSED_EVENTS_PRUNE_INTERVAL: float = 3600
+
+    # notifications written per transaction, and how long a batch waits to fill up in seconds
+    NOTIFICATION_BATCH_SIZE: int = 200
+    NOTIFICATION_FLUSH_INTERVAL: float = 0.02
+
+    # consume through a durable JetStream consumer instead of a core NATS subscription
+    EVENT_STREAM: str | None = None
+    EVENT_STREAM_MAX_AGE: float | None = None
+    APP_CONSUMER_NAME: str = "notifications"
+    APP_FETCH_BATCH_SIZE: int = 256
+
+    # events replayed on top of the latest snapshot before a new one is taken, per aggregate type
+    SNAPSHOT_EVERY: dict[str, int] = {"Task": 100, "Notification": 100, "User": 100}
+
+    OUTBOX_BATCH_SIZE: int = 1000
+    OUTBOX_POLL_INTERVAL: float = 1.0
 
     class Config:
         env_file = os.environ.get("ENV_PATH")
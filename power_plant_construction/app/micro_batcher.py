@@ -0,0 +1,100 @@
+from typing import Awaitable, Callable, Generic, Type, TypeVar
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+T = TypeVar("T")
+
+
+class MicroBatcher(Generic[T]):
+    """Hands submitted items to `flush` together.
+
+    A batch is flushed once it holds `max_size` items or `max_delay` seconds after its
+    first item, whichever comes first. `submit` returns once the item's batch has been
+    flushed, or raises what flushing it raised. When a batch fails its items are flushed
+    again one by one, so one bad item doesn't fail the others, unless it failed with one
+    of `fatal_errors`: those say nothing about the items (the database is unreachable), so
+    every submitter of the batch gets the error right away.
+    """
+
+    def __init__(
+        self,
+        *,
+        flush: Callable[[list[T]], Awaitable[None]],
+        max_size: int,
+        max_delay: float,
+        fatal_errors: tuple[Type[Exception], ...] = (OSError, asyncio.TimeoutError),
+    ) -> None:
+        if max_size < 1 or max_delay < 0:
+            raise ValueError("'max_size' should be positive and 'max_delay' not negative")
+
+        self._flush = flush
+        self._max_size = max_size
+        self._max_delay = max_delay
+        self._fatal_errors = fatal_errors
+        self._pending: list[tuple[T, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self._max_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._max_delay, self._start_flush)
+
+        # a cancelled submitter doesn't take the rest of the batch down with it
+        await asyncio.shield(future)
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending
+        self._pending = []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future]]) -> None:
+        try:
+            await self._flush([item for item, _ in batch])
+        except self._fatal_errors as exc:
+            log.warning(f"Flushing a batch of {len(batch)} failed ({exc!r})")
+            for _, future in batch:
+                _settle(future, exc)
+        except Exception as exc:  # pylint: disable=broad-except
+            if len(batch) == 1:
+                _settle(batch[0][1], exc)
+                return
+
+            log.warning(f"Flushing a batch of {len(batch)} failed ({exc!r}), flushing its items one by one")
+            for entry in batch:
+                await self._run([entry])
+        else:
+            for _, future in batch:
+                _settle(future, None)
+        finally:
+            # a cancelled flush raises no Exception, its submitters are cancelled instead of left waiting
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+    async def close(self) -> None:
+        """Flushes what is pending and waits for every flush in progress."""
+        self._start_flush()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+def _settle(future: asyncio.Future, exc: Exception | None) -> None:
+    if future.done():
+        return
+    if exc is None:
+        future.set_result(None)
+    else:
+        future.set_exception(exc)
@@ -1,24 +1,62 @@
 from typing import Callable, Type
 from uuid import uuid4
+import asyncio
 import logging
 
-from asyncpg import Pool
+from asyncpg import InterfaceError, OperatorInterventionError, Pool, PostgresConnectionError
 
 from event_sourcing.entity import EntityEvent
-from event_sourcing.event_store_client import EventStoreClient
-from power_plant_construction.commands.notification.create import Create as NotificationCreate
+from power_plant_construction.app.micro_batcher import MicroBatcher
+from power_plant_construction.commands.notification.create import CreateMany, NewNotification
 from power_plant_construction.entities.task import TaskCreated, TaskStatusUpdated
 from power_plant_construction.repositories.notification import get_notification_repo
+from power_plant_construction.repositories.outbox import get_event_outbox
+from power_plant_construction.repositories.processed_events import get_processed_event_repo
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
+# a notification batch failing with one of those would fail item by item just the same
+DB_UNAVAILABLE_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    InterfaceError,
+    PostgresConnectionError,
+    OperatorInterventionError,
+)
+
 
 class NotificationService:
-    def __init__(self, event_store: EventStoreClient, db_pool: Pool) -> None:
-        self._event_store = event_store
+    """Creates notifications in response to task events.
+
+    Notifications are created in micro-batches of up to `batch_size`, waiting at most
+    `flush_interval` seconds for a batch to fill. The handlers return once their
+    notification is committed, so an event is only acknowledged once it is handled.
+
+    Events are handled at most once per `consumer`: the event ids are recorded with the
+    notifications, so replicas sharing the name skip events redelivered to or already
+    handled by another one.
+    """
+
+    def __init__(
+        self,
+        db_pool: Pool,
+        *,
+        consumer: str = "notifications",
+        batch_size: int = 1,
+        flush_interval: float = 0.0,
+    ) -> None:
         self._pool = db_pool
+        self._consumer = consumer
+        self._outbox = get_event_outbox()
         self.__notification_repo = get_notification_repo()
+        self.__processed_event_repo = get_processed_event_repo()
+        self._batcher: MicroBatcher[NewNotification] = MicroBatcher(
+            flush=self._create_notifications,
+            max_size=batch_size,
+            max_delay=flush_interval,
+            fatal_errors=DB_UNAVAILABLE_ERRORS,
+        )
         self._event_handlers: dict[Type, Callable] = {
             TaskCreated: self.handle_task_created,
             TaskStatusUpdated: self.handle_task_updated,
@@ -31,27 +69,45 @@ class NotificationService:
 
     async def handle_task_created(self, event: TaskCreated) -> None:
         log.info(f"Sending notification in response to task {event.title} being created")
-        notification_create = NotificationCreate(
-            command_id=str(uuid4()),
-            principal_id=str(uuid4()),
-            title=f"New task: {event.title}",
-            content=f"Please do the following task:\n----\n{event.description}",
-            receiver=event.assignee,
-        )
-        await notification_create.execute(
-            pool=self._pool, event_store=self._event_store, notification_repo=self.__notification_repo
+        await self._batcher.submit(
+            NewNotification(
+                entity_id=str(uuid4()),
+                title=f"New task: {event.title}",
+                content=f"Please do the following task:\n----\n{event.description}",
+                receiver=event.assignee,
+                source_event_id=str(event.event_id),
+            )
         )
 
     async def handle_task_updated(self, event: TaskStatusUpdated) -> None:
         log.info(f"Sending notification in response to task {event.entity_id} being completed")
+        await self._batcher.submit(
+            NewNotification(
+                entity_id=str(uuid4()),
+                title=f"Task: {event.entity_id} has been completed",
+                content="Please review the completed task",
+                receiver=event.author,
+                source_event_id=str(event.event_id),
+            )
+        )
 
-        notification_create = NotificationCreate(
+    async def _create_notifications(self, notifications: list[NewNotification]) -> None:
+        create_many = CreateMany(
             command_id=str(uuid4()),
             principal_id=str(uuid4()),
-            title=f"Task: {event.entity_id} has been completed",
-            content="Please review the completed task",
-            receiver=event.author,
+            notifications=notifications,
+            consumer=self._consumer,
         )
-        await notification_create.execute(
-            pool=self._pool, event_store=self._event_store, notification_repo=self.__notification_repo
+        await create_many.execute(
+            pool=self._pool,
+            outbox=self._outbox,
+            notification_repo=self.__notification_repo,
+            processed_event_repo=self.__processed_event_repo,
         )
+
+    async def prune_processed_events(self, older_than: float) -> int:
+        async with self._pool.acquire() as conn:
+            return await self.__processed_event_repo.prune(conn, older_than=older_than)
+
+    async def close(self) -> None:
+        await self._batcher.close()
@@ -0,0 +1,110 @@
+from typing import Any, Callable
+import asyncio
+import logging
+
+from asyncpg import Pool
+from asyncpg.pool import PoolConnectionProxy
+
+from event_sourcing.event_store_client import EventStoreClient
+from power_plant_construction.repositories.outbox import OUTBOX_CHANNEL, OUTBOX_RELAY_LOCK_KEY, EventOutbox
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class OutboxRelay:
+    """Streams committed outbox rows to the event store in batches.
+
+    A batch is deleted in the transaction that claimed it, only after it was flushed to
+    NATS, so any failure leads to the batch being published again (at-least-once).
+
+    Only one relay publishes at a time, so events go out in the order they were written:
+    every app replica starts one, the first to take the outbox advisory lock leads and
+    the others wait for the lock, taking over once the leader's connection is gone. A
+    leader whose lock connection drops stops relaying right away, possibly in the middle
+    of claiming a batch, and only relays again once it took the lock back.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool: Pool,
+        event_store: EventStoreClient,
+        outbox: EventOutbox,
+        batch_size: int,
+        poll_interval: float,
+    ) -> None:
+        self._pool = pool
+        self._event_store = event_store
+        self._outbox = outbox
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self._relay_while_leading()
+            except Exception:
+                log.exception("Stopped relaying the event outbox, waiting to take the outbox lock back")
+                await asyncio.sleep(self._poll_interval)
+
+    async def _relay_while_leading(self) -> None:
+        """Relays for as long as the connection holding the outbox lock stays open."""
+        wakeup = asyncio.Event()
+        leading = True
+
+        def on_notification(*_: Any) -> None:
+            wakeup.set()
+
+        def on_termination(*_: Any) -> None:
+            nonlocal leading
+            leading = False
+            wakeup.set()
+
+        async with self._pool.acquire() as listen_conn:
+            listen_conn.add_termination_listener(on_termination)
+            try:
+                await self._lead(listen_conn)
+                await listen_conn.add_listener(OUTBOX_CHANNEL, on_notification)
+                while leading:
+                    wakeup.clear()
+                    try:
+                        relayed = await self.relay_once(leading=lambda: leading)
+                    except Exception:
+                        log.exception("Failed to relay the event outbox")
+                        relayed = 0
+
+                    if relayed < self._batch_size and leading:
+                        try:
+                            await asyncio.wait_for(wakeup.wait(), timeout=self._poll_interval)
+                        except asyncio.TimeoutError:
+                            # an idle relay checks its lock connection is still there
+                            await listen_conn.execute("select 1")
+                raise ConnectionError("the outbox lock connection was closed")
+            finally:
+                listen_conn.remove_termination_listener(on_termination)
+                if not listen_conn.is_closed():
+                    await listen_conn.remove_listener(OUTBOX_CHANNEL, on_notification)
+                    await listen_conn.execute("select pg_advisory_unlock($1)", OUTBOX_RELAY_LOCK_KEY)
+
+    async def _lead(self, conn: PoolConnectionProxy) -> None:
+        """Waits until this relay holds the outbox lock, for as long as `conn` stays open."""
+        while not await conn.fetchval("select pg_try_advisory_lock($1)", OUTBOX_RELAY_LOCK_KEY):
+            await asyncio.sleep(self._poll_interval)
+        log.info("Relaying the event outbox")
+
+    async def relay_once(self, *, leading: Callable[[], bool] = lambda: True) -> int:
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                records = await self._outbox.claim(conn, limit=self._batch_size)
+                # a relay that lost the lock meanwhile leaves the batch to the next leader
+                if not records or not leading():
+                    return 0
+
+                await self._event_store.publish_serialized(
+                    [(record["subject"], record["payload"], record["content_type"]) for record in records],
+                    flush=True,
+                )
+                await self._outbox.delete(conn, ids=[record["id"] for record in records])
+
+        return len(records)
@@ -0,0 +1,388 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import perf_counter
+from typing import Any
+import asyncio
+import logging
+
+from asyncpg.pool import PoolConnectionProxy
+
+from contracts.schemas.notification import NotificationStatus
+from contracts.schemas.task import TaskStatus
+from event_sourcing.entity import EntityEvent
+from event_sourcing.event_store_client import EventStoreClient, EventStoreSubscription
+from power_plant_construction.entities.notification import NotificationCreated, NotificationStatusUpdated
+from power_plant_construction.entities.task import (
+    TaskCreated,
+    TaskDependencyAdded,
+    TaskDependencyRemoved,
+    TaskStatusUpdated,
+)
+from power_plant_construction.repositories.batch import insert_rows
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+PROJECTION_EVENT_TYPES: set[type[EntityEvent]] = {
+    TaskCreated,
+    TaskDependencyAdded,
+    TaskDependencyRemoved,
+    TaskStatusUpdated,
+    NotificationCreated,
+    NotificationStatusUpdated,
+}
+
+CHECKPOINT_NAME = "read_model"
+# how long the swap waits, holding its locks, for the relay to publish what was committed before them
+OUTBOX_DRAIN_TIMEOUT = 30.0
+OUTBOX_DRAIN_INTERVAL = 0.1
+
+TASK_COLUMNS = (
+    "entity_id",
+    "title",
+    "description",
+    "author",
+    "assignee",
+    "status",
+    "created_at",
+    "updated_at",
+    "version",
+)
+DEPENDENCY_COLUMNS = ("entity_id", "depends_on", "created_at", "updated_at")
+NOTIFICATION_COLUMNS = (
+    "entity_id",
+    "title",
+    "content",
+    "status",
+    "receiver",
+    "created_at",
+    "updated_at",
+    "version",
+)
+
+# the projection tables, each rebuilt into a `<table>_rebuild` shadow table
+PROJECTION_TABLES = ("tasks", "task_dependencies", "notifications")
+
+
+def shadow(table: str) -> str:
+    return f"{table}_rebuild"
+
+
+@dataclass
+class ProjectionChunk:
+    """The effect of a chunk of events on the read model, folded in memory.
+
+    Rows created within the chunk are complete and get copied. Rows created by an
+    earlier chunk get `[status or None, updated_at or None, events]`, their last status
+    and how many events moved their version. A dependency edge maps to when it was
+    added, or None when its last event removed it.
+    """
+
+    created_tasks: dict[str, list[Any]] = field(default_factory=dict)
+    task_updates: dict[str, list[Any]] = field(default_factory=dict)
+    dependencies: dict[tuple[str, str], datetime | None] = field(default_factory=dict)
+    created_notifications: dict[str, list[Any]] = field(default_factory=dict)
+    notification_updates: dict[str, list[Any]] = field(default_factory=dict)
+    events: int = 0
+    last_sequence: int = 0
+
+    def apply(self, event: EntityEvent, sequence: int) -> None:
+        self.events += 1
+        self.last_sequence = sequence
+        at = event.event_created_at
+
+        if isinstance(event, (TaskStatusUpdated, TaskDependencyAdded, TaskDependencyRemoved)):
+            status = event.status if isinstance(event, TaskStatusUpdated) else None
+            self._update(self.created_tasks, self.task_updates, event.entity_id, status, at, status_index=5)
+            if isinstance(event, TaskDependencyAdded):
+                self.dependencies[(event.entity_id, event.depends_on)] = at
+            elif isinstance(event, TaskDependencyRemoved):
+                self.dependencies[(event.entity_id, event.depends_on)] = None
+        elif isinstance(event, NotificationStatusUpdated):
+            self._update(
+                self.created_notifications,
+                self.notification_updates,
+                event.entity_id,
+                event.status,
+                at,
+                status_index=3,
+            )
+        elif isinstance(event, TaskCreated):
+            self.created_tasks[event.entity_id] = [
+                event.entity_id,
+                event.title,
+                event.description,
+                event.author,
+                event.assignee,
+                event.status,
+                at,
+                at,
+                1,
+            ]
+        elif isinstance(event, NotificationCreated):
+            self.created_notifications[event.entity_id] = [
+                event.entity_id,
+                event.title,
+                event.content,
+                event.status,
+                event.receiver,
+                at,
+                at,
+                1,
+            ]
+
+    @staticmethod
+    def _update(
+        created: dict[str, list[Any]],
+        updates: dict[str, list[Any]],
+        entity_id: str,
+        status: Any,
+        at: datetime,
+        *,
+        status_index: int,
+    ) -> None:
+        # the row layouts end with created_at, updated_at, version
+        row = created.get(entity_id)
+        if row is not None:
+            if status is not None:
+                row[status_index] = status
+                row[-2] = at
+            row[-1] += 1
+            return
+
+        update = updates.get(entity_id)
+        if update is None:
+            update = updates[entity_id] = [None, None, 0]
+        if status is not None:
+            update[0] = status
+            update[1] = at
+        update[2] += 1
+
+    async def flush(self, conn: PoolConnectionProxy) -> None:
+        await insert_rows(
+            conn,
+            shadow("tasks"),
+            columns=TASK_COLUMNS,
+            records=[tuple(row) for row in self.created_tasks.values()],
+        )
+        if self.task_updates:
+            await conn.executemany(
+                f"""update {shadow('tasks')}
+                    set
+                        status = coalesce($2::task_status_enum, status),
+                        updated_at = coalesce($3, updated_at),
+                        version = version + $4
+                    where entity_id=$1
+                """,
+                [(entity_id, *update) for entity_id, update in self.task_updates.items()],
+            )
+
+        # delete then insert, so an edge removed and added again within a chunk ends up added
+        if self.dependencies:
+            await conn.execute(
+                f"""delete from {shadow('task_dependencies')} d
+                    using unnest($1::text[], $2::text[]) as changed(entity_id, depends_on)
+                    where d.entity_id = changed.entity_id and d.depends_on = changed.depends_on
+                """,
+                [entity_id for entity_id, _ in self.dependencies],
+                [depends_on for _, depends_on in self.dependencies],
+            )
+            await insert_rows(
+                conn,
+                shadow("task_dependencies"),
+                columns=DEPENDENCY_COLUMNS,
+                records=[
+                    (entity_id, depends_on, at, at)
+                    for (entity_id, depends_on), at in self.dependencies.items()
+                    if at is not None
+                ],
+            )
+
+        await insert_rows(
+            conn,
+            shadow("notifications"),
+            columns=NOTIFICATION_COLUMNS,
+            records=[tuple(row) for row in self.created_notifications.values()],
+        )
+        if self.notification_updates:
+            await conn.executemany(
+                f"""update {shadow('notifications')}
+                    set
+                        status = coalesce($2::notification_status_enum, status),
+                        updated_at = coalesce($3, updated_at),
+                        version = version + $4
+                    where entity_id=$1
+                """,
+                [(entity_id, *update) for entity_id, update in self.notification_updates.items()],
+            )
+
+
+class ProjectionRebuilder:
+    """Replays the durable event log into shadow copies of the read model tables and swaps them in.
+
+    Every chunk of events is folded in memory and written to the shadow tables in one
+    transaction together with the stream sequence it reached, so an interrupted rebuild
+    resumes after the last written chunk. The swap replaces the live tables in one
+    transaction: it locks them against writes, waits for the outbox to be published and
+    replays what the stream got since the last chunk before renaming, so writes
+    committed during the rebuild are kept. Commands wait for the swap, reads go on until
+    the live tables are dropped.
+    """
+
+    def __init__(self, *, conn: PoolConnectionProxy, event_store: EventStoreClient, chunk_size: int) -> None:
+        self._conn = conn
+        self._event_store = event_store
+        self._chunk_size = chunk_size
+
+    async def run(self, *, restart: bool = False) -> tuple[int, float]:
+        """Returns how many events were replayed and how long it took."""
+        checkpoint = None if restart else await self._checkpoint()
+        if checkpoint is None:
+            await self._create_shadow_tables()
+            checkpoint = 0
+        else:
+            log.info(f"Resuming the rebuild after stream sequence {checkpoint}")
+
+        started = perf_counter()
+        replayed = 0
+        chunk = ProjectionChunk()
+        async for stored_event in self._event_store.replay(
+            EventStoreSubscription(event_class="entity"),
+            start_sequence=checkpoint + 1,
+            batch_size=min(self._chunk_size, 1000),
+        ):
+            chunk.apply(stored_event.event, stored_event.sequence)
+            if chunk.events >= self._chunk_size:
+                replayed += await self._write_chunk(chunk)
+                log.info(f"{replayed} events replayed, {replayed / (perf_counter() - started):.0f} events/s")
+                chunk = ProjectionChunk()
+
+        if chunk.events:
+            replayed += await self._write_chunk(chunk)
+
+        if replayed == 0 and checkpoint == 0:
+            raise ValueError("The event stream has no projection events, not replacing the read model")
+
+        await self._swap()
+        return replayed, perf_counter() - started
+
+    async def _checkpoint(self) -> int | None:
+        return await self._conn.fetchval(
+            "select sequence from projection_checkpoints where name=$1",
+            CHECKPOINT_NAME,
+        )
+
+    async def _write_chunk(self, chunk: ProjectionChunk) -> int:
+        async with self._conn.transaction():
+            await chunk.flush(self._conn)
+            await self._conn.execute(
+                """insert into projection_checkpoints (name, sequence) values ($1, $2)
+                    on conflict (name) do update
+                    set sequence = excluded.sequence, updated_at = (now() at time zone 'utc')
+                """,
+                CHECKPOINT_NAME,
+                chunk.last_sequence,
+            )
+        return chunk.events
+
+    async def _create_shadow_tables(self) -> None:
+        # no secondary indexes while loading, they are rebuilt once at the swap
+        async with self._conn.transaction():
+            for table in PROJECTION_TABLES:
+                primary_key = await self._primary_key(table)
+                await self._conn.execute(f"drop table if exists {shadow(table)}")
+                await self._conn.execute(f"create table {shadow(table)} (like {table} including defaults)")
+                await self._conn.execute(
+                    f"alter table {shadow(table)} add constraint {shadow(table)}_pkey "
+                    f"primary key ({', '.join(primary_key['columns'])})"
+                )
+            await self._conn.execute("delete from projection_checkpoints where name=$1", CHECKPOINT_NAME)
+
+    async def _primary_key(self, table: str) -> dict[str, Any]:
+        record = await self._conn.fetchrow(
+            """select c.conname as name, array_agg(a.attname order by k.ordinality) as columns
+                from pg_constraint c
+                cross join unnest(c.conkey) with ordinality as k(attnum, ordinality)
+                join pg_attribute a on a.attrelid = c.conrelid and a.attnum = k.attnum
+                where c.conrelid = $1::regclass and c.contype = 'p'
+                group by c.conname
+            """,
+            table,
+        )
+        return {"name": record["name"], "columns": list(record["columns"])}
+
+    async def _catch_up(self) -> int:
+        """Replays the events stored since the last chunk, once every committed write got to the stream."""
+        started = perf_counter()
+        while await self._conn.fetchval("select exists (select 1 from event_outbox)"):
+            if perf_counter() - started > OUTBOX_DRAIN_TIMEOUT:
+                raise TimeoutError(
+                    "The event outbox is not being published, is the app's outbox relay running?"
+                )
+            await asyncio.sleep(OUTBOX_DRAIN_INTERVAL)
+
+        chunk = ProjectionChunk()
+        async for stored_event in self._event_store.replay(
+            EventStoreSubscription(event_class="entity"),
+            start_sequence=(await self._checkpoint() or 0) + 1,
+            batch_size=min(self._chunk_size, 1000),
+        ):
+            chunk.apply(stored_event.event, stored_event.sequence)
+        if chunk.events:
+            await self._write_chunk(chunk)
+        return chunk.events
+
+    async def _swap(self) -> None:
+        started = perf_counter()
+        async with self._conn.transaction():
+            # no write gets to the live tables anymore, the stream ends with their last one once caught up
+            await self._conn.execute(
+                f"lock table {', '.join(PROJECTION_TABLES)}, notification_unread_counts in exclusive mode"
+            )
+            caught_up = await self._catch_up()
+
+            await self._conn.execute(
+                f"""update {shadow('tasks')} t
+                    set unfinished_dependencies = counts.unfinished
+                    from (
+                        select d.entity_id, count(*) as unfinished
+                        from {shadow('task_dependencies')} d
+                        left join {shadow('tasks')} dep on dep.entity_id = d.depends_on
+                        where dep.status is distinct from $1
+                        group by d.entity_id
+                    ) counts
+                    where t.entity_id = counts.entity_id
+                """,
+                TaskStatus.COMPLETED,
+            )
+
+            for table in PROJECTION_TABLES:
+                primary_key = await self._primary_key(table)
+                index_definitions = await self._conn.fetch(
+                    """select indexdef from pg_indexes
+                        where schemaname = current_schema() and tablename = $1 and indexname <> $2
+                    """,
+                    table,
+                    primary_key["name"],
+                )
+                await self._conn.execute(f"drop table {table}")
+                await self._conn.execute(f"alter table {shadow(table)} rename to {table}")
+                await self._conn.execute(
+                    f"alter table {table} rename constraint {shadow(table)}_pkey to {primary_key['name']}"
+                )
+                for record in index_definitions:
+                    await self._conn.execute(record["indexdef"])
+
+            await self._conn.execute("delete from notification_unread_counts")
+            await self._conn.execute(
+                """insert into notification_unread_counts (receiver, unread)
+                    select receiver, count(*) from notifications where status = $1 group by receiver
+                """,
+                NotificationStatus.UNREAD,
+            )
+
+            await self._conn.execute("delete from projection_checkpoints where name=$1", CHECKPOINT_NAME)
+        log.info(
+            f"Swapped the rebuilt tables in {perf_counter() - started:.1f}s, "
+            f"{caught_up} events written meanwhile caught up"
+        )
@@ -3,11 +3,16 @@ import logging
 
 from asyncpg import create_pool as create_db_pool
 
-from event_sourcing.event_store_client import EventStoreClient, EventStoreSubscription
+from event_sourcing.entity import EntityEvent
+from event_sourcing.event_store_client import EventStoreClient, EventStoreSubscription, StoredEvent
+from event_sourcing.wire import get_wire_format
 from power_plant_construction.app.app_config import AppConfig, get_app_config
 from power_plant_construction.app.notification_service import NotificationService
+from power_plant_construction.app.outbox_relay import OutboxRelay
+from power_plant_construction.app.worker_pool import PartitionedWorkerPool
 from power_plant_construction.db import env_to_dsn
 from power_plant_construction.entities.task import Task, TaskCreated, TaskStatusUpdated
+from power_plant_construction.repositories.outbox import get_event_outbox
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
@@ -26,29 +31,106 @@ async def run_app(app_config: AppConfig | None = None) -> None:
         name=app_config.DB_NAME,
     )
 
+    wire_format = get_wire_format(app_config.EVENT_WIRE_FORMAT)
+    get_event_outbox().wire_format = wire_format
     event_store = EventStoreClient(
         event_types={TaskCreated, TaskStatusUpdated},
         nats_dsn=app_config.NATS_DSN,
+        wire_format=wire_format,
+        stream=app_config.EVENT_STREAM,
+        stream_max_age=app_config.EVENT_STREAM_MAX_AGE,
     )
     log.info("Setting up db connection pool")
     db_pool = await create_db_pool(db_dsn, max_size=30)
     await event_store.connect()
 
-    subscription = EventStoreSubscription(event_class="entity", entity_type=Task)
+    subscription = EventStoreSubscription(
+        event_class="entity", entity_type=Task, queue_group=app_config.APP_QUEUE_GROUP
+    )
+
+    notification_service = NotificationService(
+        db_pool=db_pool,
+        consumer=app_config.APP_CONSUMER_NAME,
+        batch_size=app_config.NOTIFICATION_BATCH_SIZE,
+        flush_interval=app_config.NOTIFICATION_FLUSH_INTERVAL,
+    )
+
+    outbox_relay = OutboxRelay(
+        pool=db_pool,
+        event_store=event_store,
+        outbox=get_event_outbox(),
+        batch_size=app_config.OUTBOX_BATCH_SIZE,
+        poll_interval=app_config.OUTBOX_POLL_INTERVAL,
+    )
+    outbox_relay_task = asyncio.create_task(outbox_relay.run())
 
-    notification_service = NotificationService(event_store=event_store, db_pool=db_pool)
+    async def prune_processed_events() -> None:
+        while True:
+            await asyncio.sleep(app_config.PROCESSED_EVENTS_PRUNE_INTERVAL)
+            try:
+                pruned = await notification_service.prune_processed_events(
+                    app_config.PROCESSED_EVENTS_RETENTION
+                )
+            except Exception:
+                log.exception("Failed to prune processed events")
+            else:
+                log.info(f"Pruned {pruned} processed events")
+
+    prune_task = asyncio.create_task(prune_processed_events())
 
     log.info(f"Listening to event store subscriptions: {subscription.nats_channel}...")
 
-    async for event in event_store.subscribe(subscription):
+    async def handle_event(event: EntityEvent) -> bool:
         log.info(f"handling event: {event.entity_id}/{type(event).__name__}")
         try:
-            await asyncio.gather(
-                notification_service.handle_event(event),
-            )
+            await notification_service.handle_event(event)
         except Exception:
             log.exception(f"Failed to process event: {event.event_id}/{type(event).__name__}")
             log.info(f"Event dump: {event.source_dump}")
+            return False
+        return True
+
+    async def handle_stored_event(stored_event: StoredEvent) -> None:
+        # acked only once handled, a crash or failure gets the event redelivered
+        if await handle_event(stored_event.event):
+            await stored_event.ack()
+        else:
+            await stored_event.nak()
+
+    if event_store.is_durable:
+        stored_worker_pool: PartitionedWorkerPool[StoredEvent] = PartitionedWorkerPool(
+            handler=handle_stored_event,
+            concurrency=app_config.APP_MAX_CONCURRENCY,
+            queue_depth=app_config.APP_QUEUE_DEPTH,
+        )
+        stored_worker_pool.start()
+        async for stored_event in event_store.consume(
+            subscription,
+            durable=app_config.APP_CONSUMER_NAME,
+            batch_size=app_config.APP_FETCH_BATCH_SIZE,
+            # everything fetched or queued in the pool is in flight at once
+            max_ack_pending=app_config.APP_FETCH_BATCH_SIZE
+            + app_config.APP_QUEUE_DEPTH
+            + app_config.APP_MAX_CONCURRENCY,
+        ):
+            await stored_worker_pool.submit(stored_event.event.entity_id, stored_event)
+        await stored_worker_pool.close()
+    else:
+        worker_pool: PartitionedWorkerPool[EntityEvent] = PartitionedWorkerPool(
+            handler=handle_event,
+            concurrency=app_config.APP_MAX_CONCURRENCY,
+            queue_depth=app_config.APP_QUEUE_DEPTH,
+        )
+        worker_pool.start()
+        # a full worker pool holds the loop back and events wait in the subscription instead of being dropped,
+        # core NATS can't slow the publishers down
+        async for event in event_store.subscribe(subscription, pending_limit=None):
+            await worker_pool.submit(event.entity_id, event)
+        await worker_pool.close()
+
+    await notification_service.close()
+    outbox_relay_task.cancel()
+    prune_task.cancel()
 
     log.info("disconnecting..")
     await event_store.disconnect()
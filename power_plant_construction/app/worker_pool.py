@@ -0,0 +1,65 @@
+from typing import Awaitable, Callable, Generic, TypeVar
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+T = TypeVar("T")
+
+
+class PartitionedWorkerPool(Generic[T]):
+    """Runs `handler` on up to `concurrency` items at a time.
+
+    Items submitted with the same key land in the same partition and are handled in
+    submission order. At most `queue_depth` items wait across all partitions together:
+    `submit` only blocks once that many wait, whatever their keys, so a slow key holds
+    up the others only after its backlog took up the whole depth.
+    """
+
+    def __init__(
+        self,
+        *,
+        handler: Callable[[T], Awaitable[None]],
+        concurrency: int,
+        queue_depth: int,
+    ) -> None:
+        if concurrency < 1 or queue_depth < 1:
+            raise ValueError("'concurrency' and 'queue_depth' should be positive")
+
+        self._handler = handler
+        self._queues: list[asyncio.Queue[T]] = [asyncio.Queue() for _ in range(concurrency)]
+        # free places for waiting items, shared by the partitions
+        self._slots = asyncio.Semaphore(queue_depth)
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._workers:
+            raise AssertionError()
+
+        self._workers = [asyncio.create_task(self._work(queue)) for queue in self._queues]
+
+    async def submit(self, key: str, item: T) -> None:
+        await self._slots.acquire()
+        self._queues[hash(key) % len(self._queues)].put_nowait(item)
+
+    async def close(self) -> None:
+        for queue in self._queues:
+            await queue.join()
+
+        workers = self._workers
+        self._workers = []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _work(self, queue: "asyncio.Queue[T]") -> None:
+        while True:
+            item = await queue.get()
+            self._slots.release()
+            try:
+                await self._handler(item)
+            except Exception:
+                log.exception("Worker handler failed")
+            finally:
+                queue.task_done()
@@ -1,11 +1,13 @@
+from dataclasses import dataclass
 from datetime import datetime
 
 from asyncpg import Pool
 
-from event_sourcing.entity import Command
-from event_sourcing.event_store_client import EventStoreClient
+from event_sourcing.entity import Command, EntityEvent
 from power_plant_construction.entities.notification import Notification
 from power_plant_construction.repositories.notification import NotificationRepo
+from power_plant_construction.repositories.outbox import EventOutbox
+from power_plant_construction.repositories.processed_events import ProcessedEventRepo
 
 
 class NotificationCreationFailed(Exception):
@@ -32,10 +34,10 @@ class Create(Command):
         self,
         *,
         pool: Pool,
-        event_store: EventStoreClient,
+        outbox: EventOutbox,
         notification_repo: NotificationRepo,
     ) -> None:
-        async with pool.acquire() as conn:
+        async with pool.acquire() as conn, conn.transaction():
             notification = Notification.new(
                 entity_id=self._principal_id,
                 title=self._title,
@@ -44,5 +46,76 @@ class Create(Command):
             )
             batch = notification.drain()
             await notification_repo.persist(conn, batch)
+            await outbox.enqueue(conn, batch)
 
-            await event_store.publish_batch(batch)
+
+@dataclass(frozen=True)
+class NewNotification:
+    entity_id: str
+    title: str
+    content: str
+    receiver: str
+    # the event the notification answers, at most one notification is created per event and consumer
+    source_event_id: str | None = None
+
+
+class CreateMany(Command):
+    """Creates several notifications in one transaction, persisted and enqueued as one batch.
+
+    With a `consumer`, the source events of the notifications are claimed for it in the
+    same transaction and notifications answering an already claimed event are skipped.
+    """
+
+    def __init__(
+        self,
+        *,
+        command_id: str,
+        principal_id: str,
+        notifications: list[NewNotification],
+        consumer: str | None = None,
+        created_at: datetime | None = None,
+    ) -> None:
+        super().__init__(principal_id=principal_id, command_id=command_id, created_at=created_at)
+        self._notifications = notifications
+        self._consumer = consumer
+
+    async def execute(
+        self,
+        *,
+        pool: Pool,
+        outbox: EventOutbox,
+        notification_repo: NotificationRepo,
+        processed_event_repo: ProcessedEventRepo | None = None,
+    ) -> None:
+        async with pool.acquire() as conn, conn.transaction():
+            notifications = self._notifications
+            if self._consumer is not None and processed_event_repo is not None:
+                claimed = await processed_event_repo.claim(
+                    conn,
+                    consumer=self._consumer,
+                    event_ids=[n.source_event_id for n in notifications if n.source_event_id is not None],
+                )
+                notifications = [n for n in notifications if n.source_event_id is None or _take(claimed, n)]
+                if not notifications:
+                    return
+
+            batch: list[EntityEvent] = []
+            for new_notification in notifications:
+                notification = Notification.new(
+                    entity_id=new_notification.entity_id,
+                    title=new_notification.title,
+                    content=new_notification.content,
+                    receiver=new_notification.receiver,
+                )
+                batch.extend(notification.drain())
+
+            await notification_repo.persist(conn, batch)
+            await outbox.enqueue(conn, batch)
+
+
+def _take(claimed: set[str], notification: NewNotification) -> bool:
+    # an event submitted twice in one batch is claimed once, only its first notification is kept
+    if notification.source_event_id in claimed:
+        claimed.discard(notification.source_event_id)
+        return True
+    return False
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from asyncpg import Pool
+
+from event_sourcing.entity import Command, EntityEvent
+from power_plant_construction.repositories.notification import NotificationRepo
+from power_plant_construction.repositories.outbox import EventOutbox
+
+
+class MarkAllRead(Command):
+    """Marks every unread notification of the principal read in one statement and one outbox batch."""
+
+    def __init__(self, *, command_id: str, principal_id: str, created_at: datetime | None = None) -> None:
+        super().__init__(
+            principal_id=principal_id,
+            command_id=command_id,
+            created_at=created_at,
+        )
+
+    async def execute(self, *, pool: Pool, outbox: EventOutbox, notification_repo: NotificationRepo) -> int:
+        """Returns how many notifications were marked read."""
+        async with pool.acquire() as conn, conn.transaction():
+            batch: list[EntityEvent] = list(await notification_repo.mark_all_read(conn, self.principal_id))
+            await outbox.enqueue(conn, batch)
+
+        return len(batch)
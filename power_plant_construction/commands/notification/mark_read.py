@@ -3,8 +3,9 @@ from datetime import datetime
 from asyncpg import Pool
 
 from event_sourcing.entity import Command
-from event_sourcing.event_store_client import EventStoreClient
+from power_plant_construction.commands.retry import retry_on_conflict
 from power_plant_construction.repositories.notification import NotificationRepo
+from power_plant_construction.repositories.outbox import EventOutbox
 
 
 class NotificationNotFoundError(Exception):
@@ -26,10 +27,9 @@ class MarkRead(Command):
         )
         self._receiver = receiver
 
-    async def execute(
-        self, *, pool: Pool, event_store: EventStoreClient, notification_repo: NotificationRepo
-    ) -> None:
-        async with pool.acquire() as conn:
+    @retry_on_conflict
+    async def execute(self, *, pool: Pool, outbox: EventOutbox, notification_repo: NotificationRepo) -> None:
+        async with pool.acquire() as conn, conn.transaction():
             notification = await notification_repo.fetch_by_id(conn, entity_id=self._principal_id)
             if not notification:
                 raise NotificationNotFoundError()
@@ -38,5 +38,4 @@ class MarkRead(Command):
             notification.mark_read()
             batch = notification.drain()
             await notification_repo.persist(conn, batch)
-
-            await event_store.publish_batch(batch)
+            await outbox.enqueue(conn, batch)
@@ -0,0 +1,17 @@
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+from power_plant_construction.repositories.batch import ConcurrencyConflict
+
+CONFLICT_ATTEMPTS = 5
+# how long a dependency write checked against an outdated graph waits for the newer
+# changes to arrive before its retry
+GRAPH_CATCH_UP_TIMEOUT = 1.0
+
+# commands reading an entity and writing its events run again from the read when
+# another writer got in between, with a short jittered backoff so retries spread out
+retry_on_conflict = retry(
+    retry=retry_if_exception_type(ConcurrencyConflict),
+    stop=stop_after_attempt(CONFLICT_ATTEMPTS),
+    wait=wait_random_exponential(multiplier=0.005, max=0.1),
+    reraise=True,
+)
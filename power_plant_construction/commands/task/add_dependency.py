@@ -2,9 +2,11 @@ from datetime import datetime
 
 from asyncpg import Pool
 
-from event_sourcing.entity import Command
-from event_sourcing.event_store_client import EventStoreClient
-from power_plant_construction.repositories.task import TaskRepo
+from event_sourcing.entity import Command, EntityEvent
+from power_plant_construction.commands.retry import GRAPH_CATCH_UP_TIMEOUT, retry_on_conflict
+from power_plant_construction.planning.dependency_graph import DependencyGraph
+from power_plant_construction.repositories.outbox import EventOutbox
+from power_plant_construction.repositories.task import StaleDependencyGraph, TaskRepo
 
 
 class TaskNotFoundError(Exception):
@@ -26,17 +28,33 @@ class AddDependency(Command):
         )
         self._task_id_to_be_added = task
 
-    async def execute(self, *, pool: Pool, event_store: EventStoreClient, task_repo: TaskRepo) -> None:
-        async with pool.acquire() as conn:
-            task = await task_repo.fetch_by_id(
-                conn=conn,
-                entity_id=self.principal_id,
-            )
+    @retry_on_conflict
+    async def execute(
+        self, *, pool: Pool, outbox: EventOutbox, task_repo: TaskRepo, dependency_graph: DependencyGraph
+    ) -> None:
+        try:
+            # reserved before the first await, raises DependencyCycleError if it would close a cycle
+            with dependency_graph.reserve(self.principal_id, [self._task_id_to_be_added]):
+                batch = await self._add_dependency(
+                    pool=pool, outbox=outbox, task_repo=task_repo, graph_version=dependency_graph.version
+                )
+        except StaleDependencyGraph as exc:
+            # checked against a graph missing another process' changes, retried once they are here
+            await dependency_graph.wait_for(exc.version, timeout=GRAPH_CATCH_UP_TIMEOUT)
+            raise
+
+        dependency_graph.apply_batch(batch)
 
-            task_to_be_added = await task_repo.fetch_by_id(
+    async def _add_dependency(
+        self, *, pool: Pool, outbox: EventOutbox, task_repo: TaskRepo, graph_version: int
+    ) -> list[EntityEvent]:
+        async with pool.acquire() as conn, conn.transaction():
+            tasks = await task_repo.fetch_many_by_ids(
                 conn=conn,
-                entity_id=self._task_id_to_be_added,
+                entity_ids=(self.principal_id, self._task_id_to_be_added),
             )
+            task = tasks.get(self.principal_id)
+            task_to_be_added = tasks.get(self._task_id_to_be_added)
 
             if task is None or task_to_be_added is None:
                 raise TaskNotFoundError()
@@ -48,5 +66,7 @@ class AddDependency(Command):
 
             batch = task.drain()
             await task_repo.persist(conn, batch)
+            await task_repo.version_dependencies(conn, batch, expected=graph_version)
+            await outbox.enqueue(conn, batch)
 
-            await event_store.publish_batch(batch)
+        return batch
@@ -3,8 +3,8 @@ from datetime import datetime
 from asyncpg import Pool
 
 from event_sourcing.entity import Command
-from event_sourcing.event_store_client import EventStoreClient
 from power_plant_construction.entities.task import Task
+from power_plant_construction.repositories.outbox import EventOutbox
 from power_plant_construction.repositories.task import TaskRepo
 
 
@@ -30,8 +30,8 @@ class Create(Command):
         self._assignee = assignee
         self._author = author
 
-    async def execute(self, *, pool: Pool, event_store: EventStoreClient, task_repo: TaskRepo) -> None:
-        async with pool.acquire() as conn:
+    async def execute(self, *, pool: Pool, outbox: EventOutbox, task_repo: TaskRepo) -> None:
+        async with pool.acquire() as conn, conn.transaction():
             task = Task.new(
                 entity_id=self._principal_id,
                 title=self._title,
@@ -41,5 +41,4 @@ class Create(Command):
             )
             batch = task.drain()
             await task_repo.persist(conn, batch)
-
-            await event_store.publish_batch(batch)
+            await outbox.enqueue(conn, batch)
@@ -0,0 +1,122 @@
+from datetime import datetime
+from uuid import uuid4
+
+from asyncpg import Pool
+
+from contracts.schemas.task import TaskGraphNodeDto
+from event_sourcing.entity import Command, EntityEvent
+from power_plant_construction.entities.task import Task, TaskCreated
+from power_plant_construction.planning.dependency_graph import DependencyGraph
+from power_plant_construction.repositories.outbox import EventOutbox
+from power_plant_construction.repositories.task import TaskRepo
+
+MAX_GRAPH_SIZE = 10_000
+
+
+class InvalidTaskGraph(Exception):
+    pass
+
+
+class CreateGraph(Command):
+    """Creates a whole graph of tasks at once.
+
+    Tasks reference each other by their `ref`, and may also depend on existing tasks
+    by id. The graph is validated in memory and persisted with a single batch.
+    """
+
+    def __init__(
+        self,
+        *,
+        command_id: str,
+        principal_id: str,
+        tasks: list[TaskGraphNodeDto],
+        author: str,
+        created_at: datetime | None = None,
+    ) -> None:
+        super().__init__(
+            principal_id=principal_id,
+            command_id=command_id,
+            created_at=created_at,
+        )
+        self._tasks = tasks
+        self._author = author
+
+    def _validate(self) -> None:
+        if len(self._tasks) > MAX_GRAPH_SIZE:
+            raise InvalidTaskGraph(f"At most {MAX_GRAPH_SIZE} tasks can be created at once")
+
+        refs = set()
+        for node in self._tasks:
+            if node.ref in refs:
+                raise InvalidTaskGraph(f"Duplicate task ref: {node.ref}")
+            refs.add(node.ref)
+
+        # Kahn's algorithm over the new tasks, existing tasks can't depend on them so
+        # a cycle can only go through new tasks
+        dependents: dict[str, list[str]] = {ref: [] for ref in refs}
+        blocking: dict[str, int] = {}
+        for node in self._tasks:
+            if len(set(node.depends_on)) != len(node.depends_on):
+                raise InvalidTaskGraph(f"Duplicate dependency of task ref: {node.ref}")
+            new_dependencies = [ref for ref in node.depends_on if ref in refs]
+            blocking[node.ref] = len(new_dependencies)
+            for ref in new_dependencies:
+                dependents[ref].append(node.ref)
+
+        ready = [ref for ref, count in blocking.items() if count == 0]
+        ordered = 0
+        while ready:
+            ref = ready.pop()
+            ordered += 1
+            for dependent in dependents[ref]:
+                blocking[dependent] -= 1
+                if blocking[dependent] == 0:
+                    ready.append(dependent)
+
+        if ordered != len(refs):
+            cyclic = sorted(ref for ref, count in blocking.items() if count > 0)
+            raise InvalidTaskGraph(f"Dependency cycle between task refs: {', '.join(cyclic[:10])}")
+
+    async def execute(
+        self, *, pool: Pool, outbox: EventOutbox, task_repo: TaskRepo, dependency_graph: DependencyGraph
+    ) -> dict[str, str]:
+        """Returns the ids of the created tasks by ref."""
+        self._validate()
+
+        ids = {node.ref: str(uuid4()) for node in self._tasks}
+        existing_dependencies = {
+            dependency for node in self._tasks for dependency in node.depends_on if dependency not in ids
+        }
+
+        async with pool.acquire() as conn, conn.transaction():
+            if existing_dependencies:
+                found = await task_repo.fetch_existing_ids(conn, entity_ids=existing_dependencies)
+                missing = existing_dependencies - found
+                if missing:
+                    raise InvalidTaskGraph(f"Unknown tasks: {', '.join(sorted(missing)[:10])}")
+
+            created: list[EntityEvent] = []
+            dependencies: list[EntityEvent] = []
+            for node in self._tasks:
+                task = Task.new(
+                    entity_id=ids[node.ref],
+                    title=node.title,
+                    description=node.description,
+                    assignee=node.assignee,
+                    author=self._author,
+                )
+                for dependency in node.depends_on:
+                    task.add_dependency(task=ids.get(dependency, dependency))
+
+                for event in task.drain():
+                    (created if isinstance(event, TaskCreated) else dependencies).append(event)
+
+            # all creations first, the persister writes every run of same typed events at once
+            batch = created + dependencies
+            await task_repo.persist(conn, batch)
+            # new tasks can't close a cycle with existing ones, no need to check against the graph's version
+            await task_repo.version_dependencies(conn, batch)
+            await outbox.enqueue(conn, batch)
+
+        dependency_graph.apply_batch(batch)
+        return ids
@@ -3,7 +3,8 @@ from datetime import datetime
 from asyncpg import Pool
 
 from event_sourcing.entity import Command
-from event_sourcing.event_store_client import EventStoreClient
+from power_plant_construction.commands.retry import retry_on_conflict
+from power_plant_construction.repositories.outbox import EventOutbox
 from power_plant_construction.repositories.task import TaskRepo
 
 
@@ -26,17 +27,15 @@ class RemoveDependency(Command):
         )
         self._task_id_to_be_removed = task
 
-    async def execute(self, *, pool: Pool, event_store: EventStoreClient, task_repo: TaskRepo) -> None:
-        async with pool.acquire() as conn:
-            task = await task_repo.fetch_by_id(
+    @retry_on_conflict
+    async def execute(self, *, pool: Pool, outbox: EventOutbox, task_repo: TaskRepo) -> None:
+        async with pool.acquire() as conn, conn.transaction():
+            tasks = await task_repo.fetch_many_by_ids(
                 conn=conn,
-                entity_id=self.principal_id,
-            )
-
-            task_to_be_removed = await task_repo.fetch_by_id(
-                conn=conn,
-                entity_id=self._task_id_to_be_removed,
+                entity_ids=(self.principal_id, self._task_id_to_be_removed),
             )
+            task = tasks.get(self.principal_id)
+            task_to_be_removed = tasks.get(self._task_id_to_be_removed)
 
             if task is None or task_to_be_removed is None:
                 raise TaskNotFoundError()
@@ -48,5 +47,5 @@ class RemoveDependency(Command):
 
             batch = task.drain()
             await task_repo.persist(conn, batch)
-
-            await event_store.publish_batch(batch)
+            await task_repo.version_dependencies(conn, batch)
+            await outbox.enqueue(conn, batch)
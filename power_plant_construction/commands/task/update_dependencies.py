@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from asyncpg import Pool
+
+from event_sourcing.entity import Command, EntityEvent
+from power_plant_construction.commands.retry import GRAPH_CATCH_UP_TIMEOUT, retry_on_conflict
+from power_plant_construction.commands.task.add_dependency import DependencyDuplicateError, TaskNotFoundError
+from power_plant_construction.commands.task.remove_dependency import DependencyNotFoundError
+from power_plant_construction.planning.dependency_graph import DependencyGraph
+from power_plant_construction.repositories.outbox import EventOutbox
+from power_plant_construction.repositories.task import StaleDependencyGraph, TaskRepo
+
+
+class UpdateDependencies(Command):
+    """Adds and removes several dependencies of a task in one transaction."""
+
+    def __init__(
+        self,
+        *,
+        command_id: str,
+        principal_id: str,
+        add: list[str],
+        remove: list[str],
+        created_at: datetime | None = None,
+    ) -> None:
+        super().__init__(
+            principal_id=principal_id,
+            command_id=command_id,
+            created_at=created_at,
+        )
+        self._add = add
+        self._remove = remove
+
+    @retry_on_conflict
+    async def execute(
+        self, *, pool: Pool, outbox: EventOutbox, task_repo: TaskRepo, dependency_graph: DependencyGraph
+    ) -> None:
+        try:
+            # reserved before the first await, raises DependencyCycleError if one would close a cycle
+            with dependency_graph.reserve(self.principal_id, self._add):
+                batch = await self._update_dependencies(
+                    pool=pool, outbox=outbox, task_repo=task_repo, graph_version=dependency_graph.version
+                )
+        except StaleDependencyGraph as exc:
+            # checked against a graph missing another process' changes, retried once they are here
+            await dependency_graph.wait_for(exc.version, timeout=GRAPH_CATCH_UP_TIMEOUT)
+            raise
+
+        dependency_graph.apply_batch(batch)
+
+    async def _update_dependencies(
+        self, *, pool: Pool, outbox: EventOutbox, task_repo: TaskRepo, graph_version: int
+    ) -> list[EntityEvent]:
+        async with pool.acquire() as conn, conn.transaction():
+            tasks = await task_repo.fetch_many_by_ids(
+                conn=conn,
+                entity_ids=(self.principal_id, *self._add, *self._remove),
+            )
+            task = tasks.get(self.principal_id)
+            if task is None or any(dependency not in tasks for dependency in (*self._add, *self._remove)):
+                raise TaskNotFoundError()
+
+            for dependency in self._remove:
+                if dependency not in task.depends_on:
+                    raise DependencyNotFoundError()
+                task.remove_dependency(task=dependency)
+
+            for dependency in self._add:
+                if dependency in task.depends_on:
+                    raise DependencyDuplicateError()
+                task.add_dependency(task=dependency)
+
+            batch = task.drain()
+            if batch:
+                await task_repo.persist(conn, batch)
+                # only added dependencies were checked against the graph, removals can't close a cycle
+                await task_repo.version_dependencies(
+                    conn, batch, expected=graph_version if self._add else None
+                )
+                await outbox.enqueue(conn, batch)
+
+        return batch
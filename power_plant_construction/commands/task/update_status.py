@@ -4,7 +4,8 @@ from asyncpg import Pool
 
 from contracts.schemas.task import TaskStatus
 from event_sourcing.entity import Command
-from event_sourcing.event_store_client import EventStoreClient
+from power_plant_construction.commands.retry import retry_on_conflict
+from power_plant_construction.repositories.outbox import EventOutbox
 from power_plant_construction.repositories.task import TaskRepo
 
 
@@ -34,8 +35,9 @@ class UpdateStatus(Command):
         self._status = status
         self._submitted_by = submitted_by
 
-    async def execute(self, *, pool: Pool, event_store: EventStoreClient, task_repo: TaskRepo) -> None:
-        async with pool.acquire() as conn:
+    @retry_on_conflict
+    async def execute(self, *, pool: Pool, outbox: EventOutbox, task_repo: TaskRepo) -> None:
+        async with pool.acquire() as conn, conn.transaction():
             task = await task_repo.fetch_by_id(
                 conn=conn,
                 entity_id=self.principal_id,
@@ -55,5 +57,4 @@ class UpdateStatus(Command):
 
             batch = task.drain()
             await task_repo.persist(conn, batch)
-
-            await event_store.publish_batch(batch)
+            await outbox.enqueue(conn, batch)
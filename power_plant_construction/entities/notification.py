@@ -1,11 +1,12 @@
 from datetime import datetime
-from typing import Any, Union
+from typing import Any, Mapping, Union
 
 from contracts.schemas.notification import NotificationStatus
-from event_sourcing.entity import Entity, EntityEvent
+from event_sourcing.entity import Entity, EntityEvent, from_isoformat, to_isoformat
 
 
 class NotificationCreated(EntityEvent):
+    __slots__ = ("_title", "_content", "_status", "_receiver")
     __entity_type__ = "Notification"
 
     def __init__(
@@ -51,6 +52,7 @@ class NotificationCreated(EntityEvent):
 
 
 class NotificationStatusUpdated(EntityEvent):
+    __slots__ = ("_status", "_receiver")
     __entity_type__ = "Notification"
 
     def __init__(
@@ -58,23 +60,32 @@ class NotificationStatusUpdated(EntityEvent):
         *,
         entity_id: str,
         status: NotificationStatus,
+        receiver: str | None = None,
         event_created_at: datetime | None = None,
         published_at: datetime | None = None,
     ) -> None:
         super().__init__(event_created_at=event_created_at, published_at=published_at, entity_id=entity_id)
         self._status = status
+        self._receiver = receiver
 
     def body(self) -> dict[str, Any]:
         return {
             "status": self._status,
+            "receiver": self._receiver,
         }
 
     @property
     def status(self) -> NotificationStatus:
         return self._status
 
+    @property
+    def receiver(self) -> str | None:
+        """Who the notification is for, None on events recorded before it was carried."""
+        return self._receiver
+
 
 class Notification(Entity):
+    __slots__ = ("_title", "_content", "_status", "_receiver")
     AGGREGATE_EVENT_TYPES = Union[NotificationCreated, NotificationStatusUpdated]
 
     def __init__(
@@ -87,8 +98,9 @@ class Notification(Entity):
         receiver: str,
         created_at: datetime | None = None,
         updated_at: datetime | None = None,
+        version: int = 0,
     ) -> None:
-        super().__init__(entity_id=entity_id, created_at=created_at, updated_at=updated_at)
+        super().__init__(entity_id=entity_id, created_at=created_at, updated_at=updated_at, version=version)
         self._title = title
         self._content = content
         self._status = status
@@ -96,10 +108,11 @@ class Notification(Entity):
 
     def mark_read(self) -> None:
         self._status = NotificationStatus.READ
-        self._batch.append(
+        self._record(
             NotificationStatusUpdated(
                 entity_id=self.entity_id,
                 status=self._status,
+                receiver=self._receiver,
             )
         )
 
@@ -119,6 +132,48 @@ class Notification(Entity):
     def receiver(self) -> str:
         return self._receiver
 
+    def _apply(self, event: EntityEvent) -> None:
+        if isinstance(event, NotificationStatusUpdated):
+            self._status = event.status
+        else:
+            raise AssertionError(f"Unexpected event type: {type(event).__name__}")
+
+    @classmethod
+    def from_created(cls, event: NotificationCreated) -> "Notification":
+        return Notification(
+            entity_id=event.entity_id,
+            title=event.title,
+            content=event.content,
+            status=event.status,
+            receiver=event.receiver,
+            created_at=event.event_created_at,
+            updated_at=event.event_created_at,
+            version=1,
+        )
+
+    def to_snapshot(self) -> dict[str, Any]:
+        return {
+            "title": self._title,
+            "content": self._content,
+            "status": self._status,
+            "receiver": self._receiver,
+            "created_at": to_isoformat(self._created_at),
+            "updated_at": to_isoformat(self._updated_at),
+        }
+
+    @classmethod
+    def from_snapshot(cls, *, entity_id: str, version: int, state: Mapping[str, Any]) -> "Notification":
+        return Notification(
+            entity_id=entity_id,
+            title=state["title"],
+            content=state["content"],
+            status=NotificationStatus(state["status"]),
+            receiver=state["receiver"],
+            created_at=from_isoformat(state["created_at"]),
+            updated_at=from_isoformat(state["updated_at"]),
+            version=version,
+        )
+
     @classmethod
     def new(
         cls,
@@ -135,7 +190,7 @@ class Notification(Entity):
             status=NotificationStatus.UNREAD,
             receiver=receiver,
         )
-        notification._batch.append(
+        notification._record(
             NotificationCreated(
                 entity_id=entity_id,
                 title=title,
@@ -1,11 +1,12 @@
 from datetime import datetime
-from typing import Any, Union
+from typing import Any, Mapping, Union
 
 from contracts.schemas.task import TaskStatus
-from event_sourcing.entity import Entity, EntityEvent
+from event_sourcing.entity import Entity, EntityEvent, from_isoformat, to_isoformat
 
 
 class TaskCreated(EntityEvent):
+    __slots__ = ("_title", "_description", "_status", "_assignee", "_author")
     __entity_type__ = "Task"
 
     def __init__(
@@ -58,6 +59,7 @@ class TaskCreated(EntityEvent):
 
 
 class TaskDependencyAdded(EntityEvent):
+    __slots__ = ("_depends_on", "_graph_version")
     __entity_type__ = "Task"
 
     def __init__(
@@ -65,21 +67,33 @@ class TaskDependencyAdded(EntityEvent):
         *,
         entity_id: str,
         depends_on: str,
+        graph_version: int | None = None,
         event_created_at: datetime | None = None,
         published_at: datetime | None = None,
     ) -> None:
         super().__init__(event_created_at=event_created_at, published_at=published_at, entity_id=entity_id)
         self._depends_on = depends_on
+        self._graph_version = graph_version
 
     def body(self) -> dict[str, Any]:
-        return {"depends_on": self._depends_on}
+        return {"depends_on": self._depends_on, "graph_version": self._graph_version}
 
     @property
     def depends_on(self) -> str:
         return self._depends_on
 
+    @property
+    def graph_version(self) -> int | None:
+        """The dependency graph version the event's transaction committed, None in older events."""
+        return self._graph_version
+
+    @graph_version.setter
+    def graph_version(self, value: int) -> None:
+        self._graph_version = value
+
 
 class TaskDependencyRemoved(EntityEvent):
+    __slots__ = ("_depends_on", "_graph_version")
     __entity_type__ = "Task"
 
     def __init__(
@@ -87,21 +101,33 @@ class TaskDependencyRemoved(EntityEvent):
         *,
         entity_id: str,
         depends_on: str,
+        graph_version: int | None = None,
         event_created_at: datetime | None = None,
         published_at: datetime | None = None,
     ) -> None:
         super().__init__(event_created_at=event_created_at, published_at=published_at, entity_id=entity_id)
         self._depends_on = depends_on
+        self._graph_version = graph_version
 
     def body(self) -> dict[str, Any]:
-        return {"depends_on": self._depends_on}
+        return {"depends_on": self._depends_on, "graph_version": self._graph_version}
 
     @property
     def depends_on(self) -> str:
         return self._depends_on
 
+    @property
+    def graph_version(self) -> int | None:
+        """The dependency graph version the event's transaction committed, None in older events."""
+        return self._graph_version
+
+    @graph_version.setter
+    def graph_version(self, value: int) -> None:
+        self._graph_version = value
+
 
 class TaskStatusUpdated(EntityEvent):
+    __slots__ = ("_status", "_author")
     __entity_type__ = "Task"
 
     def __init__(
@@ -133,6 +159,7 @@ class TaskStatusUpdated(EntityEvent):
 
 
 class Task(Entity):
+    __slots__ = ("_title", "_description", "_status", "_assignee", "_author", "_depends_on")
     AGGREGATE_EVENT_TYPES = Union[TaskCreated, TaskStatusUpdated, TaskDependencyAdded, TaskDependencyRemoved]
 
     def __init__(
@@ -147,8 +174,9 @@ class Task(Entity):
         author: str,
         created_at: datetime | None = None,
         updated_at: datetime | None = None,
+        version: int = 0,
     ) -> None:
-        super().__init__(entity_id=entity_id, created_at=created_at, updated_at=updated_at)
+        super().__init__(entity_id=entity_id, created_at=created_at, updated_at=updated_at, version=version)
         self._title = title
         self._description = description
         self._status = status
@@ -182,15 +210,67 @@ class Task(Entity):
 
     def add_dependency(self, task: str) -> None:
         self._depends_on.add(task)
-        self._batch.append(TaskDependencyAdded(entity_id=self.entity_id, depends_on=task))
+        self._record(TaskDependencyAdded(entity_id=self.entity_id, depends_on=task))
 
     def remove_dependency(self, task: str) -> None:
         self._depends_on.remove(task)
-        self._batch.append(TaskDependencyRemoved(entity_id=self.entity_id, depends_on=task))
+        self._record(TaskDependencyRemoved(entity_id=self.entity_id, depends_on=task))
 
     def update_status(self, status: TaskStatus) -> None:
         self._status = status
-        self._batch.append(TaskStatusUpdated(entity_id=self.entity_id, status=status, author=self._author))
+        self._record(TaskStatusUpdated(entity_id=self.entity_id, status=status, author=self._author))
+
+    def _apply(self, event: EntityEvent) -> None:
+        if isinstance(event, TaskStatusUpdated):
+            self._status = event.status
+        elif isinstance(event, TaskDependencyAdded):
+            self._depends_on.add(event.depends_on)
+        elif isinstance(event, TaskDependencyRemoved):
+            self._depends_on.discard(event.depends_on)
+        else:
+            raise AssertionError(f"Unexpected event type: {type(event).__name__}")
+
+    @classmethod
+    def from_created(cls, event: TaskCreated) -> "Task":
+        return Task(
+            entity_id=event.entity_id,
+            title=event.title,
+            description=event.description,
+            depends_on=set(),
+            status=event.status,
+            assignee=event.assignee,
+            author=event.author,
+            created_at=event.event_created_at,
+            updated_at=event.event_created_at,
+            version=1,
+        )
+
+    def to_snapshot(self) -> dict[str, Any]:
+        return {
+            "title": self._title,
+            "description": self._description,
+            "status": self._status,
+            "assignee": self._assignee,
+            "author": self._author,
+            "depends_on": sorted(self._depends_on),
+            "created_at": to_isoformat(self._created_at),
+            "updated_at": to_isoformat(self._updated_at),
+        }
+
+    @classmethod
+    def from_snapshot(cls, *, entity_id: str, version: int, state: Mapping[str, Any]) -> "Task":
+        return Task(
+            entity_id=entity_id,
+            title=state["title"],
+            description=state["description"],
+            depends_on=set(state["depends_on"]),
+            status=TaskStatus(state["status"]),
+            assignee=state["assignee"],
+            author=state["author"],
+            created_at=from_isoformat(state["created_at"]),
+            updated_at=from_isoformat(state["updated_at"]),
+            version=version,
+        )
 
     @classmethod
     def new(
@@ -212,7 +292,7 @@ class Task(Entity):
             assignee=assignee,
             author=author,
         )
-        task._batch.append(
+        task._record(
             TaskCreated(
                 entity_id=entity_id,
                 title=title,
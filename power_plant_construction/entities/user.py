@@ -1,15 +1,16 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Mapping
 
 from passlib.context import CryptContext
 
 from contracts.schemas.user import UserRole
-from event_sourcing.entity import Entity, EntityEvent
+from event_sourcing.entity import Entity, EntityEvent, from_isoformat, to_isoformat
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 class UserCreated(EntityEvent):
+    __slots__ = ("_login", "_name", "_role", "_password_hashed", "_salt")
     __entity_type__ = "User"
 
     def __init__(
@@ -62,6 +63,7 @@ class UserCreated(EntityEvent):
 
 
 class User(Entity):
+    __slots__ = ("_login", "_name", "_role", "_password_hashed", "_salt")
     AGGREGATE_EVENT_TYPES = UserCreated
 
     def __init__(
@@ -75,8 +77,9 @@ class User(Entity):
         salt: str,
         created_at: datetime | None = None,
         updated_at: datetime | None = None,
+        version: int = 0,
     ) -> None:
-        super().__init__(entity_id=entity_id, created_at=created_at, updated_at=updated_at)
+        super().__init__(entity_id=entity_id, created_at=created_at, updated_at=updated_at, version=version)
         self._login = login
         self._name = name
         self._role = role
@@ -98,6 +101,48 @@ class User(Entity):
     def verify_password(self, plain_password: str) -> bool:
         return pwd_context.verify(plain_password + self._salt, self._password_hashed)
 
+    def _apply(self, event: EntityEvent) -> None:
+        raise AssertionError(f"Unexpected event type: {type(event).__name__}")
+
+    @classmethod
+    def from_created(cls, event: UserCreated) -> "User":
+        return User(
+            entity_id=event.entity_id,
+            login=event.login,
+            name=event.name,
+            role=event.role,
+            password_hashed=event.password_hashed,
+            salt=event.salt,
+            created_at=event.event_created_at,
+            updated_at=event.event_created_at,
+            version=1,
+        )
+
+    def to_snapshot(self) -> dict[str, Any]:
+        return {
+            "login": self._login,
+            "name": self._name,
+            "role": self._role,
+            "password_hashed": self._password_hashed,
+            "salt": self._salt,
+            "created_at": to_isoformat(self._created_at),
+            "updated_at": to_isoformat(self._updated_at),
+        }
+
+    @classmethod
+    def from_snapshot(cls, *, entity_id: str, version: int, state: Mapping[str, Any]) -> "User":
+        return User(
+            entity_id=entity_id,
+            login=state["login"],
+            name=state["name"],
+            role=UserRole(state["role"]),
+            password_hashed=state["password_hashed"],
+            salt=state["salt"],
+            created_at=from_isoformat(state["created_at"]),
+            updated_at=from_isoformat(state["updated_at"]),
+            version=version,
+        )
+
     @classmethod
     def new(
         cls,
@@ -108,7 +153,6 @@ class User(Entity):
         role: UserRole,
         plain_password: str,
     ) -> "User":
-
         salt = login
         password_hashed = pwd_context.hash(plain_password + salt)
         user = User(
@@ -119,7 +163,7 @@ class User(Entity):
             password_hashed=password_hashed,
             salt=salt,
         )
-        user._batch.append(
+        user._record(
             UserCreated(
                 entity_id=entity_id,
                 login=login,
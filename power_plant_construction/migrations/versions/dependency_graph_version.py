@@ -0,0 +1,29 @@
+"""dependency graph version
+
+Revision ID: 9ac45886b8c4
+Revises: 4ad231562c7a
+
+"""
+from alembic import op
+from sqlalchemy import BigInteger, Boolean, CheckConstraint, Column
+
+# revision identifiers, used by Alembic.
+revision = "9ac45886b8c4"
+down_revision = "4ad231562c7a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # a single row, bumped by every transaction changing task dependencies
+    op.create_table(
+        "dependency_graph_version",
+        Column("id", Boolean, primary_key=True, server_default="true"),
+        Column("version", BigInteger, nullable=False, server_default="0"),
+        CheckConstraint("id", name="dependency_graph_version_single_row"),
+    )
+    op.execute("insert into dependency_graph_version (id, version) values (true, 0)")
+
+
+def downgrade() -> None:
+    op.drop_table("dependency_graph_version")
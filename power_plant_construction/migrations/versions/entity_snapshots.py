@@ -0,0 +1,32 @@
+"""entity snapshots
+
+Revision ID: f4114c2587ff
+Revises: 6d8e6ae419c2
+
+"""
+from alembic import op
+from sqlalchemy import BigInteger, Column, DateTime, Integer, LargeBinary, String, text
+
+# revision identifiers, used by Alembic.
+revision = "f4114c2587ff"
+down_revision = "6d8e6ae419c2"
+branch_labels = None
+depends_on = None
+
+UTC_NOW_FN = text("(now() at time zone 'utc')")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "entity_snapshots",
+        Column("entity_type", String, primary_key=True),
+        Column("entity_id", String, primary_key=True),
+        Column("version", Integer, primary_key=True),
+        Column("sequence", BigInteger, nullable=False),
+        Column("state", LargeBinary, nullable=False),
+        Column("created_at", DateTime, server_default=UTC_NOW_FN, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("entity_snapshots")
@@ -0,0 +1,26 @@
+"""entity versions
+
+Revision ID: f08456ecdd6f
+Revises: f4114c2587ff
+
+"""
+from alembic import op
+from sqlalchemy import Column, Integer
+
+# revision identifiers, used by Alembic.
+revision = "f08456ecdd6f"
+down_revision = "f4114c2587ff"
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ("tasks", "notifications", "users")
+
+
+def upgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.add_column(table, Column("version", Integer, nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.drop_column(table, "version")
@@ -0,0 +1,49 @@
+"""event outbox
+
+Revision ID: 7d96c248772f
+Revises: 1d6b11e4c520
+
+"""
+from alembic import op
+from sqlalchemy import BigInteger, Column, DateTime, LargeBinary, String, text
+
+# revision identifiers, used by Alembic.
+revision = "7d96c248772f"
+down_revision = "1d6b11e4c520"
+branch_labels = None
+depends_on = None
+
+UTC_NOW_FN = text("(now() at time zone 'utc')")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_outbox",
+        Column("id", BigInteger, primary_key=True, autoincrement=True),
+        Column("subject", String, nullable=False),
+        Column("payload", LargeBinary, nullable=False),
+        Column("created_at", DateTime, server_default=UTC_NOW_FN, nullable=False),
+    )
+
+    # wakes the relay up once per committed transaction that wrote into the outbox
+    op.execute(
+        """create function notify_event_outbox() returns trigger as $$
+            begin
+                perform pg_notify('event_outbox', '');
+                return null;
+            end;
+        $$ language plpgsql
+        """
+    )
+    op.execute(
+        """create trigger event_outbox_notify
+            after insert on event_outbox
+            for each statement execute function notify_event_outbox()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("drop trigger event_outbox_notify on event_outbox")
+    op.execute("drop function notify_event_outbox()")
+    op.drop_table("event_outbox")
@@ -0,0 +1,23 @@
+"""event outbox content type
+
+Revision ID: 3e7875f836ee
+Revises: 7d96c248772f
+
+"""
+from alembic import op
+from sqlalchemy import Column, String
+
+# revision identifiers, used by Alembic.
+revision = "3e7875f836ee"
+down_revision = "7d96c248772f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # null keeps the rows written so far, and every JSON payload, published without a Content-Type header
+    op.add_column("event_outbox", Column("content_type", String, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("event_outbox", "content_type")
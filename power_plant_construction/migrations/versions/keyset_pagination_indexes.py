@@ -0,0 +1,51 @@
+"""keyset pagination indexes
+
+Revision ID: 1d6b11e4c520
+Revises: 44a3dbe683c3
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = "1d6b11e4c520"
+down_revision = "44a3dbe683c3"
+branch_labels = None
+depends_on = None
+
+UNBLOCKED_PENDING = text("status = 'PENDING' and unfinished_dependencies = 0")
+
+
+def upgrade() -> None:
+    op.create_index("ix_tasks_assignee_created", "tasks", ["assignee", "created_at", "entity_id"])
+    op.drop_index("ix_tasks_assignee_status", table_name="tasks")
+    op.create_index(
+        "ix_tasks_assignee_status_created", "tasks", ["assignee", "status", "created_at", "entity_id"]
+    )
+    op.drop_index("ix_tasks_unblocked_pending", table_name="tasks")
+    op.create_index(
+        "ix_tasks_unblocked_pending",
+        "tasks",
+        ["assignee", "created_at", "entity_id"],
+        postgresql_where=UNBLOCKED_PENDING,
+    )
+
+    op.create_index(
+        "ix_notifications_receiver_created", "notifications", ["receiver", "created_at", "entity_id"]
+    )
+    op.create_index(
+        "ix_notifications_receiver_status_created",
+        "notifications",
+        ["receiver", "status", "created_at", "entity_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_receiver_status_created", table_name="notifications")
+    op.drop_index("ix_notifications_receiver_created", table_name="notifications")
+
+    op.drop_index("ix_tasks_unblocked_pending", table_name="tasks")
+    op.create_index("ix_tasks_unblocked_pending", "tasks", ["assignee"], postgresql_where=UNBLOCKED_PENDING)
+    op.drop_index("ix_tasks_assignee_status_created", table_name="tasks")
+    op.create_index("ix_tasks_assignee_status", "tasks", ["assignee", "status"])
+    op.drop_index("ix_tasks_assignee_created", table_name="tasks")
@@ -0,0 +1,31 @@
+"""notification unread counts
+
+Revision ID: 36686da05aea
+Revises: f08456ecdd6f
+
+"""
+from alembic import op
+from sqlalchemy import Column, Integer, String
+
+# revision identifiers, used by Alembic.
+revision = "36686da05aea"
+down_revision = "f08456ecdd6f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_unread_counts",
+        Column("receiver", String, primary_key=True),
+        Column("unread", Integer, nullable=False, server_default="0"),
+    )
+    op.execute(
+        """insert into notification_unread_counts (receiver, unread)
+            select receiver, count(*) from notifications where status = 'UNREAD' group by receiver
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("notification_unread_counts")
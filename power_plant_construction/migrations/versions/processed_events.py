@@ -0,0 +1,31 @@
+"""processed events
+
+Revision ID: 4ad231562c7a
+Revises: 36686da05aea
+
+"""
+from alembic import op
+from sqlalchemy import Column, DateTime, String, text
+
+# revision identifiers, used by Alembic.
+revision = "4ad231562c7a"
+down_revision = "36686da05aea"
+branch_labels = None
+depends_on = None
+
+UTC_NOW_FN = text("(now() at time zone 'utc')")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "processed_events",
+        Column("consumer", String, primary_key=True),
+        Column("event_id", String, primary_key=True),
+        Column("processed_at", DateTime, server_default=UTC_NOW_FN, nullable=False),
+    )
+    op.create_index("ix_processed_events_processed_at", "processed_events", ["processed_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_processed_events_processed_at", table_name="processed_events")
+    op.drop_table("processed_events")
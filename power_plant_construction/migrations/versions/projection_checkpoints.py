@@ -0,0 +1,29 @@
+"""projection checkpoints
+
+Revision ID: 6d8e6ae419c2
+Revises: 3e7875f836ee
+
+"""
+from alembic import op
+from sqlalchemy import BigInteger, Column, DateTime, String, text
+
+# revision identifiers, used by Alembic.
+revision = "6d8e6ae419c2"
+down_revision = "3e7875f836ee"
+branch_labels = None
+depends_on = None
+
+UTC_NOW_FN = text("(now() at time zone 'utc')")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "projection_checkpoints",
+        Column("name", String, primary_key=True),
+        Column("sequence", BigInteger, nullable=False),
+        Column("updated_at", DateTime, server_default=UTC_NOW_FN, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("projection_checkpoints")
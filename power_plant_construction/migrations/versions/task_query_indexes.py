@@ -0,0 +1,23 @@
+"""task query indexes
+
+Revision ID: ad968c3deaeb
+Revises: 22041f5b4af7
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ad968c3deaeb"
+down_revision = "22041f5b4af7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_tasks_assignee_status", "tasks", ["assignee", "status"])
+    op.create_index("ix_task_dependencies_depends_on", "task_dependencies", ["depends_on"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_dependencies_depends_on", table_name="task_dependencies")
+    op.drop_index("ix_tasks_assignee_status", table_name="tasks")
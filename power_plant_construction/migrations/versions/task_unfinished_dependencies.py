@@ -0,0 +1,45 @@
+"""task unfinished dependencies counter
+
+Revision ID: 44a3dbe683c3
+Revises: ad968c3deaeb
+
+"""
+from alembic import op
+from sqlalchemy import Column, Integer, text
+
+# revision identifiers, used by Alembic.
+revision = "44a3dbe683c3"
+down_revision = "ad968c3deaeb"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tasks",
+        Column("unfinished_dependencies", Integer, server_default=text("0"), nullable=False),
+    )
+    op.execute(
+        """update tasks t
+            set unfinished_dependencies = blockers.count
+            from (
+                select d.entity_id, count(*) as count
+                from task_dependencies d
+                left join tasks dep on dep.entity_id = d.depends_on
+                where dep.status is distinct from 'COMPLETED'
+                group by d.entity_id
+            ) blockers
+            where t.entity_id = blockers.entity_id
+        """
+    )
+    op.create_index(
+        "ix_tasks_unblocked_pending",
+        "tasks",
+        ["assignee"],
+        postgresql_where=text("status = 'PENDING' and unfinished_dependencies = 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_unblocked_pending", table_name="tasks")
+    op.drop_column("tasks", "unfinished_dependencies")
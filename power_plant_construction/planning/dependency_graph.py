@@ -0,0 +1,369 @@
+from contextlib import contextmanager
+from time import monotonic
+from typing import Iterable, Iterator
+import asyncio
+import logging
+
+from event_sourcing.entity import EntityEvent
+from power_plant_construction.entities.task import TaskCreated, TaskDependencyAdded, TaskDependencyRemoved
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class DependencyCycleError(Exception):
+    pass
+
+
+class DependencyGraph:
+    """In-memory graph of the dependencies between tasks.
+
+    An edge goes from a dependency to the task that depends on it. The graph keeps a
+    topological order of all tasks up to date as edges are inserted (Pearce-Kelly): an
+    edge that already agrees with the order costs nothing, otherwise only the tasks
+    between its two ends in the order are visited and reordered. An edge that would
+    close a cycle is found during that same visit and rejected.
+
+    Every committed dependency change carries the next graph version, `version` is the
+    one the graph reflects: it moves up as the changes are applied in sequence, a change
+    arriving ahead of a missing one is applied right away and counted once the gap is
+    filled. A write checked against the graph is committed only if the database is still
+    at the same version, so the graph doesn't have to know about the other processes'
+    changes to be authoritative, only to know that it doesn't.
+    """
+
+    def __init__(self) -> None:
+        self._reset()
+        self.version = 0
+        # versions applied past a missing one, the highest known to be committed, and since when it is missing
+        self._ahead: set[int] = set()
+        self._latest = 0
+        self._behind_since: float | None = None
+        self._advanced: asyncio.Event | None = None
+
+    def _reset(self) -> None:
+        self._index: dict[str, int] = {}
+        self._ids: list[str] = []
+        # dependencies and dependents of every task, by index
+        self._blockers: list[set[int]] = []
+        self._dependents: list[set[int]] = []
+        # position of every task in the topological order, and the task at every position
+        self._order: list[int] = []
+        self._at: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, task: str) -> bool:
+        return task in self._index
+
+    def add_task(self, task: str) -> int:
+        node = self._index.get(task)
+        if node is None:
+            node = self._index[task] = len(self._ids)
+            self._ids.append(task)
+            self._blockers.append(set())
+            self._dependents.append(set())
+            self._order.append(node)
+            self._at.append(node)
+        return node
+
+    def position(self, task: str) -> int:
+        """Where the task is in the topological order, stable until the graph changes."""
+        return self._order[self._index[task]]
+
+    def direct_blockers(self, task: str) -> list[str]:
+        node = self._index.get(task)
+        return [] if node is None else [self._ids[blocker] for blocker in self._blockers[node]]
+
+    def direct_dependents(self, task: str) -> list[str]:
+        node = self._index.get(task)
+        return [] if node is None else [self._ids[dependent] for dependent in self._dependents[node]]
+
+    def dependencies(self) -> Iterator[tuple[str, str]]:
+        """Every edge as `(task, depends_on)`."""
+        ids = self._ids
+        for node, blockers in enumerate(self._blockers):
+            for blocker in blockers:
+                yield ids[node], ids[blocker]
+
+    def has_dependency(self, task: str, depends_on: str) -> bool:
+        node = self._index.get(task)
+        dependency = self._index.get(depends_on)
+        return node is not None and dependency is not None and dependency in self._blockers[node]
+
+    def would_create_cycle(self, task: str, depends_on: str) -> bool:
+        """Whether `task` depending on `depends_on` would close a cycle, without changing the graph."""
+        if task == depends_on:
+            return True
+
+        node = self._index.get(task)
+        dependency = self._index.get(depends_on)
+        if node is None or dependency is None or self._order[dependency] < self._order[node]:
+            return False
+        return self._reaches(node, dependency) is None
+
+    def add_dependency(self, task: str, depends_on: str) -> None:
+        """Makes `task` depend on `depends_on`, raises DependencyCycleError if that would close a cycle."""
+        if task == depends_on:
+            raise DependencyCycleError(f"Task {task} can't depend on itself")
+
+        node = self.add_task(task)
+        dependency = self.add_task(depends_on)
+        if dependency in self._blockers[node]:
+            return
+
+        if self._order[dependency] > self._order[node]:
+            forward = self._reaches(node, dependency)
+            if forward is None:
+                raise DependencyCycleError(f"Task {depends_on} already depends on {task}")
+            self._reorder(forward, self._reached_by(dependency, self._order[node]))
+
+        self._blockers[node].add(dependency)
+        self._dependents[dependency].add(node)
+
+    @contextmanager
+    def reserve(self, task: str, depends_on: Iterable[str]) -> Iterator[None]:
+        """Adds the dependencies of `task` for the duration of a write, removed again if it fails.
+
+        Entered before the write's first await, concurrent writes in this process check
+        their own dependencies against the reserved ones and can't close a cycle together.
+        Writes of other processes are caught by the version check of the write.
+        """
+        added: list[str] = []
+        try:
+            for dependency in depends_on:
+                if not self.has_dependency(task, dependency):
+                    self.add_dependency(task, dependency)
+                    added.append(dependency)
+            yield
+        except BaseException:
+            for dependency in added:
+                self.remove_dependency(task, dependency)
+            raise
+
+    def remove_dependency(self, task: str, depends_on: str) -> None:
+        node = self._index.get(task)
+        dependency = self._index.get(depends_on)
+        if node is None or dependency is None:
+            return
+
+        # the order stays valid, there are only fewer constraints on it
+        self._blockers[node].discard(dependency)
+        self._dependents[dependency].discard(node)
+
+    def _reaches(self, start: int, target: int) -> list[int] | None:
+        """Dependents of `start` placed up to `target` in the order, or None if `target` is one of them."""
+        bound = self._order[target]
+        order = self._order
+        dependents = self._dependents
+        visited = {start}
+        stack = [start]
+        while stack:
+            for dependent in dependents[stack.pop()]:
+                if dependent == target:
+                    return None
+                if dependent not in visited and order[dependent] < bound:
+                    visited.add(dependent)
+                    stack.append(dependent)
+        return list(visited)
+
+    def _reached_by(self, start: int, bound: int) -> list[int]:
+        """Dependencies of `start` placed after `bound` in the order."""
+        order = self._order
+        blockers = self._blockers
+        visited = {start}
+        stack = [start]
+        while stack:
+            for blocker in blockers[stack.pop()]:
+                if blocker not in visited and order[blocker] > bound:
+                    visited.add(blocker)
+                    stack.append(blocker)
+        return list(visited)
+
+    def _reorder(self, forward: list[int], backward: list[int]) -> None:
+        # the affected tasks keep the positions they had, the dependencies of the new
+        # edge take the first ones, its dependents the last ones
+        order = self._order
+        forward.sort(key=order.__getitem__)
+        backward.sort(key=order.__getitem__)
+        nodes = backward + forward
+        positions = sorted(order[node] for node in nodes)
+        for node, position in zip(nodes, positions):
+            order[node] = position
+            self._at[position] = node
+
+    def blockers(self, task: str) -> set[str]:
+        """Every task `task` transitively depends on."""
+        return self._transitive(task, self._blockers)
+
+    def dependents(self, task: str) -> set[str]:
+        """Every task that transitively depends on `task`."""
+        return self._transitive(task, self._dependents)
+
+    def _transitive(self, task: str, edges: list[set[int]]) -> set[str]:
+        node = self._index.get(task)
+        if node is None:
+            return set()
+
+        visited = {node}
+        stack = [node]
+        while stack:
+            for neighbour in edges[stack.pop()]:
+                if neighbour not in visited:
+                    visited.add(neighbour)
+                    stack.append(neighbour)
+        visited.discard(node)
+        return {self._ids[neighbour] for neighbour in visited}
+
+    def topological_order(self, tasks: Iterable[str] | None = None) -> list[str]:
+        """Tasks ordered so that every task comes after its dependencies, all of them or only `tasks`."""
+        if tasks is None:
+            return [self._ids[node] for node in self._at]
+
+        nodes = [self._index[task] for task in tasks if task in self._index]
+        nodes.sort(key=self._order.__getitem__)
+        return [self._ids[node] for node in nodes]
+
+    def apply(self, event: EntityEvent) -> None:
+        """Follows the task events, applying an event twice is harmless."""
+        if isinstance(event, TaskCreated):
+            self.add_task(event.entity_id)
+        elif isinstance(event, (TaskDependencyAdded, TaskDependencyRemoved)):
+            version = event.graph_version
+            if version is not None and (version <= self.version or version in self._ahead):
+                # applied already, by the command that wrote it or with the graph it was loaded into
+                return
+
+            if isinstance(event, TaskDependencyRemoved):
+                self.remove_dependency(event.entity_id, event.depends_on)
+            else:
+                try:
+                    self.add_dependency(event.entity_id, event.depends_on)
+                except DependencyCycleError:
+                    if version is not None:
+                        # committed, so the cycle goes through an edge reserved by a write that
+                        # is bound to fail: the version stays missing until the graph is reloaded
+                        log.warning(
+                            f"Dependency of {event.entity_id} on {event.depends_on} is behind a reservation"
+                        )
+                        self.note_version(version)
+                        return
+                    # only written before dependency changes were checked against a versioned graph
+                    log.warning(
+                        f"Ignoring dependency of {event.entity_id} on {event.depends_on}: it closes a cycle"
+                    )
+            if version is not None:
+                self._advance(version)
+
+    def apply_batch(self, batch: Iterable[EntityEvent]) -> None:
+        for event in batch:
+            self.apply(event)
+
+    def _advance(self, version: int) -> None:
+        self._ahead.add(version)
+        while self.version + 1 in self._ahead:
+            self.version += 1
+            self._ahead.remove(self.version)
+        self.note_version(version)
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        if self._advanced is not None:
+            self._advanced.set()
+            self._advanced = None
+
+    def note_version(self, version: int) -> None:
+        """Learns that the database committed `version`, the graph is behind until it got there."""
+        self._latest = max(self._latest, version)
+        if self.version >= self._latest:
+            self._behind_since = None
+        elif self._behind_since is None:
+            self._behind_since = monotonic()
+
+    def behind_for(self) -> float:
+        """For how many seconds the graph has missed a version known to be committed, 0 when it is up to date."""
+        return 0.0 if self._behind_since is None else monotonic() - self._behind_since
+
+    async def wait_for(self, version: int, *, timeout: float) -> bool:
+        """Waits until the graph got to `version`, False if it is still behind after `timeout` seconds."""
+        self.note_version(version)
+        deadline = monotonic() + timeout
+        while self.version < version:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return False
+            if self._advanced is None:
+                self._advanced = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._advanced.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def load(
+        self, tasks: Iterable[str], dependencies: Iterable[tuple[str, str]], *, version: int = 0
+    ) -> None:
+        """Replaces the graph with the one the database had at `version`.
+
+        The tasks are ordered in one pass (Kahn) rather than edge by edge.
+        """
+        self._reset()
+        for task in tasks:
+            self.add_task(task)
+
+        edges = {(self.add_task(task), self.add_task(depends_on)) for task, depends_on in dependencies}
+        blocking = [0] * len(self._ids)
+        dependents: list[list[int]] = [[] for _ in self._ids]
+        for node, dependency in edges:
+            dependents[dependency].append(node)
+            blocking[node] += 1
+
+        ready = [node for node, count in enumerate(blocking) if count == 0]
+        at: list[int] = []
+        while ready:
+            node = ready.pop()
+            at.append(node)
+            for dependent in dependents[node]:
+                blocking[dependent] -= 1
+                if blocking[dependent] == 0:
+                    ready.append(dependent)
+
+        cyclic = [node for node, count in enumerate(blocking) if count > 0]
+        at.extend(cyclic)
+        self._at = at
+        for position, node in enumerate(at):
+            self._order[node] = position
+
+        backward = []
+        for node, dependency in edges:
+            if self._order[dependency] < self._order[node]:
+                self._blockers[node].add(dependency)
+                self._dependents[dependency].add(node)
+            else:
+                backward.append((node, dependency))
+
+        if cyclic:
+            # left over from before cycles were checked, keep as much of them as still forms a DAG
+            log.warning(f"{len(cyclic)} tasks are part of dependency cycles")
+            for node, dependency in backward:
+                try:
+                    self.add_dependency(self._ids[node], self._ids[dependency])
+                except DependencyCycleError:
+                    log.warning(f"Ignoring dependency of {self._ids[node]} on {self._ids[dependency]}")
+
+        self.version = version
+        self._ahead = set()
+        self.note_version(version)
+        self._wake_waiters()
+
+
+_DEPENDENCY_GRAPH: DependencyGraph | None = None
+
+
+def get_dependency_graph() -> DependencyGraph:
+    global _DEPENDENCY_GRAPH  # pylint: disable=global-statement
+    if _DEPENDENCY_GRAPH is None:
+        _DEPENDENCY_GRAPH = DependencyGraph()
+
+    return _DEPENDENCY_GRAPH
@@ -0,0 +1,268 @@
+from array import array
+from dataclasses import dataclass
+from heapq import heappop, heappush
+from typing import Iterable
+import logging
+
+from contracts.schemas.task import TaskStatus
+from event_sourcing.entity import EntityEvent
+from power_plant_construction.entities.task import (
+    TaskCreated,
+    TaskDependencyAdded,
+    TaskDependencyRemoved,
+    TaskStatusUpdated,
+)
+from power_plant_construction.planning.dependency_graph import (
+    DependencyCycleError,
+    DependencyGraph,
+    get_dependency_graph,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+def duration(status: TaskStatus) -> int:
+    """Every task left to do takes one unit of time, completed tasks none."""
+    return 0 if status == TaskStatus.COMPLETED else 1
+
+
+@dataclass(frozen=True)
+class CsrGraph:
+    """Dependency edges in compressed sparse row form.
+
+    The dependents of task `i` are `dependents[offsets[i]:offsets[i + 1]]`, tasks are
+    numbered by their position in `ids`. Flat int arrays keep a graph of a million tasks
+    to a few dozen megabytes and are walked without touching per task Python objects.
+    """
+
+    ids: list[str]
+    offsets: array
+    dependents: array
+
+    @classmethod
+    def from_edges(cls, ids: list[str], edges: Iterable[tuple[str, str]]) -> "CsrGraph":
+        """Builds the graph from `(task, depends_on)` pairs, edges to unknown tasks are ignored."""
+        index = {task: node for node, task in enumerate(ids)}
+        sources = array("l")
+        targets = array("l")
+        for task, depends_on in edges:
+            node = index.get(task)
+            dependency = index.get(depends_on)
+            if node is not None and dependency is not None:
+                sources.append(dependency)
+                targets.append(node)
+
+        offsets = array("l", [0]) * (len(ids) + 1)
+        for source in sources:
+            offsets[source + 1] += 1
+        for node in range(len(ids)):
+            offsets[node + 1] += offsets[node]
+
+        dependents = array("l", [0]) * len(sources)
+        filled = offsets[:-1]
+        for source, target in zip(sources, targets):
+            dependents[filled[source]] = target
+            filled[source] += 1
+
+        return cls(ids=ids, offsets=offsets, dependents=dependents)
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Earliest start of every task of a CsrGraph, `previous` is the dependency that sets it or -1."""
+
+    ids: list[str]
+    durations: array
+    earliest_start: array
+    previous: array
+    order: array
+
+    @property
+    def length(self) -> int:
+        return max(
+            (start + length for start, length in zip(self.earliest_start, self.durations)),
+            default=0,
+        )
+
+    def critical_path(self) -> list[str]:
+        """The chain of dependencies that ends last, first task first."""
+        if not self.ids:
+            return []
+
+        finish = [start + length for start, length in zip(self.earliest_start, self.durations)]
+        node = max(range(len(finish)), key=finish.__getitem__)
+        path = []
+        while node >= 0:
+            if self.durations[node]:
+                path.append(self.ids[node])
+            node = self.previous[node]
+        path.reverse()
+        return path
+
+    def earliest_start_order(self) -> list[int]:
+        """Tasks by earliest start, ties in topological order."""
+        earliest_start = self.earliest_start
+        return sorted(self.order, key=earliest_start.__getitem__)
+
+
+def compute_schedule(graph: CsrGraph, durations: array) -> Schedule:
+    """Longest path from the tasks without dependencies, in one topological pass (Kahn), O(V + E)."""
+    count = len(graph.ids)
+    offsets = graph.offsets
+    dependents = graph.dependents
+
+    blocking = array("l", [0]) * count
+    for dependent in dependents:
+        blocking[dependent] += 1
+
+    order = array("l", [node for node in range(count) if not blocking[node]])
+    earliest_start = array("l", [0]) * count
+    previous = array("l", [-1]) * count
+
+    head = 0
+    while head < len(order):
+        node = order[head]
+        head += 1
+        finish = earliest_start[node] + durations[node]
+        for edge in range(offsets[node], offsets[node + 1]):
+            dependent = dependents[edge]
+            if finish > earliest_start[dependent] or previous[dependent] < 0:
+                earliest_start[dependent] = finish
+                previous[dependent] = node
+            blocking[dependent] -= 1
+            if not blocking[dependent]:
+                order.append(dependent)
+
+    if len(order) != count:
+        raise DependencyCycleError(f"{count - len(order)} tasks are part of dependency cycles")
+
+    return Schedule(
+        ids=graph.ids,
+        durations=durations,
+        earliest_start=earliest_start,
+        previous=previous,
+        order=order,
+    )
+
+
+def schedule_tasks(tasks: Iterable[tuple[str, TaskStatus]], edges: Iterable[tuple[str, str]]) -> Schedule:
+    ids = []
+    durations = array("b")
+    for task, status in tasks:
+        ids.append(task)
+        durations.append(duration(status))
+    return compute_schedule(CsrGraph.from_edges(ids, edges), durations)
+
+
+class ScheduleTracker:
+    """Keeps the earliest start of every task up to date as task events arrive.
+
+    The whole schedule is computed once, an event then only revisits the tasks
+    downstream of the change, in topological order, and stops wherever an earliest
+    start came out unchanged.
+    """
+
+    def __init__(self, graph: DependencyGraph) -> None:
+        self._graph = graph
+        self._durations: dict[str, int] = {}
+        self._earliest_start: dict[str, int] = {}
+        self._previous: dict[str, str | None] = {}
+        self._end: tuple[int, str | None] | None = None
+
+    def load(self, schedule: Schedule) -> None:
+        ids = schedule.ids
+        self._durations = dict(zip(ids, schedule.durations))
+        self._earliest_start = dict(zip(ids, schedule.earliest_start))
+        self._previous = {task: None if node < 0 else ids[node] for task, node in zip(ids, schedule.previous)}
+        self._end = None
+
+    def earliest_start(self, task: str) -> int | None:
+        return self._earliest_start.get(task)
+
+    def earliest_finish(self, task: str) -> int | None:
+        start = self._earliest_start.get(task)
+        return None if start is None else start + self._durations[task]
+
+    @property
+    def length(self) -> int:
+        return self._latest_end()[0]
+
+    def critical_path(self) -> list[str]:
+        path = []
+        task = self._latest_end()[1]
+        while task is not None:
+            if self._durations[task]:
+                path.append(task)
+            task = self._previous[task]
+        path.reverse()
+        return path
+
+    def _latest_end(self) -> tuple[int, str | None]:
+        if self._end is None:
+            durations = self._durations
+            self._end = max(
+                ((start + durations[task], task) for task, start in self._earliest_start.items()),
+                default=(0, None),
+            )
+        return self._end
+
+    def apply(self, event: EntityEvent) -> None:
+        """Follows the task events, expects the dependency graph to already include the event."""
+        task = event.entity_id
+        if isinstance(event, TaskCreated):
+            if task not in self._durations:
+                self._durations[task] = duration(event.status)
+                self._update(task)
+        elif isinstance(event, TaskStatusUpdated):
+            if self._durations.get(task) != duration(event.status):
+                self._durations[task] = duration(event.status)
+                # the task's own start holds, what moves is when its dependents can start
+                self._update(*self._graph.direct_dependents(task))
+                self._end = None
+        elif isinstance(event, (TaskDependencyAdded, TaskDependencyRemoved)):
+            self._update(task)
+
+    def _update(self, *tasks: str) -> None:
+        graph = self._graph
+        durations = self._durations
+        earliest_start = self._earliest_start
+        previous = self._previous
+
+        pending = [(graph.position(task), task) for task in tasks if task in graph]
+        queued = set(tasks)
+        for _, task in pending:
+            durations.setdefault(task, 1)
+        pending.sort()
+
+        while pending:
+            _, task = heappop(pending)
+            start = 0
+            before = None
+            for blocker in graph.direct_blockers(task):
+                finish = earliest_start.get(blocker, 0) + durations.setdefault(blocker, 1)
+                if finish > start or before is None:
+                    start = finish
+                    before = blocker
+
+            if earliest_start.get(task) == start and previous.get(task) == before:
+                continue
+            earliest_start[task] = start
+            previous[task] = before
+
+            for dependent in graph.direct_dependents(task):
+                if dependent not in queued:
+                    queued.add(dependent)
+                    heappush(pending, (graph.position(dependent), dependent))
+            self._end = None
+
+
+_SCHEDULE_TRACKER: ScheduleTracker | None = None
+
+
+def get_schedule_tracker() -> ScheduleTracker:
+    global _SCHEDULE_TRACKER  # pylint: disable=global-statement
+    if _SCHEDULE_TRACKER is None:
+        _SCHEDULE_TRACKER = ScheduleTracker(get_dependency_graph())
+
+    return _SCHEDULE_TRACKER
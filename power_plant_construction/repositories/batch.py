@@ -0,0 +1,100 @@
+from itertools import groupby
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Mapping, Sequence, Type
+
+from asyncpg.pool import PoolConnectionProxy
+
+from event_sourcing.entity import EntityEvent
+
+RunHandler = Callable[[PoolConnectionProxy, list[Any]], Awaitable[None]]
+
+# inserts with at least this many rows go through COPY instead of executemany
+COPY_THRESHOLD = 1000
+
+
+class ConcurrencyConflict(Exception):
+    """An entity changed between being read and its events being persisted."""
+
+
+def iter_event_runs(batch: Iterable[EntityEvent]) -> Iterator[tuple[Type[EntityEvent], list[EntityEvent]]]:
+    """Groups consecutive events of the same type, so applying runs in order keeps the batch order."""
+    for event_type, events in groupby(batch, key=type):
+        yield event_type, list(events)
+
+
+async def insert_rows(
+    conn: PoolConnectionProxy,
+    table: str,
+    *,
+    columns: Sequence[str],
+    records: list[tuple],
+) -> None:
+    if len(records) >= COPY_THRESHOLD:
+        await conn.copy_records_to_table(table, records=records, columns=list(columns))
+        return
+
+    placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+    await conn.executemany(
+        f"insert into {table} ({', '.join(columns)}) values ({placeholders})",
+        records,
+    )
+
+
+class BatchPersister:
+    """Applies a drained batch run by run, one statement batch per run, inside one transaction.
+
+    With a `versioned_table`, the versions the entities reached with the batch are
+    checked and stored in one statement: every row must still be at the version its
+    first event was recorded against, otherwise ConcurrencyConflict is raised and the
+    transaction rolls back. Events that were not recorded by an entity are not checked.
+    """
+
+    def __init__(
+        self,
+        handlers: Mapping[Type[EntityEvent], RunHandler],
+        *,
+        versioned_table: str | None = None,
+    ) -> None:
+        self._handlers = handlers
+        self._versioned_table = versioned_table
+
+    async def persist(self, conn: PoolConnectionProxy, batch: list[EntityEvent]) -> None:
+        async with conn.transaction():
+            for event_type, events in iter_event_runs(batch):
+                handler = self._handlers.get(event_type)
+                if handler is None:
+                    raise AssertionError(f"Unexpected event type: {event_type.__name__}")
+
+                await handler(conn, events)
+
+            if self._versioned_table is not None:
+                await self._bump_versions(conn, batch)
+
+    async def _bump_versions(self, conn: PoolConnectionProxy, batch: list[EntityEvent]) -> None:
+        versions: dict[str, list[int]] = {}
+        for event in batch:
+            version = event.entity_version
+            if version is None:
+                continue
+            reached = versions.get(event.entity_id)
+            if reached is None:
+                # [expected, reached]
+                versions[event.entity_id] = [version - 1, version]
+            else:
+                reached[0] = min(reached[0], version - 1)
+                reached[1] = max(reached[1], version)
+
+        if not versions:
+            return
+
+        status = await conn.execute(
+            f"""update {self._versioned_table} t
+                set version = v.reached
+                from unnest($1::text[], $2::int[], $3::int[]) as v(entity_id, expected, reached)
+                where t.entity_id = v.entity_id and t.version = v.expected
+            """,
+            list(versions),
+            [expected for expected, _ in versions.values()],
+            [reached for _, reached in versions.values()],
+        )
+        if int(status.rsplit(" ", 1)[-1]) != len(versions):
+            raise ConcurrencyConflict(f"{self._versioned_table}: concurrent modification")
@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Any
+
+Keyset = tuple[datetime, str]
+
+
+def keyset_page(
+    query: str,
+    *,
+    conditions: list[str],
+    args: list[Any],
+    after: Keyset | None,
+    limit: int | None,
+    alias: str,
+) -> str:
+    """Completes `query` with `conditions`, the keyset predicate and the page order.
+
+    Rows are ordered by `(created_at, entity_id)` of `alias`, `args` is extended in place
+    with the parameters the added clauses refer to.
+    """
+    conditions = list(conditions)
+    if after is not None:
+        args.extend(after)
+        conditions.append(f"({alias}.created_at, {alias}.entity_id) > (${len(args) - 1}, ${len(args)})")
+
+    query = f"{query} where {' and '.join(conditions)} order by {alias}.created_at, {alias}.entity_id"
+    if limit is not None:
+        args.append(limit)
+        query = f"{query} limit ${len(args)}"
+
+    return query
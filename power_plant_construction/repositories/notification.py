@@ -1,19 +1,30 @@
-from typing import Mapping, Optional
+from typing import Any, Mapping, Optional
 
 from asyncpg.pool import PoolConnectionProxy
 
+from contracts.schemas.notification import NotificationStatus
 from event_sourcing.entity import EntityEvent
 from power_plant_construction.entities.notification import (
     Notification,
     NotificationCreated,
     NotificationStatusUpdated,
 )
+from power_plant_construction.repositories.batch import BatchPersister, insert_rows
+from power_plant_construction.repositories.keyset import Keyset, keyset_page
 
 
 class NotificationRepo:
+    def __init__(self) -> None:
+        self._persister = BatchPersister(
+            {
+                NotificationCreated: self._persist_created,
+                NotificationStatusUpdated: self._persist_status_updates,
+            },
+            versioned_table="notifications",
+        )
+
     @staticmethod
     def _record_to_notification(record: Mapping) -> Notification:
-
         return Notification(
             entity_id=record["entity_id"],
             title=record["title"],
@@ -22,6 +33,7 @@ class NotificationRepo:
             receiver=record["receiver"],
             created_at=record["created_at"],
             updated_at=record["updated_at"],
+            version=record["version"],
         )
 
     async def fetch_by_id(self, conn: PoolConnectionProxy, *, entity_id: str) -> Optional[Notification]:
@@ -34,11 +46,30 @@ class NotificationRepo:
 
         return self._record_to_notification(notification_record)
 
-    async def fetch_all_for_receiver(self, conn: PoolConnectionProxy, receiver: str) -> list[Notification]:
-        notification_records = await conn.fetch(
-            "select * from notifications where receiver=$1",
-            receiver,
+    async def fetch_all_for_receiver(
+        self,
+        conn: PoolConnectionProxy,
+        receiver: str,
+        *,
+        status: NotificationStatus | None = None,
+        after: Keyset | None = None,
+        limit: int | None = None,
+    ) -> list[Notification]:
+        conditions = ["n.receiver=$1"]
+        args: list[Any] = [receiver]
+        if status is not None:
+            args.append(status)
+            conditions.append(f"n.status=${len(args)}")
+
+        query = keyset_page(
+            "select * from notifications n",
+            conditions=conditions,
+            args=args,
+            after=after,
+            limit=limit,
+            alias="n",
         )
+        notification_records = await conn.fetch(query, *args)
         if not notification_records:
             return []
 
@@ -47,38 +78,116 @@ class NotificationRepo:
         ]
 
     async def persist(self, conn: PoolConnectionProxy, batch: list[EntityEvent]) -> None:
-        for event in batch:
-            if isinstance(event, NotificationCreated):
-                await conn.execute(
-                    """insert into notifications
-                        (
-                            entity_id,
-                            title,
-                            content,
-                            status,
-                            receiver
-                        )
-                        values ($1, $2, $3, $4, $5)
-                    """,
-                    event.entity_id,
-                    event.title,
-                    event.content,
-                    event.status,
-                    event.receiver,
-                )
-            elif isinstance(event, NotificationStatusUpdated):
-                await conn.execute(
-                    """update notifications
-                        set
-                            status = $2,
-                            updated_at = (now() at time zone 'utc')
-                        where entity_id = $1
-                    """,
-                    event.entity_id,
-                    event.status,
+        await self._persister.persist(conn, batch)
+
+    async def fetch_unread_count(self, conn: PoolConnectionProxy, receiver: str) -> int:
+        unread = await conn.fetchval(
+            "select unread from notification_unread_counts where receiver=$1",
+            receiver,
+        )
+        return unread or 0
+
+    async def mark_all_read(
+        self, conn: PoolConnectionProxy, receiver: str
+    ) -> list[NotificationStatusUpdated]:
+        """Marks every unread notification of `receiver` read with one statement.
+
+        Returns the status updates to publish, the entities are neither loaded nor
+        persisted one by one.
+        """
+        records = await conn.fetch(
+            """update notifications
+                set
+                    status = $2,
+                    version = version + 1,
+                    updated_at = (now() at time zone 'utc')
+                where receiver = $1 and status = $3
+                returning entity_id
+            """,
+            receiver,
+            NotificationStatus.READ,
+            NotificationStatus.UNREAD,
+        )
+        if records:
+            await conn.execute(
+                "update notification_unread_counts set unread = greatest(unread - $2, 0) where receiver = $1",
+                receiver,
+                len(records),
+            )
+
+        return [
+            NotificationStatusUpdated(
+                entity_id=record["entity_id"], status=NotificationStatus.READ, receiver=receiver
+            )
+            for record in records
+        ]
+
+    @staticmethod
+    async def _persist_created(conn: PoolConnectionProxy, events: list[NotificationCreated]) -> None:
+        await insert_rows(
+            conn,
+            "notifications",
+            columns=("entity_id", "title", "content", "status", "receiver"),
+            records=[
+                (event.entity_id, event.title, event.content, event.status, event.receiver)
+                for event in events
+            ],
+        )
+
+        unread: dict[str, int] = {}
+        for event in events:
+            if event.status == NotificationStatus.UNREAD:
+                unread[event.receiver] = unread.get(event.receiver, 0) + 1
+        await NotificationRepo._shift_unread_counts(conn, unread)
+
+    @staticmethod
+    async def _persist_status_updates(
+        conn: PoolConnectionProxy, events: list[NotificationStatusUpdated]
+    ) -> None:
+        # the last status of every notification, the counts move by what actually changed
+        statuses = {event.entity_id: event.status for event in events}
+        records = await conn.fetch(
+            """with changed as (
+                    select n.entity_id, n.receiver, u.status
+                    from notifications n
+                    join unnest($1::text[], $2::text[]) as u(entity_id, status) on n.entity_id = u.entity_id
+                    where n.status::text <> u.status
+                    for update of n
+                ), updated as (
+                    update notifications n
+                    set
+                        status = changed.status::notification_status_enum,
+                        updated_at = (now() at time zone 'utc')
+                    from changed
+                    where n.entity_id = changed.entity_id
                 )
-            else:
-                raise AssertionError()
+                select receiver, sum(case when status = $3 then 1 else -1 end) as unread
+                from changed
+                group by receiver
+            """,
+            list(statuses),
+            list(statuses.values()),
+            NotificationStatus.UNREAD,
+        )
+        await NotificationRepo._shift_unread_counts(
+            conn, {record["receiver"]: record["unread"] for record in records}
+        )
+
+    @staticmethod
+    async def _shift_unread_counts(conn: PoolConnectionProxy, unread: dict[str, int]) -> None:
+        unread = {receiver: delta for receiver, delta in unread.items() if delta}
+        if not unread:
+            return
+
+        await conn.execute(
+            """insert into notification_unread_counts as c (receiver, unread)
+                select receiver, delta from unnest($1::text[], $2::int[]) as u(receiver, delta)
+                on conflict (receiver) do update
+                set unread = greatest(c.unread + excluded.unread, 0)
+            """,
+            list(unread),
+            list(unread.values()),
+        )
 
 
 _NOTIFICATION_REPO: NotificationRepo | None = None
@@ -0,0 +1,56 @@
+from typing import Mapping
+
+from asyncpg.pool import PoolConnectionProxy
+
+from event_sourcing.entity import EntityEvent
+from event_sourcing.event_store_client import event_subject
+from event_sourcing.wire import JSON_WIRE_FORMAT, WireFormat
+
+OUTBOX_CHANNEL = "event_outbox"
+# session advisory lock held by the one relay publishing the outbox
+OUTBOX_RELAY_LOCK_KEY = 0x6F757462
+
+
+class EventOutbox:
+    def __init__(self, wire_format: WireFormat = JSON_WIRE_FORMAT) -> None:
+        # events are encoded when they are written, the relay publishes the payloads as stored
+        self.wire_format = wire_format
+
+    async def enqueue(self, conn: PoolConnectionProxy, batch: list[EntityEvent]) -> None:
+        if not batch:
+            return
+
+        encode = self.wire_format.encode
+        await conn.execute(
+            """insert into event_outbox
+                (
+                    subject,
+                    payload,
+                    content_type
+                )
+                select subject, payload, $3::text from unnest($1::text[], $2::bytea[]) as batch(subject, payload)
+            """,
+            [event_subject(event) for event in batch],
+            [encode(event) for event in batch],
+            self.wire_format.header_value,
+        )
+
+    async def claim(self, conn: PoolConnectionProxy, *, limit: int) -> list[Mapping]:
+        return await conn.fetch(
+            "select id, subject, payload, content_type from event_outbox order by id limit $1 for update skip locked",
+            limit,
+        )
+
+    async def delete(self, conn: PoolConnectionProxy, *, ids: list[int]) -> None:
+        await conn.execute("delete from event_outbox where id = any($1::bigint[])", ids)
+
+
+_EVENT_OUTBOX: EventOutbox | None = None
+
+
+def get_event_outbox() -> EventOutbox:
+    global _EVENT_OUTBOX  # pylint: disable=global-statement
+    if _EVENT_OUTBOX is None:
+        _EVENT_OUTBOX = EventOutbox()
+
+    return _EVENT_OUTBOX
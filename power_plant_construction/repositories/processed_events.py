@@ -0,0 +1,46 @@
+from typing import Iterable
+
+from asyncpg.pool import PoolConnectionProxy
+
+
+class ProcessedEventRepo:
+    """Remembers which events a consumer already handled, so that redelivered events are skipped."""
+
+    async def claim(self, conn: PoolConnectionProxy, *, consumer: str, event_ids: Iterable[str]) -> set[str]:
+        """Records the events as processed by `consumer`, returns those that were not already.
+
+        Meant to run in the transaction that handles the events: if it rolls back the events
+        are free to be claimed again, if it commits, concurrent claims wait for it and get nothing.
+        """
+        records = await conn.fetch(
+            """insert into processed_events (consumer, event_id)
+                select $1, event_id from unnest($2::text[]) as claimed(event_id)
+                on conflict do nothing
+                returning event_id
+            """,
+            consumer,
+            list(set(event_ids)),
+        )
+
+        return {record["event_id"] for record in records}
+
+    async def prune(self, conn: PoolConnectionProxy, *, older_than: float) -> int:
+        """Forgets the events processed more than `older_than` seconds ago, returns how many."""
+        status = await conn.execute(
+            """delete from processed_events
+                where processed_at < (now() at time zone 'utc') - make_interval(secs => $1)
+            """,
+            older_than,
+        )
+        return int(status.rsplit(" ", 1)[-1])
+
+
+_PROCESSED_EVENT_REPO: ProcessedEventRepo | None = None
+
+
+def get_processed_event_repo() -> ProcessedEventRepo:
+    global _PROCESSED_EVENT_REPO  # pylint: disable=global-statement
+    if _PROCESSED_EVENT_REPO is None:
+        _PROCESSED_EVENT_REPO = ProcessedEventRepo()
+
+    return _PROCESSED_EVENT_REPO
@@ -0,0 +1,52 @@
+from asyncpg import Pool
+import orjson
+
+from event_sourcing.snapshots import Snapshot, SnapshotStore
+
+
+class SnapshotRepo(SnapshotStore):
+    def __init__(self, pool: Pool) -> None:
+        self._pool = pool
+
+    async def latest(self, *, entity_type: str, entity_id: str) -> Snapshot | None:
+        async with self._pool.acquire() as conn:
+            record = await conn.fetchrow(
+                """select version, sequence, state from entity_snapshots
+                    where entity_type=$1 and entity_id=$2
+                    order by version desc
+                    limit 1
+                """,
+                entity_type,
+                entity_id,
+            )
+        if record is None:
+            return None
+
+        return Snapshot(
+            entity_type=entity_type,
+            entity_id=entity_id,
+            version=record["version"],
+            sequence=record["sequence"],
+            state=orjson.loads(record["state"]),
+        )
+
+    async def save(self, snapshot: Snapshot) -> None:
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                """insert into entity_snapshots
+                    (
+                        entity_type,
+                        entity_id,
+                        version,
+                        sequence,
+                        state
+                    )
+                    values ($1, $2, $3, $4, $5)
+                    on conflict do nothing
+                """,
+                snapshot.entity_type,
+                snapshot.entity_id,
+                snapshot.version,
+                snapshot.sequence,
+                orjson.dumps(snapshot.state),
+            )
@@ -1,9 +1,8 @@
-from collections import defaultdict
-from typing import Mapping, Optional
+from typing import Any, Iterable, Mapping, Optional
 
-from contracts.schemas.task import TaskStatus
 from asyncpg.pool import PoolConnectionProxy
 
+from contracts.schemas.task import TaskStatus
 from event_sourcing.entity import EntityEvent
 from power_plant_construction.entities.task import (
     Task,
@@ -12,120 +11,272 @@ from power_plant_construction.entities.task import (
     TaskDependencyRemoved,
     TaskStatusUpdated,
 )
+from power_plant_construction.repositories.batch import BatchPersister, ConcurrencyConflict, insert_rows
+from power_plant_construction.repositories.keyset import Keyset, keyset_page
+
+
+class StaleDependencyGraph(ConcurrencyConflict):
+    """The dependencies changed since the version a write was checked against, `version` is the last committed one."""
+
+    def __init__(self, *, expected: int, version: int) -> None:
+        super().__init__(f"The dependency graph is at version {version}, not {expected}")
+        self.version = version
+
+
+_SELECT_TASKS_WITH_DEPENDENCIES = """
+    select
+        t.*,
+        array(select d.depends_on from task_dependencies d where d.entity_id = t.entity_id) as depends_on
+    from tasks t
+"""
 
 
 class TaskRepo:
+    def __init__(self) -> None:
+        self._persister = BatchPersister(
+            {
+                TaskCreated: self._persist_created,
+                TaskDependencyAdded: self._persist_dependencies_added,
+                TaskDependencyRemoved: self._persist_dependencies_removed,
+                TaskStatusUpdated: self._persist_status_updates,
+            },
+            versioned_table="tasks",
+        )
+
     @staticmethod
-    def _record_to_task(task_record: Mapping, *, depends_on: list[Mapping]) -> Task:
+    def _record_to_task(task_record: Mapping) -> Task:
         return Task(
             entity_id=task_record["entity_id"],
             title=task_record["title"],
             description=task_record["description"],
             status=task_record["status"],
             assignee=task_record["assignee"],
-            depends_on={record["depends_on"] for record in depends_on},
+            depends_on=set(task_record["depends_on"]),
             author=task_record["author"],
             created_at=task_record["created_at"],
             updated_at=task_record["updated_at"],
+            version=task_record["version"],
         )
 
     async def fetch_by_id(self, conn: PoolConnectionProxy, *, entity_id: str) -> Optional[Task]:
         task_record = await conn.fetchrow(
-            "select * from tasks where entity_id=$1",
-            entity_id,
-        )
-        depends_on_records = await conn.fetch(
-            "select * from task_dependencies where entity_id=$1",
+            f"{_SELECT_TASKS_WITH_DEPENDENCIES} where t.entity_id=$1",
             entity_id,
         )
         if not task_record:
             return None
 
-        return self._record_to_task(task_record, depends_on=depends_on_records)
+        return self._record_to_task(task_record)
 
-    async def fetch_by_assignee(self, conn: PoolConnectionProxy, *, assignee: str) -> list[Task]:
-        task_dependency_records = await conn.fetch(
-            "select * from tasks t join task_dependencies d on t.entity_id = d.entity_id where assignee=$1 ",
-            assignee,
+    async def fetch_many_by_ids(
+        self, conn: PoolConnectionProxy, *, entity_ids: Iterable[str]
+    ) -> dict[str, Task]:
+        task_records = await conn.fetch(
+            f"{_SELECT_TASKS_WITH_DEPENDENCIES} where t.entity_id = any($1::text[])",
+            list(set(entity_ids)),
         )
-        records_by_task_id: dict[str, list[Mapping]] = defaultdict(lambda: [])
-        task_dependency_records = task_dependency_records or []
-        for record in task_dependency_records:
-            records_by_task_id[record["entity_id"]].append(record)
 
-        return [
-            self._record_to_task(depends_on[0], depends_on=depends_on)
-            for depends_on in records_by_task_id.values()
-        ]
+        return {record["entity_id"]: self._record_to_task(record) for record in task_records}
 
-    async def fetch_pending_unblocked_tasks(self, conn: PoolConnectionProxy, *, assignee: str) -> list[Task]:
-        task_records = await conn.fetch(
-            f"select * from tasks t1 where t1.status=$1 and t1.assignee=$2 "
-            f"AND (NOT EXISTS "
-            f"( SELECT * FROM task_dependencies t2 WHERE t1.entity_id = t2.entity_id AND t2.depends_on "
-            f"NOT IN (SELECT entity_id FROM tasks WHERE status = $3)))", TaskStatus.PENDING,
-            assignee, TaskStatus.COMPLETED
+    async def fetch_existing_ids(self, conn: PoolConnectionProxy, *, entity_ids: Iterable[str]) -> set[str]:
+        records = await conn.fetch(
+            "select entity_id from tasks where entity_id = any($1::text[])",
+            list(set(entity_ids)),
         )
-        return [
-            self._record_to_task(record, depends_on=[])
-            for record in task_records
-        ]
 
-    async def persist(self, conn: PoolConnectionProxy, batch: list[EntityEvent]) -> None:
-        for event in batch:
-            if isinstance(event, TaskCreated):
-                await conn.execute(
-                    """insert into tasks
-                        (
-                            entity_id,
-                            title,
-                            description,
-                            author,
-                            assignee,
-                            status
-                        )
-                        values ($1, $2, $3, $4, $5, $6)
-                    """,
-                    event.entity_id,
-                    event.title,
-                    event.description,
-                    event.author,
-                    event.assignee,
-                    event.status,
-                )
-            elif isinstance(event, TaskDependencyAdded):
-                await conn.execute(
-                    """insert into task_dependencies
-                        (
-                            entity_id,
-                            depends_on
-                        )
-                        values ($1, $2)
-                    """,
-                    event.entity_id,
-                    event.depends_on,
-                )
-            elif isinstance(event, TaskDependencyRemoved):
-                await conn.execute(
-                    """delete from task_dependencies
-                        where entity_id=$1 and depends_on=$2
-                    """,
-                    event.entity_id,
-                    event.depends_on,
-                )
-            elif isinstance(event, TaskStatusUpdated):
-                await conn.execute(
-                    """update tasks
-                        set status=$2
-                        where entity_id=$1
-                    """,
-                    event.entity_id,
-                    event.status,
+        return {record["entity_id"] for record in records}
+
+    async def fetch_dependency_graph(
+        self, conn: PoolConnectionProxy
+    ) -> tuple[list[tuple[str, TaskStatus]], list[tuple[str, str]]]:
+        """Every task with its status and every `(task, depends_on)` edge."""
+        tasks = await conn.fetch("select entity_id, status from tasks")
+        dependencies = await conn.fetch("select entity_id, depends_on from task_dependencies")
+
+        return (
+            [(record["entity_id"], TaskStatus(record["status"])) for record in tasks],
+            [(record["entity_id"], record["depends_on"]) for record in dependencies],
+        )
+
+    @staticmethod
+    async def fetch_graph_version(conn: PoolConnectionProxy) -> int:
+        return await conn.fetchval("select version from dependency_graph_version")
+
+    @staticmethod
+    async def version_dependencies(
+        conn: PoolConnectionProxy, batch: list[EntityEvent], *, expected: int | None = None
+    ) -> None:
+        """Stamps the dependency events of `batch` with the next graph versions, one each.
+
+        With `expected` the graph has to still be at that version, the write was checked
+        against it: StaleDependencyGraph is raised right away, rather than once the other
+        transaction commits, when another one changed or is changing the dependencies.
+        """
+        events = [event for event in batch if isinstance(event, (TaskDependencyAdded, TaskDependencyRemoved))]
+        if not events:
+            return
+
+        if expected is None:
+            last = await conn.fetchval(
+                "update dependency_graph_version set version = version + $1 returning version", len(events)
+            )
+        else:
+            last = await conn.fetchval(
+                """with current as (select version from dependency_graph_version for update skip locked)
+                    update dependency_graph_version g set version = g.version + $2
+                    from current where current.version = $1
+                    returning g.version
+                """,
+                expected,
+                len(events),
+            )
+            if last is None:
+                raise StaleDependencyGraph(
+                    expected=expected, version=await TaskRepo.fetch_graph_version(conn)
                 )
-            else:
-                print(event)
-                print(type(event))
-                raise AssertionError()
+
+        for version, event in enumerate(events, start=last - len(events) + 1):
+            event.graph_version = version
+
+    async def fetch_by_assignee(
+        self,
+        conn: PoolConnectionProxy,
+        *,
+        assignee: str,
+        status: TaskStatus | None = None,
+        after: Keyset | None = None,
+        limit: int | None = None,
+    ) -> list[Task]:
+        conditions = ["t.assignee=$1"]
+        args: list[Any] = [assignee]
+        if status is not None:
+            args.append(status)
+            conditions.append(f"t.status=${len(args)}")
+
+        query = keyset_page(
+            _SELECT_TASKS_WITH_DEPENDENCIES,
+            conditions=conditions,
+            args=args,
+            after=after,
+            limit=limit,
+            alias="t",
+        )
+        task_records = await conn.fetch(query, *args)
+
+        return [self._record_to_task(record) for record in task_records]
+
+    async def fetch_pending_unblocked_tasks(
+        self,
+        conn: PoolConnectionProxy,
+        *,
+        assignee: str,
+        after: Keyset | None = None,
+        limit: int | None = None,
+    ) -> list[Task]:
+        args: list[Any] = [assignee]
+        query = keyset_page(
+            _SELECT_TASKS_WITH_DEPENDENCIES,
+            # the predicate of ix_tasks_unblocked_pending as literals, a generic plan can't match parameters to it
+            conditions=["t.assignee=$1", "t.status='PENDING'", "t.unfinished_dependencies=0"],
+            args=args,
+            after=after,
+            limit=limit,
+            alias="t",
+        )
+        task_records = await conn.fetch(query, *args)
+
+        return [self._record_to_task(record) for record in task_records]
+
+    async def persist(self, conn: PoolConnectionProxy, batch: list[EntityEvent]) -> None:
+        await self._persister.persist(conn, batch)
+
+    @staticmethod
+    async def _persist_created(conn: PoolConnectionProxy, events: list[TaskCreated]) -> None:
+        await insert_rows(
+            conn,
+            "tasks",
+            columns=("entity_id", "title", "description", "author", "assignee", "status"),
+            records=[
+                (event.entity_id, event.title, event.description, event.author, event.assignee, event.status)
+                for event in events
+            ],
+        )
+
+    @staticmethod
+    async def _persist_dependencies_added(
+        conn: PoolConnectionProxy, events: list[TaskDependencyAdded]
+    ) -> None:
+        await insert_rows(
+            conn,
+            "task_dependencies",
+            columns=("entity_id", "depends_on"),
+            records=[(event.entity_id, event.depends_on) for event in events],
+        )
+        await TaskRepo._shift_unfinished_dependencies(conn, events, delta=1)
+
+    @staticmethod
+    async def _persist_dependencies_removed(
+        conn: PoolConnectionProxy, events: list[TaskDependencyRemoved]
+    ) -> None:
+        await conn.execute(
+            """delete from task_dependencies d
+                using unnest($1::text[], $2::text[]) as removed(entity_id, depends_on)
+                where d.entity_id = removed.entity_id and d.depends_on = removed.depends_on
+            """,
+            [event.entity_id for event in events],
+            [event.depends_on for event in events],
+        )
+        await TaskRepo._shift_unfinished_dependencies(conn, events, delta=-1)
+
+    @staticmethod
+    async def _shift_unfinished_dependencies(
+        conn: PoolConnectionProxy,
+        events: list[TaskDependencyAdded] | list[TaskDependencyRemoved],
+        *,
+        delta: int,
+    ) -> None:
+        await conn.execute(
+            """update tasks t
+                set unfinished_dependencies = t.unfinished_dependencies + $4 * changed.count
+                from (
+                    select d.entity_id, count(*) as count
+                    from unnest($1::text[], $2::text[]) as d(entity_id, depends_on)
+                    where not exists (select 1 from tasks dep where dep.entity_id = d.depends_on and dep.status = $3)
+                    group by d.entity_id
+                ) changed
+                where t.entity_id = changed.entity_id
+            """,
+            [event.entity_id for event in events],
+            [event.depends_on for event in events],
+            TaskStatus.COMPLETED,
+            delta,
+        )
+
+    @staticmethod
+    async def _persist_status_updates(conn: PoolConnectionProxy, events: list[TaskStatusUpdated]) -> None:
+        await conn.executemany(
+            """update tasks
+                set status=$2
+                where entity_id=$1
+            """,
+            [(event.entity_id, event.status) for event in events],
+        )
+
+        completed = {event.entity_id for event in events if event.status == TaskStatus.COMPLETED}
+        if completed:
+            await conn.execute(
+                """update tasks t
+                    set unfinished_dependencies = t.unfinished_dependencies - unblocked.count
+                    from (
+                        select d.entity_id, count(*) as count
+                        from task_dependencies d
+                        where d.depends_on = any($1::text[])
+                        group by d.entity_id
+                    ) unblocked
+                    where t.entity_id = unblocked.entity_id
+                """,
+                list(completed),
+            )
 
 
 _TASK_REPO: TaskRepo | None = None
@@ -4,9 +4,13 @@ from asyncpg.pool import PoolConnectionProxy
 
 from event_sourcing.entity import EntityEvent
 from power_plant_construction.entities.user import User, UserCreated
+from power_plant_construction.repositories.batch import BatchPersister, insert_rows
 
 
 class UserRepo:
+    def __init__(self) -> None:
+        self._persister = BatchPersister({UserCreated: self._persist_created}, versioned_table="users")
+
     @staticmethod
     def _record_to_user(record: Mapping | None) -> User | None:
         if not record:
@@ -20,6 +24,7 @@ class UserRepo:
             salt=record["salt"],
             created_at=record["created_at"],
             updated_at=record["updated_at"],
+            version=record["version"],
         )
 
     async def fetch_by_id(self, conn: PoolConnectionProxy, *, entity_id: str) -> Optional[User]:
@@ -39,29 +44,19 @@ class UserRepo:
         return self._record_to_user(user_record)
 
     async def persist(self, conn: PoolConnectionProxy, batch: list[EntityEvent]) -> None:
-        for event in batch:
-            if isinstance(event, UserCreated):
-                await conn.execute(
-                    """insert into users
-                        (
-                            entity_id,
-                            login,
-                            name,
-                            role,
-                            password_hashed,
-                            salt
-                        )
-                        values ($1, $2, $3, $4, $5, $6)
-                    """,
-                    event.entity_id,
-                    event.login,
-                    event.name,
-                    event.role,
-                    event.password_hashed,
-                    event.salt,
-                )
-            else:
-                raise AssertionError()
+        await self._persister.persist(conn, batch)
+
+    @staticmethod
+    async def _persist_created(conn: PoolConnectionProxy, events: list[UserCreated]) -> None:
+        await insert_rows(
+            conn,
+            "users",
+            columns=("entity_id", "login", "name", "role", "password_hashed", "salt"),
+            records=[
+                (event.entity_id, event.login, event.name, event.role, event.password_hashed, event.salt)
+                for event in events
+            ],
+        )
 
 
 _USER_REPO: UserRepo | None = None
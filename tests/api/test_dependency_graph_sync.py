@@ -0,0 +1,128 @@
+from contextlib import asynccontextmanager, nullcontext
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Callable
+import asyncio
+
+from contracts.schemas.task import TaskStatus
+from event_sourcing.event_store_client import EventStoreClient
+from power_plant_construction.api.dependency_graph_sync import DependencyGraphSync
+from power_plant_construction.entities.task import (
+    TaskCreated,
+    TaskDependencyAdded,
+    TaskDependencyRemoved,
+    TaskStatusUpdated,
+)
+from power_plant_construction.planning.dependency_graph import DependencyGraph
+from power_plant_construction.planning.scheduling import ScheduleTracker
+from tests.event_sourcing.test_event_store_client import LocalNats, publish, task_created
+
+
+class LocalPool:
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        yield SimpleNamespace(transaction=lambda **_: nullcontext())
+
+
+class SnapshotRepo:
+    """What the database holds, `while_loading` runs between reading the version and the rows."""
+
+    def __init__(
+        self,
+        version: int,
+        tasks: list[tuple[str, TaskStatus]],
+        dependencies: list[tuple[str, str]],
+        while_loading: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
+        self.version = version
+        self.tasks = tasks
+        self.dependencies = dependencies
+        self.while_loading = while_loading
+
+    async def fetch_graph_version(self, _: Any) -> int:
+        return self.version
+
+    async def fetch_dependency_graph(
+        self, _: Any
+    ) -> tuple[list[tuple[str, TaskStatus]], list[tuple[str, str]]]:
+        if self.while_loading is not None:
+            await self.while_loading()
+        return self.tasks, self.dependencies
+
+
+def client() -> tuple[EventStoreClient, LocalNats]:
+    nc = LocalNats()
+    event_store = EventStoreClient(
+        nats_dsn="",
+        event_types={TaskCreated, TaskDependencyAdded, TaskDependencyRemoved, TaskStatusUpdated},
+    )
+    event_store._nc = nc  # type: ignore[assignment]  # pylint: disable=protected-access
+    return event_store, nc
+
+
+class DependencyGraphSyncTests:
+    def test_what_is_committed_while_loading_is_replayed_on_top(self) -> None:
+        async def run() -> tuple[DependencyGraph, ScheduleTracker]:
+            event_store, nc = client()
+
+            async def commit_more() -> None:
+                # already in the snapshot, then written after it was taken
+                await publish(nc, TaskDependencyAdded(entity_id="t1", depends_on="t0", graph_version=1))
+                await publish(nc, TaskDependencyRemoved(entity_id="t1", depends_on="t0", graph_version=2))
+                await publish(nc, task_created("t3"))
+                await publish(nc, TaskDependencyAdded(entity_id="t3", depends_on="t2", graph_version=3))
+                for _ in range(5):
+                    await asyncio.sleep(0)
+
+            repo = SnapshotRepo(
+                1, [(task, TaskStatus.PENDING) for task in ("t0", "t1", "t2")], [("t1", "t0")], commit_more
+            )
+            graph = DependencyGraph()
+            tracker = ScheduleTracker(graph)
+            sync = DependencyGraphSync(graph, tracker, repo, resync_after=60)  # type: ignore[arg-type]
+            followers = await sync.start(event_store, LocalPool())  # type: ignore[arg-type]
+            # and from then on straight to the graph
+            await publish(nc, TaskDependencyAdded(entity_id="t2", depends_on="t1", graph_version=4))
+            await asyncio.sleep(0)
+
+            await event_store.close_subscriptions()
+            for follower in followers:
+                follower.cancel()
+            await asyncio.gather(*followers, return_exceptions=True)
+            return graph, tracker
+
+        graph, tracker = asyncio.run(run())
+        assert graph.version == 4
+        assert set(graph.dependencies()) == {("t3", "t2"), ("t2", "t1")}
+        assert [tracker.earliest_start(task) for task in ("t0", "t1", "t2", "t3")] == [0, 0, 1, 2]
+
+    def test_a_lost_message_or_a_missing_version_reloads_the_graph(self) -> None:
+        async def run() -> list[bool]:
+            event_store, nc = client()
+            graph = DependencyGraph()
+            repo = SnapshotRepo(0, [("t0", TaskStatus.PENDING), ("t1", TaskStatus.PENDING)], [])
+            sync = DependencyGraphSync(  # type: ignore[arg-type]
+                graph, ScheduleTracker(graph), repo, resync_after=0, check_interval=3600
+            )
+            followers = await sync.start(event_store, LocalPool())  # type: ignore[arg-type]
+            needs_resync = [sync.needs_resync(event_store)]
+
+            event_store.interruptions += 1
+            needs_resync.append(sync.needs_resync(event_store))
+            await sync.resync(event_store, LocalPool())  # type: ignore[arg-type]
+            needs_resync.append(sync.needs_resync(event_store))
+
+            # version 1 never arrives
+            await publish(nc, TaskDependencyAdded(entity_id="t1", depends_on="t0", graph_version=2))
+            await asyncio.sleep(0.01)
+            needs_resync.append(sync.needs_resync(event_store))
+            repo.version, repo.dependencies = 2, [("t1", "t0")]
+            await sync.resync(event_store, LocalPool())  # type: ignore[arg-type]
+            needs_resync.append(sync.needs_resync(event_store))
+
+            await event_store.close_subscriptions()
+            for follower in followers:
+                follower.cancel()
+            await asyncio.gather(*followers, return_exceptions=True)
+            return needs_resync
+
+        assert asyncio.run(run()) == [False, True, False, True, False]
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import asyncio
+
+from fastapi import HTTPException, Response
+import pytest
+
+from contracts.schemas.task import TaskStatus
+from power_plant_construction.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+)
+from power_plant_construction.api.resources.tasks import get_tasks
+
+
+class CursorTests:
+    @pytest.mark.parametrize(
+        "created_at",
+        [
+            datetime(2023, 5, 1, 12, 30, 15, 123456),
+            datetime(2023, 5, 1, tzinfo=timezone.utc),
+            datetime(2023, 5, 1, tzinfo=timezone(timedelta(hours=-3))),
+        ],
+    )
+    @pytest.mark.parametrize("entity_id", ["t1", "a/b+c=", "ünïcode", ""])
+    def test_a_cursor_decodes_to_what_was_encoded(self, created_at: datetime, entity_id: str) -> None:
+        cursor = encode_cursor(created_at, entity_id)
+        assert cursor.isascii() and "/" not in cursor and "+" not in cursor
+        assert decode_cursor(cursor) == (created_at, entity_id)
+
+    def test_no_cursor_starts_from_the_first_page(self) -> None:
+        assert decode_cursor(None) is None
+
+    @pytest.mark.parametrize(
+        "cursor", ["", "not base64!", "bm90IGpzb24=", "WzFd", "WyJub3QgYSBkYXRlIiwgInQxIl0="]
+    )
+    def test_a_malformed_cursor_is_a_bad_request(self, cursor: str) -> None:
+        with pytest.raises(HTTPException) as raised:
+            decode_cursor(cursor)
+        assert raised.value.status_code == 400
+
+    def test_only_a_full_page_points_at_the_next_one(self) -> None:
+        created_at = datetime(2023, 5, 1)
+        page = [SimpleNamespace(created_at=created_at, entity_id=f"t{i}") for i in range(3)]
+
+        response = Response()
+        set_next_cursor(response, page[:2], limit=3)
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+        response = Response()
+        set_next_cursor(response, page, limit=3)
+        assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == (created_at, "t2")
+
+
+class GetTasksTests:
+    def test_unblocked_pending_tasks_cannot_be_filtered_by_another_status(self) -> None:
+        with pytest.raises(HTTPException) as raised:
+            asyncio.run(
+                get_tasks(
+                    response=Response(),
+                    only_unblocked_pending=True,
+                    status=TaskStatus.COMPLETED,
+                    after=None,
+                    limit=10,
+                    pool=None,
+                    task_repo=None,
+                    logged_in_user=None,
+                )
+            )
+        assert raised.value.status_code == 400
@@ -0,0 +1,75 @@
+import pytest
+
+from contracts.schemas.user import UserRole
+from power_plant_construction.api import principal_cache
+from power_plant_construction.api.principal_cache import PrincipalCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(principal_cache, "monotonic", clock)
+    return clock
+
+
+class PrincipalCacheTests:
+    def test_an_entry_expires_after_the_ttl(self, clock: Clock) -> None:
+        cache = PrincipalCache(max_size=10, ttl=60)
+        cache.put("u1", UserRole.MANAGER)
+
+        clock.now += 60
+        assert cache.get("u1") is UserRole.MANAGER
+        clock.now += 0.001
+        assert cache.get("u1") is None
+        assert len(cache) == 0
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_storing_again_restarts_the_ttl(self, clock: Clock) -> None:
+        cache = PrincipalCache(max_size=10, ttl=60)
+        cache.put("u1", UserRole.WORKER)
+        clock.now += 50
+        cache.put("u1", UserRole.MANAGER)
+        clock.now += 50
+
+        assert cache.get("u1") is UserRole.MANAGER
+
+    def test_the_least_recently_used_entry_is_evicted(self, clock: Clock) -> None:
+        cache = PrincipalCache(max_size=2, ttl=60)
+        cache.put("u1", UserRole.WORKER)
+        cache.put("u2", UserRole.WORKER)
+        # reading u1 makes u2 the least recently used
+        cache.get("u1")
+        cache.put("u3", UserRole.MANAGER)
+
+        assert len(cache) == 2
+        assert cache.get("u2") is None
+        assert cache.get("u1") is UserRole.WORKER
+        assert cache.get("u3") is UserRole.MANAGER
+
+    def test_invalidating_and_clearing(self, clock: Clock) -> None:
+        cache = PrincipalCache(max_size=10, ttl=60)
+        cache.put("u1", UserRole.WORKER)
+        cache.put("u2", UserRole.WORKER)
+
+        cache.invalidate("u1")
+        cache.invalidate("unknown")
+        assert cache.get("u1") is None
+        assert cache.get("u2") is UserRole.WORKER
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_a_zero_size_disables_the_cache(self, clock: Clock) -> None:
+        cache = PrincipalCache(max_size=0, ttl=60)
+        cache.put("u1", UserRole.WORKER)
+
+        assert cache.get("u1") is None
+        assert len(cache) == 0
@@ -0,0 +1,74 @@
+import pytest
+
+from power_plant_construction.api import unread_counts
+from power_plant_construction.api.unread_counts import UnreadCountCache
+from tests.api.test_principal_cache import Clock
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(unread_counts, "monotonic", clock)
+    return clock
+
+
+class UnreadCountCacheTests:
+    def test_a_count_read_across_an_invalidation_is_not_stored(self, clock: Clock) -> None:
+        cache = UnreadCountCache(max_size=10, ttl=30)
+        generation = cache.generation("u1")
+        # a notification for u1 goes by while its count is read
+        cache.invalidate("u1")
+        cache.put("u1", 3, generation=generation)
+        assert cache.get("u1") is None
+
+        cache.put("u1", 4, generation=cache.generation("u1"))
+        assert cache.get("u1") == 4
+
+    def test_invalidating_another_receiver_keeps_the_generation(self, clock: Clock) -> None:
+        cache = UnreadCountCache(max_size=10, ttl=30)
+        generation = cache.generation("u1")
+        cache.invalidate("u2")
+
+        cache.put("u1", 3, generation=generation)
+
+        assert cache.get("u1") == 3
+
+    def test_forgotten_generations_stay_safe(self, clock: Clock) -> None:
+        cache = UnreadCountCache(max_size=2, ttl=30)
+        cache.invalidate("u1")
+        own = cache.generation("u1")
+        never_invalidated = cache.generation("u4")
+        invalidated_then_forgotten = cache.generation("u5")
+        cache.invalidate("u5")
+        # u1 and u5 drop out of the generations kept
+        for receiver in ("u2", "u3"):
+            cache.invalidate(receiver)
+
+        # the forgotten generation moved past what these reads started from, u1 included
+        # although it was not invalidated since: a wasted read, never a stale count
+        cache.put("u1", 1, generation=own)
+        cache.put("u4", 4, generation=never_invalidated)
+        cache.put("u5", 5, generation=invalidated_then_forgotten)
+        assert [cache.get(receiver) for receiver in ("u1", "u4", "u5")] == [None, None, None]
+
+        cache.put("u1", 1, generation=cache.generation("u1"))
+        assert cache.get("u1") == 1
+
+    def test_a_count_expires_after_the_ttl(self, clock: Clock) -> None:
+        cache = UnreadCountCache(max_size=10, ttl=30)
+        cache.put("u1", 2)
+
+        clock.now += 30
+        assert cache.get("u1") == 2
+        clock.now += 0.001
+        assert cache.get("u1") is None
+        assert len(cache) == 0
+
+    def test_the_least_recently_used_count_is_evicted(self, clock: Clock) -> None:
+        cache = UnreadCountCache(max_size=2, ttl=30)
+        cache.put("u1", 1)
+        cache.put("u2", 2)
+        cache.get("u1")
+        cache.put("u3", 3)
+
+        assert [cache.get(receiver) for receiver in ("u1", "u2", "u3")] == [1, None, 3]
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from power_plant_construction.app.micro_batcher import MicroBatcher
+
+
+class MicroBatcherTests:
+    def test_batches_are_flushed_once_full(self) -> None:
+        batches: list[list[int]] = []
+
+        async def flush(batch: list[int]) -> None:
+            batches.append(batch)
+
+        async def run() -> None:
+            batcher: MicroBatcher[int] = MicroBatcher(flush=flush, max_size=3, max_delay=60)
+            submitted = [asyncio.create_task(batcher.submit(item)) for item in range(6)]
+            await asyncio.wait_for(asyncio.gather(*submitted), timeout=1)
+
+        asyncio.run(run())
+        assert batches == [[0, 1, 2], [3, 4, 5]]
+
+    def test_a_batch_is_flushed_after_the_delay(self) -> None:
+        batches: list[list[int]] = []
+
+        async def flush(batch: list[int]) -> None:
+            batches.append(batch)
+
+        async def run() -> None:
+            batcher: MicroBatcher[int] = MicroBatcher(flush=flush, max_size=100, max_delay=0.01)
+            await asyncio.wait_for(asyncio.gather(batcher.submit(1), batcher.submit(2)), timeout=1)
+
+        asyncio.run(run())
+        assert batches == [[1, 2]]
+
+    def test_a_failed_batch_is_retried_item_by_item(self) -> None:
+        batches: list[list[int]] = []
+
+        async def flush(batch: list[int]) -> None:
+            if 13 in batch:
+                raise ValueError(batch)
+            batches.append(batch)
+
+        async def run() -> list:
+            batcher: MicroBatcher[int] = MicroBatcher(flush=flush, max_size=3, max_delay=60)
+            return await asyncio.gather(
+                *(batcher.submit(item) for item in (12, 13, 14)), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert results[0] is None and results[2] is None
+        assert isinstance(results[1], ValueError)
+        assert batches == [[12], [14]]
+
+    def test_a_fatal_error_fails_the_whole_batch_at_once(self) -> None:
+        batches: list[list[int]] = []
+
+        async def flush(batch: list[int]) -> None:
+            batches.append(batch)
+            raise ConnectionResetError()
+
+        async def run() -> list:
+            batcher: MicroBatcher[int] = MicroBatcher(flush=flush, max_size=3, max_delay=60)
+            return await asyncio.gather(*(batcher.submit(item) for item in (1, 2, 3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert [type(result) for result in results] == [ConnectionResetError] * 3
+        assert batches == [[1, 2, 3]]
+
+    def test_a_cancelled_flush_cancels_its_submitters(self) -> None:
+        async def flush(batch: list[int]) -> None:
+            raise asyncio.CancelledError()
+
+        async def run() -> list:
+            batcher: MicroBatcher[int] = MicroBatcher(flush=flush, max_size=2, max_delay=60)
+            submitted = [asyncio.create_task(batcher.submit(item)) for item in (1, 2)]
+            return await asyncio.wait_for(asyncio.gather(*submitted, return_exceptions=True), timeout=1)
+
+        results = asyncio.run(run())
+        assert [type(result) for result in results] == [asyncio.CancelledError] * 2
+
+    def test_close_flushes_what_is_pending(self) -> None:
+        batches: list[list[int]] = []
+
+        async def flush(batch: list[int]) -> None:
+            batches.append(batch)
+
+        async def run() -> None:
+            batcher: MicroBatcher[int] = MicroBatcher(flush=flush, max_size=100, max_delay=60)
+            submitted = asyncio.create_task(batcher.submit(1))
+            await asyncio.sleep(0)
+            await batcher.close()
+            await asyncio.wait_for(submitted, timeout=1)
+
+        asyncio.run(run())
+        assert batches == [[1]]
+
+    def test_rejects_invalid_limits(self) -> None:
+        async def flush(batch: list[int]) -> None:
+            pass
+
+        with pytest.raises(ValueError):
+            MicroBatcher(flush=flush, max_size=0, max_delay=1)
@@ -0,0 +1,98 @@
+from random import Random
+import asyncio
+
+import pytest
+
+from power_plant_construction.app.worker_pool import PartitionedWorkerPool
+
+
+async def settle() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class PartitionedWorkerPoolTests:
+    def test_items_of_a_key_are_handled_in_submission_order(self) -> None:
+        random = Random(7)
+        handled: dict[str, list[int]] = {}
+
+        async def handle(item: tuple[str, int]) -> None:
+            key, index = item
+            await asyncio.sleep(random.random() / 1000)
+            handled.setdefault(key, []).append(index)
+
+        async def run() -> None:
+            pool: PartitionedWorkerPool[tuple[str, int]] = PartitionedWorkerPool(
+                handler=handle, concurrency=4, queue_depth=8
+            )
+            pool.start()
+            for index in range(200):
+                key = f"k{random.randrange(10)}"
+                await pool.submit(key, (key, index))
+            await asyncio.wait_for(pool.close(), timeout=5)
+
+        asyncio.run(run())
+        assert sum(map(len, handled.values())) == 200
+        for indexes in handled.values():
+            assert indexes == sorted(indexes)
+
+    @pytest.mark.parametrize("same_key, accepted", [(True, 1 + 3), (False, 2 + 3)])
+    def test_waiting_items_are_bounded_across_partitions(self, same_key: bool, accepted: int) -> None:
+        # each worker holds one item while the handler is stuck, `queue_depth` more wait
+        async def run() -> tuple[int, list[int]]:
+            release = asyncio.Event()
+            handled: list[int] = []
+
+            async def handle(item: int) -> None:
+                await release.wait()
+                handled.append(item)
+
+            pool: PartitionedWorkerPool[int] = PartitionedWorkerPool(
+                handler=handle, concurrency=2, queue_depth=3
+            )
+            pool.start()
+            # two keys landing in different partitions, string hashes change from one run to the next
+            second = next(f"k{index}" for index in range(1, 100) if hash(f"k{index}") % 2 != hash("k0") % 2)
+            keys = ["k0"] * 10 if same_key else [("k0", second)[index % 2] for index in range(10)]
+            submitting = []
+            for index, key in enumerate(keys):
+                submitting.append(asyncio.create_task(pool.submit(key, index)))
+                await settle()
+            done = sum(submission.done() for submission in submitting)
+
+            release.set()
+            await asyncio.wait_for(asyncio.gather(*submitting), timeout=1)
+            await asyncio.wait_for(pool.close(), timeout=1)
+            return done, handled
+
+        done, handled = asyncio.run(run())
+        assert done == accepted
+        assert sorted(handled) == list(range(10))
+
+    def test_a_failing_item_does_not_stop_its_partition(self) -> None:
+        handled: list[int] = []
+
+        async def handle(item: int) -> None:
+            if item == 1:
+                raise RuntimeError("boom")
+            handled.append(item)
+
+        async def run() -> None:
+            pool: PartitionedWorkerPool[int] = PartitionedWorkerPool(
+                handler=handle, concurrency=1, queue_depth=1
+            )
+            pool.start()
+            for item in range(3):
+                await pool.submit("k", item)
+            await asyncio.wait_for(pool.close(), timeout=1)
+
+        asyncio.run(run())
+        assert handled == [0, 2]
+
+    @pytest.mark.parametrize("concurrency, queue_depth", [(0, 1), (1, 0)])
+    def test_sizes_must_be_positive(self, concurrency: int, queue_depth: int) -> None:
+        async def handle(_: int) -> None:
+            pass
+
+        with pytest.raises(ValueError):
+            PartitionedWorkerPool(handler=handle, concurrency=concurrency, queue_depth=queue_depth)
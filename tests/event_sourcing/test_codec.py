@@ -0,0 +1,159 @@
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+import orjson
+import pytest
+
+from contracts.schemas.notification import NotificationStatus
+from contracts.schemas.task import TaskStatus
+from contracts.schemas.user import UserRole
+from event_sourcing.codec import EventCodec, codec_for
+from event_sourcing.entity import EntityEvent
+from power_plant_construction.entities.notification import NotificationCreated, NotificationStatusUpdated
+from power_plant_construction.entities.task import (
+    TaskCreated,
+    TaskDependencyAdded,
+    TaskDependencyRemoved,
+    TaskStatusUpdated,
+)
+from power_plant_construction.entities.user import UserCreated
+
+# whole milliseconds, what the payload keeps of a timestamp
+CREATED_AT = datetime(2023, 5, 1, 12, 30, 15, 123000)
+PUBLISHED_AT = datetime(2023, 5, 1, 12, 30, 16, 456000)
+
+
+class TaskDue(EntityEvent):
+    """Covers the field kinds the application events don't have: datetimes, optional or not."""
+
+    __slots__ = ("_due", "_reminder", "_status")
+    __entity_type__ = "Task"
+
+    def __init__(
+        self,
+        *,
+        entity_id: str,
+        due: datetime,
+        reminder: datetime | None = None,
+        status: TaskStatus | None = None,
+        event_created_at: datetime | None = None,
+        published_at: datetime | None = None,
+    ) -> None:
+        super().__init__(event_created_at=event_created_at, published_at=published_at, entity_id=entity_id)
+        self._due = due
+        self._reminder = reminder
+        self._status = status
+
+    def body(self) -> dict[str, Any]:
+        return {
+            "due": int(self._due.timestamp() * 1000),
+            "reminder": None if self._reminder is None else int(self._reminder.timestamp() * 1000),
+            "status": self._status,
+        }
+
+
+def sample_events() -> list[EntityEvent]:
+    dated = {"event_created_at": CREATED_AT, "published_at": PUBLISHED_AT}
+    return [
+        TaskCreated(
+            entity_id="t1",
+            title="Pour the foundation",
+            description='ünïcode "quoted" \n',
+            status=TaskStatus.PENDING,
+            assignee="u1",
+            author="u0",
+            **dated,
+        ),
+        TaskDependencyAdded(entity_id="t1", depends_on="t0", graph_version=7, **dated),
+        TaskDependencyRemoved(entity_id="t1", depends_on="t0", **dated),
+        TaskStatusUpdated(entity_id="t1", status=TaskStatus.COMPLETED, author="u0", **dated),
+        NotificationCreated(
+            entity_id="n1", title="T", content="", status=NotificationStatus.UNREAD, receiver="u1", **dated
+        ),
+        NotificationStatusUpdated(entity_id="n1", status=NotificationStatus.READ, receiver=None, **dated),
+        UserCreated(
+            entity_id="u1",
+            login="login",
+            name="Name",
+            role=UserRole.MANAGER,
+            password_hashed="hash",
+            salt="salt",
+            **dated,
+        ),
+        TaskDue(
+            entity_id="t1", due=datetime(2024, 1, 2, 3, 4, 5, 6000), status=TaskStatus.IN_PROGRESS, **dated
+        ),
+        TaskDue(entity_id="t1", due=CREATED_AT, reminder=PUBLISHED_AT, **dated),
+    ]
+
+
+def event_ids(events: list[EntityEvent]) -> list[str]:
+    return [f"{type(event).__name__}-{index}" for index, event in enumerate(events)]
+
+
+class EventCodecTests:
+    @pytest.mark.parametrize("event", sample_events(), ids=event_ids(sample_events()))
+    def test_encoding_matches_head_and_body(self, event: EntityEvent) -> None:
+        event._event_id = uuid4()  # pylint: disable=protected-access
+
+        encoded = codec_for(type(event)).encode(event)
+
+        assert orjson.loads(encoded) == orjson.loads(
+            orjson.dumps({"head": event.head(), "body": event.body()})
+        )
+
+    @pytest.mark.parametrize("event", sample_events(), ids=event_ids(sample_events()))
+    def test_an_event_decodes_to_what_was_encoded(self, event: EntityEvent) -> None:
+        raw = event.serialize()
+
+        decoded = type(event).deserialise(raw)
+
+        assert type(decoded) is type(event)
+        assert decoded.entity_id == event.entity_id
+        assert str(decoded.event_id) == str(event.event_id)
+        assert decoded.event_created_at == event.event_created_at
+        assert decoded.published_at == event.published_at
+        assert decoded.body() == event.body()
+        assert decoded.source_dump == orjson.loads(raw)
+
+    def test_encoding_stamps_the_publication_and_the_event_id_once(self) -> None:
+        event = TaskDependencyAdded(entity_id="t1", depends_on="t0", event_created_at=CREATED_AT)
+
+        first = event.serialize()
+
+        assert event.published_at is not None
+        assert event.serialize() == first
+
+    def test_a_missing_field_without_a_default(self) -> None:
+        payload = orjson.loads(
+            TaskStatusUpdated(entity_id="t1", status=TaskStatus.PENDING, author="u0").serialize()
+        )
+        del payload["body"]["author"]
+
+        with pytest.raises(ValueError, match="TaskStatusUpdated payload is missing author"):
+            TaskStatusUpdated.deserialise(orjson.dumps(payload))
+
+    def test_a_missing_field_with_a_default_gets_it(self) -> None:
+        payload = orjson.loads(TaskDependencyAdded(entity_id="t1", depends_on="t0").serialize())
+        # written before the field existed
+        del payload["body"]["graph_version"]
+
+        decoded = TaskDependencyAdded.deserialise(orjson.dumps(payload))
+
+        assert decoded.depends_on == "t0"
+        assert decoded.graph_version is None
+
+    def test_an_unknown_enum_value_is_rejected(self) -> None:
+        payload = orjson.loads(
+            TaskStatusUpdated(entity_id="t1", status=TaskStatus.PENDING, author="u0").serialize()
+        )
+        payload["body"]["status"] = "LOST"
+
+        with pytest.raises(KeyError):
+            TaskStatusUpdated.deserialise(orjson.dumps(payload))
+
+    def test_codecs_are_generated_once_per_event_type(self) -> None:
+        assert codec_for(TaskCreated) is codec_for(TaskCreated)
+        assert codec_for(TaskCreated) is not codec_for(TaskStatusUpdated)
+        assert [field.name for field in EventCodec(TaskDue).fields] == ["due", "reminder", "status"]
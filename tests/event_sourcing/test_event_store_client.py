@@ -0,0 +1,207 @@
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable
+import asyncio
+
+from contracts.schemas.task import TaskStatus
+from event_sourcing.event_store_client import EventStoreClient, EventStoreSubscription, event_subject
+from power_plant_construction.entities.task import Task, TaskCreated, TaskStatusUpdated
+from tests.event_sourcing.test_subject_trie import nats_matches
+
+
+class LocalSubscription:
+    def __init__(self, nc: "LocalNats", subject: str, cb: Callable[[Any], Awaitable[None]]) -> None:
+        self._nc = nc
+        self.subject = subject
+        self.cb = cb
+
+    async def unsubscribe(self) -> None:
+        self._nc.subscriptions.remove(self)
+
+    async def drain(self) -> None:
+        await self.unsubscribe()
+
+
+class LocalNats:
+    """Delivers every published message to each subscription matching it, as the server would."""
+
+    is_connected = True
+    is_draining = False
+
+    def __init__(self) -> None:
+        self.subscriptions: list[LocalSubscription] = []
+
+    async def subscribe(self, subject: str, cb: Callable[[Any], Awaitable[None]]) -> LocalSubscription:
+        subscription = LocalSubscription(self, subject, cb)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    async def flush(self) -> None:
+        pass
+
+    async def publish(self, subject: str, data: bytes) -> None:
+        msg = SimpleNamespace(subject=subject, data=data, headers=None)
+        for subscription in list(self.subscriptions):
+            if nats_matches(subscription.subject, subject):
+                await subscription.cb(msg)
+
+    @property
+    def subjects(self) -> list[str]:
+        return sorted(subscription.subject for subscription in self.subscriptions)
+
+
+def status_updated(entity_id: str) -> TaskStatusUpdated:
+    return TaskStatusUpdated(entity_id=entity_id, status=TaskStatus.IN_PROGRESS, author="u0")
+
+
+def task_created(entity_id: str) -> TaskCreated:
+    return TaskCreated(
+        entity_id=entity_id,
+        title="T",
+        description="",
+        status=TaskStatus.PENDING,
+        assignee="u1",
+        author="u0",
+    )
+
+
+async def publish(nc: LocalNats, event: Any) -> None:
+    await nc.publish(event_subject(event), event.serialize())
+
+
+class EventStoreClientSubscribeTests:
+    def _client(self) -> tuple[EventStoreClient, LocalNats]:
+        nc = LocalNats()
+        client = EventStoreClient(nats_dsn="", event_types={TaskCreated, TaskStatusUpdated})
+        client._nc = nc  # type: ignore[assignment]  # pylint: disable=protected-access
+        return client, nc
+
+    def test_each_subscriber_gets_each_event_once(self) -> None:
+        one_task = EventStoreSubscription(event_class="entity", entity_type=Task, entity_id="t1")
+        created_t1 = EventStoreSubscription(event_type=TaskCreated, entity_type=Task, entity_id="t1")
+        updates = EventStoreSubscription(event_type=TaskStatusUpdated, entity_type=Task)
+        every_task = EventStoreSubscription(event_class="entity", entity_type=Task)
+
+        async def run() -> tuple[list[Counter], list[list[str]]]:
+            client, nc = self._client()
+            received = [Counter() for _ in range(4)]
+            subjects = []
+
+            async def consume(index: int, subscription: EventStoreSubscription) -> None:
+                async for event in client.subscribe(subscription):
+                    received[index][(type(event).__name__, event.entity_id)] += 1
+
+            async def publish_all() -> None:
+                for entity_id in ("t1", "t2"):
+                    await publish(nc, task_created(entity_id))
+                    await publish(nc, status_updated(entity_id))
+
+            consumers = []
+            for index, subscription in enumerate([one_task, created_t1, updates, every_task]):
+                consumers.append(asyncio.create_task(consume(index, subscription)))
+                await asyncio.sleep(0)
+                subjects.append(nc.subjects)
+                if subscription is updates:
+                    # the t1 update reaches both NATS subscriptions
+                    await publish_all()
+            await publish_all()
+
+            await client.close_subscriptions()
+            await asyncio.gather(*consumers)
+            return received, subjects
+
+        received, subjects = asyncio.run(run())
+        assert subjects == [
+            ["events.entity.Task.t1.*"],
+            ["events.entity.Task.t1.*"],
+            ["events.entity.Task.*.TaskStatusUpdated", "events.entity.Task.t1.*"],
+            # the broader pattern took over the two it covers
+            ["events.entity.Task.*.*"],
+        ]
+        assert received == [
+            Counter({("TaskCreated", "t1"): 2, ("TaskStatusUpdated", "t1"): 2}),
+            Counter({("TaskCreated", "t1"): 2}),
+            Counter({("TaskStatusUpdated", "t1"): 2, ("TaskStatusUpdated", "t2"): 2}),
+            Counter(
+                {
+                    (name, entity_id): 1
+                    for name in ("TaskCreated", "TaskStatusUpdated")
+                    for entity_id in ("t1", "t2")
+                }
+            ),
+        ]
+
+    def test_narrower_subscriptions_come_back_when_the_broad_one_ends(self) -> None:
+        async def run() -> tuple[list[str], list[str], list[str]]:
+            client, nc = self._client()
+            received: list[str] = []
+
+            async def consume(subscription: EventStoreSubscription, into: list[str] | None) -> None:
+                async for event in client.subscribe(subscription):
+                    if into is not None:
+                        into.append(event.entity_id)
+
+            one_task = asyncio.create_task(
+                consume(
+                    EventStoreSubscription(event_class="entity", entity_type=Task, entity_id="t1"), received
+                )
+            )
+            await asyncio.sleep(0)
+            every_task = asyncio.create_task(consume(EventStoreSubscription(event_class="entity"), None))
+            await asyncio.sleep(0)
+            broad = nc.subjects
+
+            every_task.cancel()
+            await asyncio.gather(every_task, return_exceptions=True)
+            narrow = nc.subjects
+            await publish(nc, status_updated("t1"))
+            await publish(nc, status_updated("t2"))
+            await client.close_subscriptions()
+            await one_task
+            return broad, narrow, received
+
+        broad, narrow, received = asyncio.run(run())
+        assert broad == ["events.entity.*.*.*"]
+        assert narrow == ["events.entity.Task.t1.*"]
+        assert received == ["t1"]
+
+    def test_closing_keeps_what_a_full_queue_holds(self) -> None:
+        async def run() -> list[str]:
+            client, nc = self._client()
+            received: list[str] = []
+
+            async def consume() -> None:
+                async for event in client.subscribe(
+                    EventStoreSubscription(event_class="entity"), pending_limit=3
+                ):
+                    received.append(event.entity_id)
+
+            consumer = asyncio.create_task(consume())
+            await asyncio.sleep(0)
+            # the subscriber doesn't get to run in between, t4 and t5 find the queue full
+            for entity_id in ("t1", "t2", "t3", "t4", "t5"):
+                await publish(nc, status_updated(entity_id))
+            await client.close_subscriptions()
+            await asyncio.wait_for(consumer, timeout=1)
+            return received
+
+        assert asyncio.run(run()) == ["t1", "t2", "t3"]
+
+    def test_a_malformed_message_is_skipped(self) -> None:
+        async def run() -> list[str]:
+            client, nc = self._client()
+            received: list[str] = []
+
+            async def consume() -> None:
+                async for event in client.subscribe(EventStoreSubscription(event_class="entity")):
+                    received.append(event.entity_id)
+
+            consumer = asyncio.create_task(consume())
+            await asyncio.sleep(0)
+            await nc.publish("events.entity.Task.t0.TaskStatusUpdated", b"{not json")
+            await publish(nc, status_updated("t1"))
+            await client.close_subscriptions()
+            await consumer
+            return received
+
+        assert asyncio.run(run()) == ["t1"]
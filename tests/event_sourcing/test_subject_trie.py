@@ -0,0 +1,87 @@
+from collections import Counter
+from itertools import product
+from random import Random
+
+import pytest
+
+from event_sourcing.subject_trie import SubjectTrie
+
+TOKENS = ["a", "b", "c"]
+
+
+def nats_matches(pattern: str, subject: str) -> bool:
+    """NATS wildcard rules: `*` matches one token, a final `>` one or more tokens."""
+    pattern_tokens = pattern.split(".")
+    subject_tokens = subject.split(".")
+    for position, token in enumerate(pattern_tokens):
+        if token == ">":
+            return len(subject_tokens) > position
+        if position >= len(subject_tokens) or token not in ("*", subject_tokens[position]):
+            return False
+    return len(pattern_tokens) == len(subject_tokens)
+
+
+def random_subject(rng: Random, wildcards: bool) -> str:
+    tokens = [rng.choice(TOKENS + ["*"] if wildcards else TOKENS) for _ in range(rng.randint(1, 4))]
+    if wildcards and rng.random() < 0.3:
+        tokens[-1] = ">"
+    return ".".join(tokens)
+
+
+class SubjectTrieTests:
+    @pytest.mark.parametrize("seed", range(20))
+    def test_matches_like_nats(self, seed: int) -> None:
+        rng = Random(seed)
+        trie: SubjectTrie[int] = SubjectTrie()
+        patterns = {value: random_subject(rng, wildcards=True) for value in range(40)}
+        for value, pattern in patterns.items():
+            trie.add(pattern, value)
+
+        for value in rng.sample(sorted(patterns), 10):
+            trie.remove(patterns.pop(value), value)
+        assert len(trie) == len(patterns)
+
+        for _ in range(200):
+            subject = random_subject(rng, wildcards=False)
+            expected = [value for value, pattern in patterns.items() if nats_matches(pattern, subject)]
+            assert Counter(trie.match(subject.split("."))) == Counter(expected)
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_covering_patterns_match_every_subject_of_the_pattern(self, seed: int) -> None:
+        rng = Random(seed)
+        # "z" stands for any token none of the patterns names
+        subjects = [
+            ".".join(tokens) for size in range(1, 6) for tokens in product(TOKENS + ["z"], repeat=size)
+        ]
+        patterns = {value: random_subject(rng, wildcards=True) for value in range(30)}
+        matched = {
+            pattern: {subject for subject in subjects if nats_matches(pattern, subject)}
+            for pattern in patterns.values()
+        }
+        trie: SubjectTrie[int] = SubjectTrie()
+        for value, pattern in patterns.items():
+            trie.add(pattern, value)
+
+        for pattern in set(patterns.values()):
+            expected = [value for value, other in patterns.items() if matched[pattern] <= matched[other]]
+            assert Counter(trie.covering(pattern)) == Counter(expected)
+
+    def test_a_value_added_twice_matches_twice(self) -> None:
+        trie: SubjectTrie[str] = SubjectTrie()
+        trie.add("events.>", "x")
+        trie.add("events.>", "x")
+        assert trie.match(["events", "entity"]) == ["x", "x"]
+
+        trie.remove("events.>", "x")
+        assert trie.match(["events", "entity"]) == ["x"]
+        assert trie.match(["events"]) == []
+
+    def test_tail_wildcard_only_ends_a_pattern(self) -> None:
+        trie: SubjectTrie[int] = SubjectTrie()
+        with pytest.raises(ValueError):
+            trie.add("events.>.entity", 1)
+
+    def test_removing_an_unknown_pattern_fails(self) -> None:
+        trie: SubjectTrie[int] = SubjectTrie()
+        with pytest.raises(KeyError):
+            trie.remove("events.entity", 1)
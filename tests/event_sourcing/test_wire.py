@@ -0,0 +1,74 @@
+import pytest
+
+from contracts.schemas.task import TaskStatus
+from event_sourcing.entity import EntityEvent
+from event_sourcing.wire import (
+    JSON_CONTENT_TYPE,
+    JSON_WIRE_FORMAT,
+    MSGPACK_CONTENT_TYPE,
+    MsgpackEventCodec,
+    get_wire_format,
+    readable_wire_formats,
+    schema_id,
+)
+from power_plant_construction.entities.task import TaskCreated, TaskStatusUpdated
+from tests.event_sourcing.test_codec import TaskDue, event_ids, sample_events
+
+# the msgpack extra
+msgpack = pytest.importorskip("msgpack")
+
+
+class WireFormatTests:
+    @pytest.mark.parametrize("name", ["json", "msgpack"])
+    @pytest.mark.parametrize("event", sample_events(), ids=event_ids(sample_events()))
+    def test_an_event_decodes_to_what_was_encoded(self, name: str, event: EntityEvent) -> None:
+        wire_format = get_wire_format(name)
+
+        decoded = wire_format.decode(type(event), wire_format.encode(event))
+
+        assert type(decoded) is type(event)
+        assert decoded.entity_id == event.entity_id
+        assert str(decoded.event_id) == str(event.event_id)
+        assert decoded.event_created_at == event.event_created_at
+        assert decoded.published_at == event.published_at
+        assert decoded.body() == event.body()
+
+    def test_msgpack_leaves_out_what_the_subject_says(self) -> None:
+        event = TaskStatusUpdated(entity_id="t1", status=TaskStatus.IN_PROGRESS, author="u0")
+
+        values = msgpack.unpackb(get_wire_format("msgpack").encode(event))
+
+        assert values[0] == MsgpackEventCodec(TaskStatusUpdated).schema_id
+        assert values[1:3] == [str(event.event_id), "t1"]
+        assert values[5:] == ["IN_PROGRESS", "u0"]
+        assert len(get_wire_format("msgpack").encode(event)) < len(JSON_WIRE_FORMAT.encode(event))
+
+    def test_msgpack_rejects_another_layout(self) -> None:
+        event = TaskStatusUpdated(entity_id="t1", status=TaskStatus.IN_PROGRESS, author="u0")
+        values = msgpack.unpackb(get_wire_format("msgpack").encode(event))
+        values[0] = schema_id(TaskCreated, MsgpackEventCodec(TaskCreated).fields)
+
+        with pytest.raises(ValueError, match="TaskStatusUpdated payload has schema"):
+            get_wire_format("msgpack").decode(TaskStatusUpdated, msgpack.packb(values))
+
+    def test_the_schema_follows_the_field_names_and_kinds(self) -> None:
+        due_fields = MsgpackEventCodec(TaskDue).fields
+
+        assert schema_id(TaskDue, due_fields) == schema_id(TaskDue, due_fields)
+        assert schema_id(TaskDue, due_fields) != schema_id(TaskDue, due_fields[:-1])
+        assert schema_id(TaskDue, due_fields) != schema_id(TaskStatusUpdated, due_fields)
+
+    def test_formats_are_announced_by_content_type(self) -> None:
+        assert JSON_WIRE_FORMAT.header_value is None
+        assert get_wire_format("msgpack").header_value == MSGPACK_CONTENT_TYPE
+        assert get_wire_format("json") is JSON_WIRE_FORMAT
+        assert get_wire_format("msgpack") is get_wire_format("msgpack")
+        assert readable_wire_formats() == {
+            None: JSON_WIRE_FORMAT,
+            JSON_CONTENT_TYPE: JSON_WIRE_FORMAT,
+            MSGPACK_CONTENT_TYPE: get_wire_format("msgpack"),
+        }
+
+    def test_an_unknown_format(self) -> None:
+        with pytest.raises(ValueError, match="Unknown event wire format: avro"):
+            get_wire_format("avro")
@@ -0,0 +1,189 @@
+from random import Random
+import asyncio
+
+import pytest
+
+from contracts.schemas.task import TaskStatus
+from power_plant_construction.entities.task import TaskCreated, TaskDependencyAdded, TaskDependencyRemoved
+from power_plant_construction.planning.dependency_graph import DependencyCycleError, DependencyGraph
+
+TASKS = [f"t{i}" for i in range(30)]
+
+
+def reachable(edges: set[tuple[str, str]], task: str) -> set[str]:
+    """Every task `task` transitively depends on, by brute force."""
+    seen: set[str] = set()
+    stack = [task]
+    while stack:
+        current = stack.pop()
+        for node, dependency in edges:
+            if node == current and dependency not in seen:
+                seen.add(dependency)
+                stack.append(dependency)
+    return seen
+
+
+def assert_consistent(graph: DependencyGraph, edges: set[tuple[str, str]]) -> None:
+    assert set(graph.dependencies()) == edges
+    for task, depends_on in edges:
+        assert graph.position(depends_on) < graph.position(task)
+
+    order = graph.topological_order()
+    assert sorted(order) == sorted(graph.topological_order(TASKS))
+    assert [graph.position(task) for task in order] == list(range(len(order)))
+
+
+class DependencyGraphTests:
+    @pytest.mark.parametrize("seed", range(20))
+    def test_random_changes_keep_a_topological_order_and_reject_cycles(self, seed: int) -> None:
+        rng = Random(seed)
+        graph = DependencyGraph()
+        for task in TASKS:
+            graph.add_task(task)
+        edges: set[tuple[str, str]] = set()
+
+        for _ in range(300):
+            task, depends_on = rng.choice(TASKS), rng.choice(TASKS)
+            if edges and rng.random() < 0.3:
+                task, depends_on = rng.choice(sorted(edges))
+                graph.remove_dependency(task, depends_on)
+                edges.discard((task, depends_on))
+            else:
+                cycle = task == depends_on or task in reachable(edges, depends_on)
+                assert graph.would_create_cycle(task, depends_on) == cycle
+                if cycle:
+                    with pytest.raises(DependencyCycleError):
+                        graph.add_dependency(task, depends_on)
+                else:
+                    graph.add_dependency(task, depends_on)
+                    edges.add((task, depends_on))
+
+            assert_consistent(graph, edges)
+
+        for task in TASKS:
+            assert graph.blockers(task) == reachable(edges, task)
+            assert graph.dependents(task) == {other for other in TASKS if task in reachable(edges, other)}
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_load_orders_the_graph_and_drops_what_closes_cycles(self, seed: int) -> None:
+        rng = Random(seed)
+        dependencies = [(rng.choice(TASKS), rng.choice(TASKS)) for _ in range(60)]
+        dependencies = [(task, depends_on) for task, depends_on in dependencies if task != depends_on]
+
+        graph = DependencyGraph()
+        graph.load(TASKS, dependencies)
+
+        edges = set(graph.dependencies())
+        assert edges <= set(dependencies)
+        for task, depends_on in set(dependencies) - edges:
+            # only the dependencies that would close a cycle are left out
+            assert task in reachable(edges, depends_on)
+        assert_consistent(graph, edges)
+
+    def test_reserved_dependencies_are_checked_against_and_removed_on_failure(self) -> None:
+        graph = DependencyGraph()
+        graph.add_dependency("t1", "t0")
+
+        with pytest.raises(RuntimeError):
+            with graph.reserve("t2", ["t1", "t0"]):
+                with pytest.raises(DependencyCycleError):
+                    with graph.reserve("t0", ["t2"]):
+                        pass
+                raise RuntimeError()
+
+        # the dependency that existed before the reservation stays
+        assert set(graph.dependencies()) == {("t1", "t0")}
+
+        with graph.reserve("t2", ["t1"]):
+            pass
+        assert set(graph.dependencies()) == {("t1", "t0"), ("t2", "t1")}
+
+    def test_applying_events_twice_is_harmless(self) -> None:
+        events = [
+            TaskCreated(
+                entity_id=task,
+                title=task,
+                description="",
+                status=TaskStatus.PENDING,
+                assignee="u",
+                author="u",
+            )
+            for task in ("t0", "t1", "t2")
+        ]
+        events += [
+            TaskDependencyAdded(entity_id="t1", depends_on="t0"),
+            TaskDependencyAdded(entity_id="t2", depends_on="t1"),
+            TaskDependencyAdded(entity_id="t0", depends_on="t2"),
+            TaskDependencyRemoved(entity_id="t2", depends_on="t1"),
+        ]
+
+        graph = DependencyGraph()
+        graph.apply_batch(events)
+        graph.apply_batch(events)
+
+        # the cycle closing dependency was ignored when it arrived
+        assert set(graph.dependencies()) == {("t1", "t0")}
+        assert len(graph) == 3
+
+
+def added(task: str, depends_on: str, version: int) -> TaskDependencyAdded:
+    return TaskDependencyAdded(entity_id=task, depends_on=depends_on, graph_version=version)
+
+
+def removed(task: str, depends_on: str, version: int) -> TaskDependencyRemoved:
+    return TaskDependencyRemoved(entity_id=task, depends_on=depends_on, graph_version=version)
+
+
+class DependencyGraphVersionTests:
+    def test_a_version_is_applied_once(self) -> None:
+        graph = DependencyGraph()
+        events = [added("t1", "t0", 1), removed("t1", "t0", 2)]
+        graph.apply_batch(events)
+        # the same events arriving again, the add must not come back
+        graph.apply_batch(events)
+
+        assert graph.version == 2
+        assert list(graph.dependencies()) == []
+
+    def test_versions_arriving_out_of_order_are_counted_once_the_gap_is_filled(self) -> None:
+        graph = DependencyGraph()
+        graph.apply(added("t1", "t0", 1))
+        graph.apply(added("t3", "t2", 3))
+        assert graph.version == 1
+        assert graph.behind_for() > 0
+
+        graph.apply(added("t2", "t1", 2))
+        assert graph.version == 3
+        assert graph.behind_for() == 0
+        assert set(graph.dependencies()) == {("t1", "t0"), ("t2", "t1"), ("t3", "t2")}
+
+    def test_loading_skips_what_the_loaded_version_contains(self) -> None:
+        graph = DependencyGraph()
+        graph.load(["t0", "t1", "t2"], [("t1", "t0")], version=5)
+        graph.apply_batch([added("t1", "t0", 4), removed("t1", "t0", 5), added("t2", "t1", 6)])
+
+        assert graph.version == 6
+        assert set(graph.dependencies()) == {("t1", "t0"), ("t2", "t1")}
+
+    def test_a_committed_edge_closing_a_cycle_with_a_reservation_leaves_the_graph_behind(self) -> None:
+        graph = DependencyGraph()
+        graph.load(["t0", "t1"], [], version=1)
+        with pytest.raises(RuntimeError):
+            with graph.reserve("t0", ["t1"]):
+                graph.apply(added("t1", "t0", 2))
+                raise RuntimeError("the reserving write fails its version check")
+
+        assert graph.version == 1
+        assert graph.behind_for() > 0
+        assert list(graph.dependencies()) == []
+
+    def test_waiting_for_a_version(self) -> None:
+        async def run() -> tuple[bool, bool]:
+            graph = DependencyGraph()
+            timed_out = await graph.wait_for(1, timeout=0.01)
+            waiting = asyncio.create_task(graph.wait_for(2, timeout=1))
+            await asyncio.sleep(0)
+            graph.apply_batch([added("t1", "t0", 1), added("t2", "t1", 2)])
+            return timed_out, await waiting
+
+        assert asyncio.run(run()) == (False, True)
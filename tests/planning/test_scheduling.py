@@ -0,0 +1,125 @@
+from random import Random
+
+import pytest
+
+from contracts.schemas.task import TaskStatus
+from event_sourcing.entity import EntityEvent
+from power_plant_construction.entities.task import (
+    TaskCreated,
+    TaskDependencyAdded,
+    TaskDependencyRemoved,
+    TaskStatusUpdated,
+)
+from power_plant_construction.planning.dependency_graph import DependencyCycleError, DependencyGraph
+from power_plant_construction.planning.scheduling import ScheduleTracker, duration, schedule_tasks
+
+STATUSES = [TaskStatus.PENDING, TaskStatus.IN_PROGRESS, TaskStatus.COMPLETED]
+
+
+def earliest_starts(statuses: dict[str, TaskStatus], edges: set[tuple[str, str]]) -> dict[str, int]:
+    """Longest path to every task, by brute force."""
+    starts: dict[str, int] = {}
+
+    def start(task: str) -> int:
+        if task not in starts:
+            starts[task] = max(
+                (start(dep) + duration(statuses[dep]) for node, dep in edges if node == task), default=0
+            )
+        return starts[task]
+
+    for task in statuses:
+        start(task)
+    return starts
+
+
+def blockers(edges: set[tuple[str, str]], task: str) -> set[str]:
+    found: set[str] = set()
+    stack = [task]
+    while stack:
+        current = stack.pop()
+        for node, dependency in edges:
+            if node == current and dependency not in found:
+                found.add(dependency)
+                stack.append(dependency)
+    return found
+
+
+def random_dag(rng: Random, size: int, edge_count: int) -> tuple[dict[str, TaskStatus], set[tuple[str, str]]]:
+    statuses = {f"t{i}": rng.choice(STATUSES) for i in range(size)}
+    edges = set()
+    for _ in range(edge_count):
+        first, second = sorted(rng.sample(range(size), 2))
+        edges.add((f"t{second}", f"t{first}"))
+    return statuses, edges
+
+
+def created(task: str, status: TaskStatus) -> TaskCreated:
+    return TaskCreated(entity_id=task, title=task, description="", status=status, assignee="u", author="u")
+
+
+class ScheduleTests:
+    @pytest.mark.parametrize("seed", range(20))
+    def test_earliest_starts_are_the_longest_paths(self, seed: int) -> None:
+        rng = Random(seed)
+        statuses, edges = random_dag(rng, 40, 80)
+
+        schedule = schedule_tasks(statuses.items(), edges)
+
+        expected = earliest_starts(statuses, edges)
+        assert dict(zip(schedule.ids, schedule.earliest_start)) == expected
+        assert schedule.length == max(start + duration(statuses[task]) for task, start in expected.items())
+
+        path = schedule.critical_path()
+        assert len(path) == schedule.length
+        for before, after in zip(path, path[1:]):
+            assert before in blockers(edges, after)
+            assert expected[after] == expected[before] + 1
+
+        order = [schedule.ids[node] for node in schedule.earliest_start_order()]
+        assert [expected[task] for task in order] == sorted(expected.values())
+
+    def test_cycles_are_rejected(self) -> None:
+        statuses = {"t0": TaskStatus.PENDING, "t1": TaskStatus.PENDING, "t2": TaskStatus.PENDING}
+        with pytest.raises(DependencyCycleError):
+            schedule_tasks(statuses.items(), {("t1", "t0"), ("t0", "t1")})
+
+
+class ScheduleTrackerTests:
+    @pytest.mark.parametrize("seed", range(20))
+    def test_follows_task_events_like_a_full_recompute(self, seed: int) -> None:
+        rng = Random(seed)
+        statuses, edges = random_dag(rng, 30, 40)
+        graph = DependencyGraph()
+        graph.load(statuses, edges)
+        tracker = ScheduleTracker(graph)
+        tracker.load(schedule_tasks(statuses.items(), edges))
+
+        for step in range(200):
+            event: EntityEvent
+            roll = rng.random()
+            if roll < 0.1:
+                task = f"n{step}"
+                statuses[task] = rng.choice(STATUSES)
+                event = created(task, statuses[task])
+            elif roll < 0.4:
+                task = rng.choice(sorted(statuses))
+                statuses[task] = rng.choice(STATUSES)
+                event = TaskStatusUpdated(entity_id=task, status=statuses[task], author="u")
+            elif roll < 0.6 and edges:
+                task, depends_on = rng.choice(sorted(edges))
+                edges.discard((task, depends_on))
+                event = TaskDependencyRemoved(entity_id=task, depends_on=depends_on)
+            else:
+                task, depends_on = rng.sample(sorted(statuses), 2)
+                if graph.would_create_cycle(task, depends_on):
+                    continue
+                edges.add((task, depends_on))
+                event = TaskDependencyAdded(entity_id=task, depends_on=depends_on)
+
+            graph.apply(event)
+            tracker.apply(event)
+
+            expected = earliest_starts(statuses, edges)
+            assert {task: tracker.earliest_start(task) for task in statuses} == expected
+            assert tracker.length == max(start + duration(statuses[task]) for task, start in expected.items())
+            assert len(tracker.critical_path()) == tracker.length
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from power_plant_construction.repositories.keyset import keyset_page
+
+
+class KeysetPageTests:
+    def test_the_first_page_only_orders_and_limits(self) -> None:
+        args = ["u1"]
+        query = keyset_page(
+            "select * from tasks t",
+            conditions=["t.assignee = $1"],
+            args=args,
+            after=None,
+            limit=10,
+            alias="t",
+        )
+        assert query == (
+            "select * from tasks t where t.assignee = $1 order by t.created_at, t.entity_id limit $2"
+        )
+        assert args == ["u1", 10]
+
+    def test_a_later_page_starts_after_the_keyset(self) -> None:
+        after = (datetime(2023, 5, 1), "t9")
+        args = ["u1", "COMPLETED"]
+        conditions = ["t.assignee = $1", "t.status = $2"]
+        query = keyset_page(
+            "select * from tasks t", conditions=conditions, args=args, after=after, limit=10, alias="t"
+        )
+        assert query == (
+            "select * from tasks t where t.assignee = $1 and t.status = $2"
+            " and (t.created_at, t.entity_id) > ($3, $4)"
+            " order by t.created_at, t.entity_id limit $5"
+        )
+        assert args == ["u1", "COMPLETED", datetime(2023, 5, 1), "t9", 10]
+        assert conditions == ["t.assignee = $1", "t.status = $2"]
+
+    def test_without_a_limit_every_row_after_the_keyset_is_read(self) -> None:
+        args: list = []
+        query = keyset_page(
+            "select * from notifications n",
+            conditions=["true"],
+            args=args,
+            after=(datetime(2023, 5, 1), "n1"),
+            limit=None,
+            alias="n",
+        )
+        assert query.endswith("> ($1, $2) order by n.created_at, n.entity_id")
+        assert args == [datetime(2023, 5, 1), "n1"]